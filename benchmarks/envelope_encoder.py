@@ -0,0 +1,67 @@
+"""Benchmark of envelope JSON serialization.
+
+Compares ``json.dumps(envelope.to_dict())`` with
+:func:`pydocusign.encoder.encode`, on envelopes with many tabs. Envelopes are
+built before timing, and a fresh envelope is used for each run, so that cached
+``to_dict()`` results do not help the former.
+
+Usage::
+
+    python benchmarks/envelope_encoder.py [--signers 500] [--tabs 40]
+
+"""
+import argparse
+import json
+import timeit
+
+import pydocusign
+from pydocusign import encoder
+
+
+def build_envelope(signers, tabs):
+    """Return envelope with ``signers`` signers of ``tabs`` tabs each."""
+    return pydocusign.Envelope(
+        documents=[pydocusign.Document(documentId=1, name='document.pdf')],
+        emailSubject='Benchmark',
+        signers=[
+            pydocusign.Signer(
+                clientUserId='client-{0}'.format(index),
+                email='signer-{0}@example.com'.format(index),
+                name='Signer {0}'.format(index),
+                recipientId=index + 1,
+                routingOrder=index + 1,
+                tabs=[
+                    (pydocusign.SignHereTab if tab % 2 else
+                     pydocusign.DateSignedTab)(
+                        documentId=1, pageNumber=tab // 10 + 1,
+                        xPosition=100, yPosition=(tab % 10) * 70)
+                    for tab in range(tabs)])
+            for index in range(signers)])
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description='Compare envelope JSON serializers.')
+    arg_parser.add_argument('--signers', type=int, default=500)
+    arg_parser.add_argument('--tabs', type=int, default=40,
+                            help='Tabs per signer.')
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    options = arg_parser.parse_args(argv)
+    envelopes = [build_envelope(options.signers, options.tabs)
+                 for run in range(options.repeat * 2)]
+    serializers = [
+        ('json.dumps(to_dict())',
+         lambda envelope: json.dumps(envelope.to_dict()).encode('utf-8')),
+        ('encoder.encode()', encoder.encode),
+    ]
+    print('{0} tabs'.format(options.signers * options.tabs))
+    for index, (name, serialize) in enumerate(serializers):
+        batch = iter(envelopes[index::2])
+        duration = min(timeit.repeat(lambda: serialize(next(batch)),
+                                     number=1, repeat=options.repeat))
+        print('{name}: {duration:.1f} ms'.format(name=name,
+                                                 duration=duration * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark of per-recipient envelope requests.
+
+Compares building a new envelope and its request body for each recipient with
+filling an :class:`pydocusign.stamp.EnvelopeStamp` compiled once.
+
+Usage::
+
+    python benchmarks/envelope_stamp.py [--sends 2000] [--tabs 40]
+
+"""
+import argparse
+from io import BytesIO
+import timeit
+
+import pydocusign
+
+
+def build_envelope(name, email, client_user_id, tabs, pdf_data):
+    """Return single-signer envelope with ``tabs`` tabs."""
+    return pydocusign.Envelope(
+        documents=[pydocusign.Document(documentId=1, name='document.pdf',
+                                       data=BytesIO(pdf_data))],
+        emailSubject='Benchmark',
+        eventNotification=pydocusign.EventNotification(
+            url='https://example.com/callback'),
+        signers=[
+            pydocusign.Signer(
+                clientUserId=client_user_id, email=email, name=name,
+                recipientId=1,
+                tabs=[
+                    pydocusign.SignHereTab(
+                        documentId=1, pageNumber=tab // 10 + 1,
+                        xPosition=100, yPosition=(tab % 10) * 70)
+                    for tab in range(tabs)])])
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description='Compare per-recipient envelope requests.')
+    arg_parser.add_argument('--sends', type=int, default=2000)
+    arg_parser.add_argument('--tabs', type=int, default=40)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    options = arg_parser.parse_args(argv)
+    client = pydocusign.DocuSignClient(root_url='https://example.com',
+                                       account_id='benchmark',
+                                       oauth2_token='benchmark')
+    pdf_data = b'%PDF-1.4' + b'\0' * 100 * 1024
+    values = [{'name': 'Signer {0}'.format(index),
+               'email': 'signer-{0}@example.com'.format(index),
+               'client': 'client-{0}'.format(index)}
+              for index in range(options.sends)]
+
+    def rebuild():
+        for value in values:
+            client._create_envelope_from_document_request(build_envelope(
+                value['name'], value['email'], value['client'], options.tabs,
+                pdf_data))
+
+    def stamp():
+        envelope_stamp = client.envelope_stamp(build_envelope(
+            pydocusign.StampField('name'), pydocusign.StampField('email'),
+            pydocusign.StampField('client'), options.tabs, pdf_data))
+        for value in values:
+            envelope_stamp.request_parts(value)
+
+    print('{0} sends'.format(options.sends))
+    for name, run in [('rebuild', rebuild), ('stamp', stamp)]:
+        duration = min(timeit.repeat(run, number=1, repeat=options.repeat))
+        print('{name}: {duration:.1f} ms'.format(name=name,
+                                                 duration=duration * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Memory benchmark of `pydocusign` models.
+
+Compares memory used by slotted models with the same data stored in
+instances with a ``__dict__``, which is how models were stored before they
+used ``__slots__``. Also measures memory of ``to_dict()`` results cached
+within :func:`pydocusign.cached_dicts`.
+
+Usage::
+
+    python benchmarks/models_memory.py [--tabs 50000] [--signers 5000]
+
+"""
+import argparse
+import gc
+import sys
+
+import pydocusign
+
+
+class Legacy(object):
+    """Instance with a ``__dict__``, like models without ``__slots__``."""
+
+
+def legacy_copy(model):
+    """Return :class:`Legacy` instance holding the state of ``model``."""
+    legacy = Legacy()
+    legacy.__dict__.update(model.__getstate__())
+    return legacy
+
+
+def object_size(obj):
+    """Return size of ``obj``, including its ``__dict__``.
+
+    Dictionaries held by ``obj`` (such as options of advanced tabs) are
+    counted, other attribute values are shared or identical in both layouts.
+
+    """
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+        values = obj.__dict__.values()
+    else:
+        values = obj.__getstate__().values()
+    for value in values:
+        if isinstance(value, dict):
+            size += sys.getsizeof(value)
+    return size
+
+
+def cache_size(model):
+    """Return size of cached ``to_dict()`` result of ``model``.
+
+    Dictionaries of children are counted with children.
+
+    """
+    fingerprint, data = model._dict_cache
+    size = sys.getsizeof(model._dict_cache) + sys.getsizeof(fingerprint) + \
+        sys.getsizeof(data)
+    for item in fingerprint:
+        size += sys.getsizeof(item)
+    for value in data.values():
+        if isinstance(value, (dict, list)):
+            size += sys.getsizeof(value)
+    return size
+
+
+def measure(name, factory, count):
+    """Print per-instance memory of ``count`` models built by ``factory``."""
+    gc.collect()
+    models = [factory(index) for index in range(count)]
+    slotted = sum(object_size(model) for model in models) / float(count)
+    legacies = [legacy_copy(model) for model in models]
+    legacy = sum(object_size(item) for item in legacies) / float(count)
+    print('{name}: {slotted:.0f} bytes with __slots__, {legacy:.0f} bytes '
+          'with __dict__ ({saving:.0%} saved, {total:.1f} MB for {count} '
+          'instances)'.format(
+              name=name, slotted=slotted, legacy=legacy,
+              saving=1 - slotted / legacy,
+              total=(legacy - slotted) * count / 1024 / 1024, count=count))
+    with pydocusign.cached_dicts():
+        for model in models:
+            model.to_dict()
+        cached = sum(cache_size(model) for model in models) / float(count)
+        print('{name}: {cached:.0f} more bytes with to_dict() cached '
+              '({total:.1f} MB for {count} instances)'.format(
+                  name=name, cached=cached,
+                  total=cached * count / 1024 / 1024, count=count))
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description='Measure memory of pydocusign models.')
+    arg_parser.add_argument('--tabs', type=int, default=50000)
+    arg_parser.add_argument('--signers', type=int, default=5000)
+    options = arg_parser.parse_args(argv)
+    measure('SignHereTab',
+            lambda index: pydocusign.SignHereTab(
+                documentId=1, pageNumber=index % 10 + 1, xPosition=100,
+                yPosition=index % 700),
+            options.tabs)
+    measure('NoteTab',
+            lambda index: pydocusign.NoteTab(documentId=1,
+                                             yPosition=index % 700),
+            options.tabs)
+    measure('Signer',
+            lambda index: pydocusign.Signer(
+                clientUserId=str(index), email='signer@example.com',
+                name='Signer {0}'.format(index), recipientId=index,
+                routingOrder=index),
+            options.signers)
+
+
+if __name__ == '__main__':
+    main()
@@ -21,11 +21,17 @@ It also means that things not exposed in :mod:`docusign.api` are not part of
 the deprecation policy. They can be moved, changed, removed without notice.
 
 """
+from pydocusign.cache import EnvelopeCache  # NoQA
 from pydocusign.client import DocuSignClient  # NoQA
+from pydocusign.dedup import CallbackDeduplicator  # NoQA
+from pydocusign.export import EventColumns  # NoQA
+from pydocusign.layout import TabColumns  # NoQA
+from pydocusign.models import cached_dicts  # NoQA
 from pydocusign.models import Document  # NoQA
 from pydocusign.models import DocuSignObject  # NoQA
 from pydocusign.models import Envelope  # NoQA
 from pydocusign.models import EventNotification  # NoQA
+from pydocusign.models import FileDocument  # NoQA
 from pydocusign.models import Recipient  # NoQA
 from pydocusign.models import Signer  # NoQA
 from pydocusign.models import CarbonCopyRecipient  # NoQA
@@ -39,4 +45,10 @@ from pydocusign.models import DeclineTab  # NoQA
 from pydocusign.models import NoteTab  # NoQA
 from pydocusign.models import SignerAttachmentTab  # NoQA
 from pydocusign.models import Tab  # NoQA
+from pydocusign.parser import CallbackEvent  # NoQA
 from pydocusign.parser import DocuSignCallbackParser  # NoQA
+from pydocusign.receiver import CallbackReceiver  # NoQA
+from pydocusign.registry import DocumentRegistry  # NoQA
+from pydocusign.stamp import EnvelopeStamp  # NoQA
+from pydocusign.stamp import StampField  # NoQA
+from pydocusign.state import EnvelopeStateIndex  # NoQA
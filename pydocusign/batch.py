@@ -0,0 +1,226 @@
+"""Batch parsing of DocuSign callback archives.
+
+Callbacks are read from a directory (one callback per file), a tarball
+(one callback per member) or a newline-delimited archive (one callback per
+line). They are parsed with :class:`~pydocusign.parser.DocuSignCallbackParser`
+in a pool of processes, and their events are written as JSON lines.
+
+Command line usage::
+
+    python -m pydocusign.batch archive.tar.gz --output events.jsonl
+
+"""
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import sys
+import tarfile
+try:
+    import Queue as queue
+except ImportError:  # Python 3.
+    import queue
+
+from pydocusign.parser import DocuSignCallbackParser
+
+
+def iter_directory(path):
+    """Yield ``(name, body)`` for each file in directory ``path``."""
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for filename in sorted(files):
+            filepath = os.path.join(root, filename)
+            with open(filepath, 'rb') as callback_file:
+                yield filepath, callback_file.read()
+
+
+def iter_tarball(path):
+    """Yield ``(name, body)`` for each file in tarball ``path``."""
+    with tarfile.open(path) as tarball:
+        for member in tarball:
+            if member.isfile():
+                yield member.name, tarball.extractfile(member).read()
+
+
+def iter_lines(path):
+    """Yield ``(name, body)`` for each non-empty line in file ``path``."""
+    with open(path, 'rb') as archive:
+        for index, line in enumerate(archive, 1):
+            line = line.strip()
+            if line:
+                yield '{path}:{line}'.format(path=path, line=index), line
+
+
+def iter_callbacks(path):
+    """Yield ``(name, body)`` of callbacks in ``path``.
+
+    ``path`` is either a directory, a tarball or a newline-delimited archive.
+
+    """
+    if os.path.isdir(path):
+        return iter_directory(path)
+    if tarfile.is_tarfile(path):
+        return iter_tarball(path)
+    return iter_lines(path)
+
+
+def parse_callback(name, body):
+    """Return list of normalized events of callback ``body``.
+
+    Events are JSON-serializable dictionaries. If callback cannot be parsed,
+    a single record with ``error`` key is returned.
+
+    """
+    try:
+        parser = DocuSignCallbackParser(body)
+        envelope_id = parser.envelope_id
+        records = []
+        for event in parser.event_records:
+            records.append({
+                'source': name,
+                'envelopeId': envelope_id,
+                'object': event.object,
+                'status': event.status,
+                'datetime': event.datetime.isoformat(),
+                'recipientId': event.recipientId,
+                'clientUserId': event.clientUserId,
+            })
+        return records
+    except Exception as exception:
+        return [{'source': name, 'error': repr(exception)}]
+
+
+def parse_chunk(chunk):
+    """Return list of normalized events of callbacks in ``chunk``.
+
+    ``chunk`` is a list of ``(name, body)``.
+
+    """
+    records = []
+    for name, body in chunk:
+        records.extend(parse_callback(name, body))
+    return records
+
+
+def iter_chunks(callbacks, chunksize):
+    """Group ``callbacks`` in lists of ``chunksize`` items."""
+    chunk = []
+    for callback in callbacks:
+        chunk.append(callback)
+        if len(chunk) >= chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_callbacks(callbacks, processes=None, chunksize=100, ordered=True):
+    """Yield normalized events of ``callbacks``, parsed in a process pool.
+
+    ``callbacks`` is an iterable of ``(name, body)``, as returned by
+    :func:`iter_callbacks`. Callbacks are sent to workers by chunks of
+    ``chunksize`` callbacks. At most two chunks per worker are pending at
+    once, so that large archives are not loaded in memory.
+
+    ``processes`` is the number of worker processes. ``None`` means the number
+    of CPUs. With ``1``, callbacks are parsed in current process.
+
+    If ``ordered`` is ``False``, events of chunks are yielded in the order
+    chunks are parsed, which does not preserve input order.
+
+    """
+    chunks = iter_chunks(callbacks, chunksize)
+    if processes == 1:
+        for chunk in chunks:
+            for record in parse_chunk(chunk):
+                yield record
+        return
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    window = processes * 2
+    if ordered:
+        pending = collections.deque()
+
+        def submit(chunk):
+            pending.append(pool.apply_async(parse_chunk, (chunk,)))
+
+        def pop_records():
+            """Return records of oldest chunk, once it is parsed."""
+            return pending.popleft().get()
+    else:
+        pending = []  # Only its length matters.
+        completed = queue.Queue()
+
+        def submit(chunk):
+            pending.append(None)
+            pool.apply_async(parse_chunk, (chunk,), callback=completed.put)
+
+        def pop_records():
+            """Return records of the first chunk parsed."""
+            pending.pop()
+            return completed.get()
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for chunk in chunks:
+            submit(chunk)
+            if len(pending) >= window:
+                for record in pop_records():
+                    yield record
+        while pending:
+            for record in pop_records():
+                yield record
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def write_jsonl(records, output):
+    """Write ``records`` as JSON lines in file-like ``output``.
+
+    Return the number of records written.
+
+    """
+    count = 0
+    for record in records:
+        output.write(json.dumps(record, sort_keys=True))
+        output.write('\n')
+        count += 1
+    return count
+
+
+def main(argv=None):
+    """Command line entry point: parse callback archive to JSON lines."""
+    arg_parser = argparse.ArgumentParser(
+        description='Parse DocuSign callbacks archive into JSON lines.')
+    arg_parser.add_argument(
+        'path',
+        help='Directory, tarball or newline-delimited archive of callbacks.')
+    arg_parser.add_argument(
+        '-o', '--output', default='-',
+        help='Output file. Default: standard output.')
+    arg_parser.add_argument(
+        '-j', '--processes', type=int, default=None,
+        help='Number of worker processes. Default: number of CPUs.')
+    arg_parser.add_argument(
+        '--chunksize', type=int, default=100,
+        help='Number of callbacks per work unit. Default: 100.')
+    arg_parser.add_argument(
+        '--unordered', action='store_true',
+        help='Do not preserve input order in output.')
+    options = arg_parser.parse_args(argv)
+    records = parse_callbacks(iter_callbacks(options.path),
+                              processes=options.processes,
+                              chunksize=options.chunksize,
+                              ordered=not options.unordered)
+    if options.output == '-':
+        write_jsonl(records, sys.stdout)
+    else:
+        with open(options.output, 'w') as output:
+            write_jsonl(records, output)
+
+
+if __name__ == '__main__':
+    main()
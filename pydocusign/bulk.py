@@ -0,0 +1,120 @@
+"""Bulk send lists: one template, many recipients.
+
+DocuSign bulk send creates one envelope per "copy" of a bulk send list, from
+a template. A copy holds :class:`~pydocusign.models.Role` recipients (and
+optional custom fields). Copies are streamed from an iterator or a CSV file,
+and uploaded as lists of at most :data:`BULK_SEND_LIST_MAX_COPIES` copies.
+See :meth:`pydocusign.client.DocuSignClient.bulk_send`.
+
+.. note::
+
+   Bulk send lists are part of DocuSign REST API v2.1: client's ``root_url``
+   must point to ``/restapi/v2.1``.
+
+"""
+import csv
+import itertools
+import time
+
+from pydocusign import exceptions
+from pydocusign import models
+
+
+#: Maximum number of copies in a bulk send list, according to DocuSign.
+BULK_SEND_LIST_MAX_COPIES = 1000
+
+#: CSV columns read as :class:`~pydocusign.models.Role` attributes.
+CSV_ROLE_COLUMNS = ['roleName', 'name', 'email', 'clientUserId',
+                    'emailSubject', 'emailBody', 'supportedLanguage']
+
+
+def bulk_copy(copy):
+    """Return bulk copy dictionary of ``copy``.
+
+    ``copy`` is either a :class:`~pydocusign.models.Role`, a list of roles,
+    or a dictionary which is returned as is.
+
+    >>> bulk_copy(models.Role(name='Name', email='name@example.com',
+    ...                       roleName='Signer')) == {
+    ...     'recipients': [{'name': 'Name', 'email': 'name@example.com',
+    ...                     'roleName': 'Signer', 'clientUserId': None,
+    ...                     'emailNotification': None}],
+    ...     'customFields': []}
+    True
+
+    """
+    if isinstance(copy, dict):
+        return copy
+    if isinstance(copy, models.Role):
+        copy = [copy]
+    return {
+        'recipients': [role.to_dict() for role in copy],
+        'customFields': [],
+    }
+
+
+def read_roles_csv(csv_file, roleName=''):
+    """Yield :class:`~pydocusign.models.Role`, one per row of ``csv_file``.
+
+    First row holds column names, among :data:`CSV_ROLE_COLUMNS`. Other
+    columns are ignored. Empty values stand for ``None``. ``roleName`` is the
+    default role name, for files without ``roleName`` column.
+
+    """
+    for row in csv.DictReader(csv_file):
+        attributes = dict((name, row.get(name) or None)
+                          for name in CSV_ROLE_COLUMNS if name in row)
+        if not attributes.get('roleName'):
+            attributes['roleName'] = roleName
+        yield models.Role(**attributes)
+
+
+def chunks(iterable, size):
+    """Yield lists of at most ``size`` items of ``iterable``.
+
+    >>> list(chunks(range(5), 2))
+    [[0, 1], [2, 3], [4]]
+
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def batch_done(batch):
+    """Return ``True`` if bulk send ``batch`` status has nothing queued."""
+    return int(batch.get('queued') or 0) == 0 and \
+        int(batch.get('sent') or 0) + int(batch.get('failed') or 0) \
+        >= int(batch.get('batchSize') or 0)
+
+
+def wait_batches(client, batch_ids, interval=30, timeout=None,
+                 sleep=time.sleep, clock=time.time):
+    """Poll bulk send batches until they are done.
+
+    Return dictionary of batch status (as returned by
+    :meth:`~pydocusign.client.DocuSignClient.get_bulk_send_batch`), keyed by
+    batch ID. Batches are polled every ``interval`` seconds. Raise
+    :class:`~pydocusign.exceptions.DocuSignException` if they are not done
+    after ``timeout`` seconds.
+
+    """
+    deadline = None if timeout is None else clock() + timeout
+    pending = list(batch_ids)
+    statuses = {}
+    while True:
+        for batch_id in pending:
+            statuses[batch_id] = client.get_bulk_send_batch(batch_id)
+        pending = [batch_id for batch_id in pending
+                   if not batch_done(statuses[batch_id])]
+        if not pending:
+            return statuses
+        if deadline is not None and clock() + interval > deadline:
+            raise exceptions.DocuSignException(
+                'Bulk send batches not done after {timeout} seconds: '
+                '{batches}'.format(timeout=timeout,
+                                   batches=', '.join(pending)))
+        sleep(interval)
@@ -0,0 +1,138 @@
+"""Read-through cache of envelope data fetched from DocuSign API."""
+from collections import OrderedDict
+import copy
+import threading
+import time
+
+
+#: Kinds of envelope data the cache stores.
+CACHE_ENVELOPE = 'envelope'
+CACHE_RECIPIENTS = 'recipients'
+CACHE_CUSTOM_FIELDS = 'custom_fields'
+
+
+class EnvelopeCache(object):
+    """Bounded and expiring cache of envelope data, keyed by envelope ID.
+
+    :class:`~pydocusign.client.DocuSignClient` uses it, when given as
+    ``cache`` argument, for ``get_envelope()``, ``get_envelope_recipients()``
+    and ``get_envelope_custom_fields()``.
+
+    At most ``max_size`` envelopes are kept: least recently used ones are
+    dropped first. Entries expire ``ttl`` seconds after they were stored.
+
+    A read which misses the cache records the envelope's :meth:`generation`
+    before fetching data, and gives it to :meth:`set`. Data is not stored if
+    the envelope was invalidated meanwhile, since it may predate the write
+    that caused invalidation.
+
+    >>> cache = EnvelopeCache(max_size=2, ttl=60)
+    >>> cache.set('envelope-1', CACHE_ENVELOPE, {'status': 'sent'})
+    >>> cache.get('envelope-1', CACHE_ENVELOPE)
+    {'status': 'sent'}
+    >>> cache.get('envelope-1', CACHE_RECIPIENTS) is None
+    True
+    >>> cache.invalidate('envelope-1')
+    >>> cache.get('envelope-1', CACHE_ENVELOPE) is None
+    True
+    >>> generation = cache.generation('envelope-1')
+    >>> cache.invalidate('envelope-1')  # While data was being fetched.
+    >>> cache.set('envelope-1', CACHE_ENVELOPE, {'status': 'sent'},
+    ...           generation)
+    >>> cache.get('envelope-1', CACHE_ENVELOPE) is None
+    True
+
+    """
+    def __init__(self, max_size=1024, ttl=300, clock=time.time):
+        #: Maximum number of envelopes in cache.
+        self.max_size = max_size
+
+        #: Lifetime of cache entries, in seconds.
+        self.ttl = ttl
+
+        #: Function that returns current time, in seconds.
+        self.clock = clock
+
+        self._envelopes = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Generation of envelopes, i.e. value of ``_counter`` when they were
+        # last invalidated. Bounded: forgotten envelopes get ``_floor``,
+        # which is greater than or equal to any forgotten generation.
+        self._generations = OrderedDict()
+        self._counter = 0
+        self._floor = 0
+
+    def __len__(self):
+        return len(self._envelopes)
+
+    def get(self, envelope_id, kind, default=None):
+        """Return copy of cached ``kind`` data for envelope, or ``default``."""
+        with self._lock:
+            entries = self._envelopes.pop(envelope_id, None)
+            if entries is None:
+                return default
+            self._envelopes[envelope_id] = entries  # Most recently used.
+            try:
+                expires, value = entries[kind]
+            except KeyError:
+                return default
+            if expires <= self.clock():
+                del entries[kind]
+                return default
+        return copy.deepcopy(value)
+
+    def generation(self, envelope_id):
+        """Return token which changes whenever envelope is invalidated."""
+        with self._lock:
+            return self._generations.get(envelope_id, self._floor)
+
+    def set(self, envelope_id, kind, value, generation=None):
+        """Store copy of ``kind`` data for envelope.
+
+        If ``generation`` is given, data is stored only if envelope's
+        :meth:`generation` is still ``generation``.
+
+        """
+        value = copy.deepcopy(value)
+        with self._lock:
+            if generation is not None and generation != \
+                    self._generations.get(envelope_id, self._floor):
+                return  # Invalidated while data was being fetched.
+            entries = self._envelopes.pop(envelope_id, {})
+            entries[kind] = (self.clock() + self.ttl, value)
+            self._envelopes[envelope_id] = entries
+            while len(self._envelopes) > self.max_size:
+                self._envelopes.popitem(last=False)
+
+    def invalidate(self, envelope_id, kind=None):
+        """Drop cached data for envelope: every kind if ``kind`` is None."""
+        with self._lock:
+            if kind is None:
+                self._envelopes.pop(envelope_id, None)
+            else:
+                self._envelopes.get(envelope_id, {}).pop(kind, None)
+            self._counter += 1
+            self._generations.pop(envelope_id, None)
+            self._generations[envelope_id] = self._counter
+            while len(self._generations) > self.max_size:
+                self._floor = self._generations.popitem(last=False)[1]
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._envelopes.clear()
+            self._counter += 1
+            self._generations.clear()
+            self._floor = self._counter
+
+    def update_from_callback(self, parser):
+        """Invalidate envelope data notified in DocuSign callback.
+
+        ``parser`` is a :class:`~pydocusign.parser.DocuSignCallbackParser`
+        instance. A Connect notification means the envelope's status,
+        recipients or custom fields may have changed, so every cached entry
+        for this envelope is dropped. Next read fetches fresh data.
+
+        """
+        self.invalidate(parser.envelope_id)
@@ -2,9 +2,12 @@
 from collections import namedtuple
 from io import BytesIO
 from urllib import urlencode
+import copy
 import json
 import logging
+import mmap
 import os
+import threading
 
 import certifi
 import pycurl
@@ -12,7 +15,14 @@ import pycurl
 import collections
 import requests
 
+from pydocusign import bulk
+from pydocusign import cache as envelope_cache
+from pydocusign import encoder
 from pydocusign import exceptions
+from pydocusign import models
+from pydocusign import registry
+from pydocusign import stamp
+from pydocusign import validation
 
 
 logger = logging.getLogger(__name__)
@@ -20,6 +30,35 @@ logger = logging.getLogger(__name__)
 Response = namedtuple('Response', ['status_code', 'text'])
 
 
+class _InFlightRequest(object):
+    """A GET request currently performed on behalf of concurrent callers."""
+    def __init__(self):
+        #: Set when the request is over, i.e. result or exception is known.
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+class _ChunksReader(object):
+    """File-like reader of a list of chunks (bytes or memory maps)."""
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.size = sum(len(chunk) for chunk in chunks)
+        self._index = 0
+        self._offset = 0
+
+    def read(self, size):
+        while self._index < len(self.chunks):
+            chunk = self.chunks[self._index]
+            if self._offset < len(chunk):
+                data = chunk[self._offset:self._offset + size]
+                self._offset += len(data)
+                return data
+            self._index += 1
+            self._offset = 0
+        return b''
+
+
 class DocuSignClient(object):
     """DocuSign client."""
     def __init__(self,
@@ -31,7 +70,11 @@ class DocuSignClient(object):
                  account_url='',
                  app_token=None,
                  oauth2_token=None,
-                 timeout=None):
+                 timeout=None,
+                 coalesce_requests=False,
+                 cache=None,
+                 document_registry=None,
+                 validate_envelopes=False):
         """Configure DocuSign client."""
         #: Root URL of DocuSign API.
         #:
@@ -104,6 +147,24 @@ class DocuSignClient(object):
             timeout = float(os.environ.get('DOCUSIGN_TIMEOUT', 30))
         self.timeout = timeout
 
+        #: Whether concurrent identical GET requests share a single HTTP
+        #: request. See :meth:`get`.
+        self.coalesce_requests = coalesce_requests
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+
+        #: Optional :class:`~pydocusign.cache.EnvelopeCache` for envelope,
+        #: recipients and custom fields data.
+        self.cache = cache
+
+        #: Optional :class:`~pydocusign.registry.DocumentRegistry`, so that
+        #: documents shared by envelopes are uploaded once.
+        self.document_registry = document_registry
+
+        #: Whether envelopes are validated locally before they are sent.
+        #: See :func:`pydocusign.validation.check_envelope`.
+        self.validate_envelopes = validate_envelopes
+
     def get_timeout(self):
         """Return connection timeout."""
         return self._timeout
@@ -223,8 +284,55 @@ class DocuSignClient(object):
         return response.text
 
     def get(self, *args, **kwargs):
-        """Shortcut to perform GET operations on DocuSign API."""
-        return self._request(method='GET', *args, **kwargs)
+        """Shortcut to perform GET operations on DocuSign API.
+
+        If :attr:`coalesce_requests` is ``True``, identical GET requests
+        performed concurrently (typically from several threads) share one
+        HTTP request: the first caller performs it, the other ones wait for
+        its result. Each waiting caller gets its own copy of the result, or
+        the exception raised by the request.
+
+        """
+        if not self.coalesce_requests:
+            return self._request(method='GET', *args, **kwargs)
+        key = json.dumps([args, kwargs], sort_keys=True)
+        with self._in_flight_lock:
+            in_flight = self._in_flight.get(key)
+            is_leader = in_flight is None
+            if is_leader:
+                in_flight = self._in_flight[key] = _InFlightRequest()
+        if not is_leader:
+            in_flight.done.wait()
+            if in_flight.exception is not None:
+                raise in_flight.exception
+            return copy.deepcopy(in_flight.result)
+        try:
+            in_flight.result = self._request(method='GET', *args, **kwargs)
+        except Exception as exception:
+            in_flight.exception = exception
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+            in_flight.done.set()
+        return in_flight.result
+
+    def _cached_get(self, envelope_id, kind, url):
+        """Perform GET on ``url``, reading through :attr:`cache` if any."""
+        if self.cache is None:
+            return self.get(url)
+        data = self.cache.get(envelope_id, kind)
+        if data is None:
+            generation = self.cache.generation(envelope_id)
+            data = self.get(url)
+            self.cache.set(envelope_id, kind, data, generation)
+        return data
+
+    def _invalidate_cache(self, *envelope_ids):
+        """Drop cached data of envelopes, typically after a write."""
+        if self.cache is not None:
+            for envelope_id in envelope_ids:
+                self.cache.invalidate(envelope_id)
 
     def post(self, *args, **kwargs):
         """Shortcut to perform POST operations on DocuSign API."""
@@ -326,7 +434,8 @@ class DocuSignClient(object):
         if not self.account_url:
             self.login_information()
         url = '/accounts/{accountId}/envelopes/{envelopeId}/'.format(accountId=self.account_id, envelopeId=envelope_id)
-        return self.get(url)
+        return self._cached_get(envelope_id, envelope_cache.CACHE_ENVELOPE,
+                                url)
 
     def get_envelope_notification(self, envelope_id):
         if not self.account_url:
@@ -338,7 +447,8 @@ class DocuSignClient(object):
         if not self.account_url:
             self.login_information()
         url = '/accounts/{accountId}/envelopes/{envelopeId}/custom_fields/'.format(accountId=self.account_id, envelopeId=envelope_id)
-        return self.get(url)
+        return self._cached_get(envelope_id,
+                                envelope_cache.CACHE_CUSTOM_FIELDS, url)
 
     def post_envelope_custom_fields(self, envelope_id, text_custom_fields=None, list_custom_fields=None):
         if not self.account_url:
@@ -348,7 +458,9 @@ class DocuSignClient(object):
             'textCustomFields': text_custom_fields,
             'listCustomFields': list_custom_fields,
         }
-        return self.post(url, data=data, expected_status_code=201)
+        response = self.post(url, data=data, expected_status_code=201)
+        self._invalidate_cache(envelope_id)
+        return response
 
     def put_envelope_custom_fields(self, envelope_id, text_custom_fields=None, list_custom_fields=None):
         if not self.account_url:
@@ -358,7 +470,9 @@ class DocuSignClient(object):
             'textCustomFields': text_custom_fields,
             'listCustomFields': list_custom_fields,
         }
-        return self.put(url, data=data, expected_status_code=201)
+        response = self.put(url, data=data, expected_status_code=201)
+        self._invalidate_cache(envelope_id)
+        return response
 
 
     def void_envelope(self, envelope_id, voidedReason=None):
@@ -369,7 +483,9 @@ class DocuSignClient(object):
             'status': 'voided',
             'voidedReason': voidedReason,
         }
-        return self.put(url, data=data)
+        response = self.put(url, data=data)
+        self._invalidate_cache(envelope_id)
+        return response
 
     def send_envelope(self, envelope_id):
         if not self.account_url:
@@ -378,7 +494,9 @@ class DocuSignClient(object):
         data = {
             'status': 'sent',
         }
-        return self.put(url, data=data)
+        response = self.put(url, data=data)
+        self._invalidate_cache(envelope_id)
+        return response
 
     def delete_envelope(self, *envelope_ids):
         if not self.account_url:
@@ -387,7 +505,9 @@ class DocuSignClient(object):
         data = {
             'envelopeIds': envelope_ids,
         }
-        return self.put(url, data=data)
+        response = self.put(url, data=data)
+        self._invalidate_cache(*envelope_ids)
+        return response
 
     def search_envelopes(self, custom_field=None, custom_field_value=None, status=None, from_date='1/1/1900'):
         if not self.account_url:
@@ -402,11 +522,15 @@ class DocuSignClient(object):
             params['status'] = status
         return self.get('{}?{}'.format(url, urlencode(params)))
 
-    def _create_envelope_from_document_request(self, envelope):
+    def _create_envelope_from_document_request(self, envelope, stream=False):
         """Return parts of the POST request for /envelopes.
         This is encapsultated in a method for test purposes: we do not want to
         post a real request on DocuSign API for each test, whereas we want to
         check that the HTTP request's parts meet the DocuSign specification.
+        If :attr:`document_registry` is set, documents it holds are
+        referenced as server templates, in composite templates.
+        If ``stream`` is ``True``, body is a list of chunks, see
+        :meth:`_documents_request_body`.
         .. warning::
            Only one document is supported at the moment. This is a limitation
            of `pydocusign`, not of `DocuSign`.
@@ -414,46 +538,76 @@ class DocuSignClient(object):
         if not self.account_url:
             self.login_information()
         url = '{account}/envelopes'.format(account=self.account_url)
-        data = envelope.to_dict()
-        docs_body = ""
-        for document in envelope.documents:
-            document.data.seek(0)
-            docs_body = (
-                docs_body +
-                "--myboundary\r\n"
-                "Content-Type:application/pdf\r\n"
-                "Content-Disposition: file; "
-                "filename=\"{filename}\"; "
-                "documentId={documentId} \r\n"
-                "\r\n"
-                "{file_data}\r\n"
-                "\r\n".format(
-                    file_data=document.data.read(),
-                    filename=document.name,
-                    documentId=document.documentId,
-                )
-            )
-        body = str(
-            "\r\n"
-            "\r\n"
-            "--myboundary\r\n"
-            "Content-Type: application/json; charset=UTF-8\r\n"
-            "Content-Disposition: form-data\r\n"
-            "\r\n"
-            "{json_data}\r\n"
-            "--myboundary\r\n"
-            "{docs_body}"
-            "--myboundary--\r\n"
-            "\r\n".format(json_data=json.dumps(data), docs_body=docs_body))
+        composite_templates = None
+        documents = envelope.documents
+        if self.document_registry is not None:
+            composite_templates, documents = \
+                self.document_registry.composite_templates(self, envelope)
+        if composite_templates is None:
+            body = self._documents_request_body(
+                lambda write: encoder.write_json(envelope, write), documents,
+                stream=stream)
+        else:
+            data = envelope.to_dict()
+            data = dict((key, value) for key, value in data.items()
+                        if key not in ('documents', 'recipients'))
+            data['compositeTemplates'] = composite_templates
+            body = self._documents_request_body(
+                lambda write: write(encoder.encode_value(data)), documents,
+                stream=stream)
         headers = self.base_headers()
         headers['Content-Type'] = "multipart/form-data; boundary=myboundary"
-        headers['Content-Length'] = len(body)
+        headers['Content-Length'] = sum(len(chunk) for chunk in body) \
+            if stream else len(body)
         return {
             'url': url,
             'headers': headers,
             'body': body,
         }
 
+    def _documents_request_body(self, write_json, documents, stream=False):
+        """Return multipart body of JSON part then ``documents`` parts.
+
+        ``write_json`` is called with a ``write`` callable, to write JSON
+        part.
+
+        If ``stream`` is ``True``, return list of chunks instead of bytes:
+        memory-mapped documents (see :class:`~pydocusign.models.FileDocument`)
+        are chunks themselves, so that they are not copied.
+
+        """
+        chunks = [
+            b"\r\n"
+            b"\r\n"
+            b"--myboundary\r\n"
+            b"Content-Type: application/json; charset=UTF-8\r\n"
+            b"Content-Disposition: form-data\r\n"
+            b"\r\n"
+        ]
+        write_json(chunks.append)
+        chunks.append(b"\r\n--myboundary\r\n")
+        for document in documents:
+            chunks.append((
+                u"--myboundary\r\n"
+                u"Content-Type:application/pdf\r\n"
+                u"Content-Disposition: file; "
+                u"filename=\"{filename}\"; "
+                u"documentId={documentId} \r\n"
+                u"\r\n".format(
+                    filename=document.name,
+                    documentId=document.documentId,
+                )).encode('utf-8'))
+            if isinstance(document.data, mmap.mmap):
+                chunks.append(document.data if stream else document.data[:])
+            else:
+                document.data.seek(0)
+                chunks.append(document.data.read())
+            chunks.append(b"\r\n\r\n")
+        chunks.append(b"--myboundary--\r\n\r\n")
+        if stream:
+            return chunks
+        return b''.join(chunks)
+
     def _create_envelope_from_template_request(self, envelope):
         """Return parts of the POST request for /envelopes.
 
@@ -465,17 +619,17 @@ class DocuSignClient(object):
         if not self.account_url:
             self.login_information()
         url = '{account}/envelopes'.format(account=self.account_url)
-        data = envelope.to_dict()
-        body = str(
-            "\r\n"
-            "\r\n"
-            "--myboundary\r\n"
-            "Content-Type: application/json; charset=UTF-8\r\n"
-            "Content-Disposition: form-data\r\n"
-            "\r\n"
-            "{json_data}\r\n"
-            "--myboundary--\r\n"
-            "\r\n".format(json_data=json.dumps(data)))
+        chunks = [
+            b"\r\n"
+            b"\r\n"
+            b"--myboundary\r\n"
+            b"Content-Type: application/json; charset=UTF-8\r\n"
+            b"Content-Disposition: form-data\r\n"
+            b"\r\n"
+        ]
+        encoder.write_json(envelope, chunks.append)
+        chunks.append(b"\r\n--myboundary--\r\n\r\n")
+        body = b''.join(chunks)
         headers = self.base_headers(envelope.sobo_email)
         headers['Content-Type'] = "multipart/form-data; boundary=myboundary"
         headers['Content-Length'] = len(body)
@@ -488,8 +642,9 @@ class DocuSignClient(object):
     def _create_envelope(self, envelope, parts):
         """POST to /envelopes and return created envelope ID.
 
-        Called by ``create_envelope_from_document`` and
-        ``create_envelope_from_template`` methods.
+        Called by ``create_envelope_from_document``,
+        ``create_envelope_from_template`` and ``create_envelope_from_stamp``
+        methods. ``envelope`` is ``None`` for stamps.
 
         """
         c = pycurl.Curl()
@@ -505,7 +660,12 @@ class DocuSignClient(object):
              for (key, value) in parts['headers'].items()])
         c.setopt(pycurl.VERBOSE, 0)
         c.setopt(pycurl.POST, 1)
-        c.setopt(pycurl.POSTFIELDS, parts['body'])
+        if isinstance(parts['body'], bytes):
+            c.setopt(pycurl.POSTFIELDS, parts['body'])
+        else:  # List of chunks, streamed.
+            reader = _ChunksReader(parts['body'])
+            c.setopt(pycurl.POSTFIELDSIZE_LARGE, reader.size)
+            c.setopt(pycurl.READFUNCTION, reader.read)
         response_body = BytesIO()
         c.setopt(pycurl.WRITEFUNCTION, response_body.write)
         c.perform()
@@ -517,10 +677,11 @@ class DocuSignClient(object):
         if response.status_code != 201:
             raise exceptions.DocuSignException(response)
         response_data = json.loads(response.text)
-        if not envelope.client:
-            envelope.client = self
-        if not envelope.envelopeId:
-            envelope.envelopeId = response_data['envelopeId']
+        if envelope is not None:
+            if not envelope.client:
+                envelope.client = self
+            if not envelope.envelopeId:
+                envelope.envelopeId = response_data['envelopeId']
         return response_data['envelopeId']
 
     def create_envelope_from_document(self, envelope):
@@ -532,8 +693,15 @@ class DocuSignClient(object):
         If ``envelope`` has no (or empty) ``client`` attribute, this method
         sets the value.
 
+        If :attr:`validate_envelopes` is ``True``, raise
+        :class:`~pydocusign.exceptions.DocuSignValidationError` for invalid
+        envelopes, before any upload.
+
         """
-        parts = self._create_envelope_from_document_request(envelope)
+        if self.validate_envelopes:
+            validation.check_envelope(envelope)
+        parts = self._create_envelope_from_document_request(envelope,
+                                                            stream=True)
         return self._create_envelope(envelope, parts)
 
     def create_envelope_from_template(self, envelope):
@@ -545,10 +713,41 @@ class DocuSignClient(object):
         If ``envelope`` has no (or empty) ``client`` attribute, this method
         sets the value.
 
+        If :attr:`validate_envelopes` is ``True``, raise
+        :class:`~pydocusign.exceptions.DocuSignValidationError` for invalid
+        envelopes.
+
         """
+        if self.validate_envelopes:
+            validation.check_envelope(envelope)
         parts = self._create_envelope_from_template_request(envelope)
         return self._create_envelope(envelope, parts)
 
+    def envelope_stamp(self, envelope):
+        """Return :class:`~pydocusign.stamp.EnvelopeStamp` of ``envelope``.
+
+        ``envelope`` is a model whose variable values are
+        :class:`~pydocusign.stamp.StampField` placeholders. Request is built
+        once, as with ``create_envelope_from_template`` if ``envelope`` has a
+        ``templateId``, else as with ``create_envelope_from_document``.
+
+        """
+        if envelope.templateId:
+            parts = self._create_envelope_from_template_request(envelope)
+        else:
+            parts = self._create_envelope_from_document_request(envelope)
+        return stamp.EnvelopeStamp(parts)
+
+    def create_envelope_from_stamp(self, envelope_stamp, values):
+        """POST to /envelopes and return created envelope ID.
+
+        ``envelope_stamp`` is filled with ``values``, a dictionary of values
+        keyed by stamp field name. See :meth:`envelope_stamp`.
+
+        """
+        parts = envelope_stamp.request_parts(values)
+        return self._create_envelope(None, parts)
+
     def get_envelope_recipients(self, envelopeId):
         """GET {account}/envelopes/{envelopeId}/recipients and return JSON."""
         if not self.account_url:
@@ -556,7 +755,8 @@ class DocuSignClient(object):
         url = '/accounts/{accountId}/envelopes/{envelopeId}/recipients' \
               .format(accountId=self.account_id,
                       envelopeId=envelopeId)
-        return self.get(url)
+        return self._cached_get(envelopeId, envelope_cache.CACHE_RECIPIENTS,
+                                url)
 
     def post_recipient_view(self, authenticationMethod=None,
                             clientUserId='', email='', envelopeId='',
@@ -591,7 +791,9 @@ class DocuSignClient(object):
             self.login_information()
         url = '/accounts/{accountId}/envelopes/{envelopeId}/recipients/'.format(accountId=self.account_id, envelopeId=envelope_id)
         url = '{}?{}'.format(url, urlencode(params))
-        return self.put(url, data=data)
+        response = self.put(url, data=data)
+        self._invalidate_cache(envelope_id)
+        return response
 
     def get_envelope_document_list(self, envelopeId):
         """GET the list of envelope's documents."""
@@ -640,7 +842,9 @@ class DocuSignClient(object):
             'Content-Disposition': 'filename="{}"'.format(filename),
             'Content-Type': content_type,
         }
-        return self.put(url, headers=headers, file_data=file_data)
+        response = self.put(url, headers=headers, file_data=file_data)
+        self._invalidate_cache(envelope_id)
+        return response
 
     def delete_envelope_documents(self, envelope_id, document_ids):
         if not self.account_url:
@@ -656,7 +860,9 @@ class DocuSignClient(object):
         data = {}
         if document_list:
             data = {'documents': document_list}
-        return self.delete(url, data=data)
+        response = self.delete(url, data=data)
+        self._invalidate_cache(envelope_id)
+        return response
 
     def get_template(self, templateId):
         """GET the definition of the template."""
@@ -667,6 +873,109 @@ class DocuSignClient(object):
                       templateId=templateId)
         return self.get(url)
 
+    def create_bulk_send_list(self, name, copies):
+        """POST to /bulk_send_lists and return created list.
+
+        ``copies`` is an iterable of bulk copies, see
+        :func:`pydocusign.bulk.bulk_copy`. Requires REST API v2.1.
+
+        """
+        if not self.account_url:
+            self.login_information()
+        url = '/accounts/{accountId}/bulk_send_lists' \
+              .format(accountId=self.account_id)
+        data = {
+            'name': name,
+            'bulkCopies': [bulk.bulk_copy(copy) for copy in copies],
+        }
+        return self.post(url, data=data, expected_status_code=201)
+
+    def delete_bulk_send_list(self, list_id):
+        """DELETE bulk send list."""
+        if not self.account_url:
+            self.login_information()
+        url = '/accounts/{accountId}/bulk_send_lists/{listId}' \
+              .format(accountId=self.account_id, listId=list_id)
+        return self.delete(url)
+
+    def send_bulk_send_list(self, list_id, template_id):
+        """POST to /bulk_send_lists/{listId}/send and return created batch.
+
+        One envelope is created from template ``template_id`` for each copy
+        of the list.
+
+        """
+        if not self.account_url:
+            self.login_information()
+        url = '/accounts/{accountId}/bulk_send_lists/{listId}/send' \
+              .format(accountId=self.account_id, listId=list_id)
+        data = {
+            'listId': list_id,
+            'envelopeOrTemplateId': template_id,
+        }
+        return self.post(url, data=data, expected_status_code=201)
+
+    def get_bulk_send_batch(self, batch_id):
+        """GET status of bulk send batch.
+
+        Status holds ``batchSize``, ``queued``, ``sent`` and ``failed``
+        counts. See :func:`pydocusign.bulk.wait_batches`.
+
+        """
+        if not self.account_url:
+            self.login_information()
+        url = '/accounts/{accountId}/bulk_send_batch/{batchId}' \
+              .format(accountId=self.account_id, batchId=batch_id)
+        return self.get(url)
+
+    def bulk_send(self, template_id, copies, name='pydocusign',
+                  chunk_size=bulk.BULK_SEND_LIST_MAX_COPIES):
+        """Send template ``template_id`` to ``copies``, return batch IDs.
+
+        ``copies`` is an iterable of :class:`~pydocusign.models.Role` (or of
+        lists of roles, one per template role), for instance
+        :func:`pydocusign.bulk.read_roles_csv`. It is consumed lazily:
+        copies are uploaded as bulk send lists of ``chunk_size`` copies, and
+        each list is sent as one batch.
+
+        """
+        batch_ids = []
+        for index, chunk in enumerate(bulk.chunks(copies, chunk_size), 1):
+            bulk_list = self.create_bulk_send_list(
+                '{name}-{index}'.format(name=name, index=index), chunk)
+            batch = self.send_bulk_send_list(bulk_list['listId'],
+                                             template_id)
+            batch_ids.append(batch['batchId'])
+        return batch_ids
+
+    def create_template_from_document(self, document, name):
+        """POST to /templates and return ID of template holding ``document``.
+
+        Document ID in template is
+        :data:`~pydocusign.registry.TEMPLATE_DOCUMENT_ID`.
+
+        """
+        if not self.account_url:
+            self.login_information()
+        url = '/accounts/{accountId}/templates' \
+              .format(accountId=self.account_id)
+        template_document = models.Document(
+            documentId=registry.TEMPLATE_DOCUMENT_ID, name=document.name,
+            data=document.data)
+        data = {
+            'envelopeTemplateDefinition': {'name': name},
+            'documents': [template_document.to_dict()],
+        }
+        body = self._documents_request_body(
+            lambda write: write(encoder.encode_value(data)),
+            [template_document])
+        headers = {
+            'Content-Type': "multipart/form-data; boundary=myboundary",
+        }
+        response = self.post(url, headers=headers, file_data=body,
+                             expected_status_code=201)
+        return response['templateId']
+
     def get_audit_events(self, envelopeId):
         """GET the list of envelope audit events."""
         if not self.account_url:
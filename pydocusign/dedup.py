@@ -0,0 +1,168 @@
+"""Deduplication of DocuSign Connect notifications (callbacks).
+
+DocuSign may deliver the same notification several times (retries,
+redelivery). Notifications are identified by ``(EnvelopeID, TimeGenerated,
+status digest)``, read from raw XML with regular expressions, i.e. without
+parsing it.
+
+"""
+from collections import OrderedDict
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+
+
+#: Regular expression for ``EnvelopeID`` in raw notifications.
+ENVELOPE_ID_REGEX = re.compile(br'<(?:\w+:)?EnvelopeID>([^<]*)<')
+
+#: Regular expression for ``TimeGenerated`` in raw notifications.
+TIME_GENERATED_REGEX = re.compile(br'<(?:\w+:)?TimeGenerated>([^<]*)<')
+
+#: Regular expression for status elements (status and status timestamps).
+STATUS_REGEX = re.compile(
+    br'<(?:\w+:)?(Status|Created|Sent|Delivered|Signed|Completed|Declined|'
+    br'Voided|AuthenticationFailed|AutoResponded)>([^<]*)<')
+
+
+def callback_key(body):
+    """Return deduplication key of notification ``body``, or ``None``.
+
+    Key is ``(envelope_id, time_generated, status_digest)``. ``None`` is
+    returned if envelope ID is missing.
+
+    >>> key = callback_key(b'''<DocuSignEnvelopeInformation>
+    ...   <EnvelopeStatus>
+    ...     <TimeGenerated>2014-10-06T00:58:49.1655913</TimeGenerated>
+    ...     <EnvelopeID>some-uuid</EnvelopeID>
+    ...     <Status>Sent</Status>
+    ...   </EnvelopeStatus>
+    ... </DocuSignEnvelopeInformation>''')
+    >>> key[:2] == (b'some-uuid', b'2014-10-06T00:58:49.1655913')
+    True
+    >>> callback_key(b'<DocuSignEnvelopeInformation />') is None
+    True
+
+    """
+    if not isinstance(body, bytes):
+        body = body.encode('utf-8')
+    envelope_id = ENVELOPE_ID_REGEX.search(body)
+    if envelope_id is None:
+        return None
+    time_generated = TIME_GENERATED_REGEX.search(body)
+    digest = hashlib.sha1()
+    for name, value in STATUS_REGEX.findall(body):
+        digest.update(name + b'=' + value.strip() + b';')
+    return (envelope_id.group(1).strip(),
+            time_generated.group(1).strip() if time_generated else b'',
+            digest.hexdigest())
+
+
+class MemoryDedupStore(object):
+    """In-memory store of known keys, which forgets least recent ones."""
+    def __init__(self, max_size=100000):
+        #: Maximum number of keys in store.
+        self.max_size = max_size
+        self._keys = OrderedDict()
+
+    def add(self, key):
+        """Register ``key``. Return ``False`` if it was already known."""
+        if key in self._keys:
+            del self._keys[key]
+            self._keys[key] = True  # Most recently used.
+            return False
+        self._keys[key] = True
+        while len(self._keys) > self.max_size:
+            self._keys.popitem(last=False)
+        return True
+
+    def discard(self, key):
+        """Forget ``key``."""
+        self._keys.pop(key, None)
+
+
+class SQLiteDedupStore(object):
+    """Store of known keys in a local SQLite database file."""
+    def __init__(self, path):
+        #: Path to SQLite database file.
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS callbacks ('
+            'key TEXT PRIMARY KEY, created REAL)')
+        self._connection.commit()
+
+    def _key(self, key):
+        """Return text representation of ``key``."""
+        return '|'.join(part.decode('utf-8') for part in key[:2]) \
+            + '|' + key[2]
+
+    def add(self, key):
+        """Register ``key``. Return ``False`` if it was already known."""
+        cursor = self._connection.execute(
+            'INSERT OR IGNORE INTO callbacks (key, created) VALUES (?, ?)',
+            (self._key(key), time.time()))
+        self._connection.commit()
+        return cursor.rowcount == 1
+
+    def discard(self, key):
+        """Forget ``key``."""
+        self._connection.execute('DELETE FROM callbacks WHERE key = ?',
+                                 (self._key(key),))
+        self._connection.commit()
+
+    def purge(self, max_age):
+        """Forget keys registered more than ``max_age`` seconds ago."""
+        self._connection.execute('DELETE FROM callbacks WHERE created < ?',
+                                 (time.time() - max_age,))
+        self._connection.commit()
+
+
+class CallbackDeduplicator(object):
+    """Tell whether notifications have already been received.
+
+    Known keys are kept in a :class:`MemoryDedupStore` of ``cache_size`` keys,
+    backed by optional persistent ``store``, such as
+    :class:`SQLiteDedupStore`.
+
+    >>> deduplicator = CallbackDeduplicator()
+    >>> body = b'<EnvelopeID>some-uuid</EnvelopeID><Status>Sent</Status>'
+    >>> deduplicator.add(body)
+    True
+    >>> deduplicator.add(body)
+    False
+
+    """
+    def __init__(self, store=None, cache_size=100000):
+        #: Optional persistent store of keys.
+        self.store = store
+        self._memory = MemoryDedupStore(max_size=cache_size)
+        self._lock = threading.Lock()
+
+    def add(self, body):
+        """Register notification ``body``. Return ``False`` if duplicate.
+
+        Notifications without key (see :func:`callback_key`) are never
+        considered duplicates.
+
+        """
+        key = callback_key(body)
+        if key is None:
+            return True
+        with self._lock:
+            if not self._memory.add(key):
+                return False
+            if self.store is not None:
+                return self.store.add(key)
+        return True
+
+    def discard(self, body):
+        """Forget notification ``body``, e.g. if it could not be handled."""
+        key = callback_key(body)
+        if key is None:
+            return
+        with self._lock:
+            self._memory.discard(key)
+            if self.store is not None:
+                self.store.discard(key)
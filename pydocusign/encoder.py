@@ -0,0 +1,246 @@
+"""Streaming JSON encoder for models.
+
+:func:`write_json` walks models and writes JSON bytes to a ``write``
+callable (such as ``list.append`` or ``file.write``), without building the
+intermediate dictionaries of ``to_dict()`` nor a full JSON string. Constant
+keys, such as ``"signHereTabs"`` or ``"xPosition"``, are encoded once.
+
+Output is equivalent to ``json.dumps(model.to_dict())``. Instances of
+subclasses, which may override ``to_dict()``, are encoded with ``to_dict()``.
+
+>>> from pydocusign import models
+>>> tab = models.SignHereTab(documentId=1, pageNumber=2, xPosition=3,
+...                          yPosition=4)
+>>> import json
+>>> json.loads(encode(tab).decode('ascii')) == tab.to_dict()
+True
+
+"""
+import json
+from json.encoder import encode_basestring_ascii
+
+from pydocusign import models
+
+
+#: Encoder for values without fast path.
+_encoder = json.JSONEncoder()
+
+try:
+    text_type = unicode
+except NameError:  # Python 3.
+    text_type = str
+
+if str is bytes:  # Python 2.
+    def ascii_bytes(text):
+        """Return ASCII ``text`` as bytes."""
+        return text
+else:
+    def ascii_bytes(text):
+        """Return ASCII ``text`` as bytes."""
+        return text.encode('ascii')
+
+
+def key(name):
+    """Return pre-encoded ``"name":`` bytes."""
+    return ascii_bytes(encode_basestring_ascii(name) + ':')
+
+
+def encode_value(value):
+    """Return JSON bytes of scalar or container ``value``."""
+    value_type = type(value)
+    if value_type is int:
+        return ascii_bytes(str(value))
+    if value is None:
+        return b'null'
+    if value is True:
+        return b'true'
+    if value is False:
+        return b'false'
+    if value_type is bytes:
+        value = value.decode('utf-8')
+        value_type = text_type
+    if value_type is text_type:
+        return ascii_bytes(encode_basestring_ascii(value))
+    return ascii_bytes(_encoder.encode(value))
+
+
+#: Template of positionned tabs JSON, formatted with encoded values.
+_TAB_TEMPLATE = b'{' + b','.join(
+    key(name) + b'%s' for name in models.PositionnedTab.attributes) + b'}'
+
+#: Positionned tab classes whose ``to_dict()`` is the default one.
+POSITIONNED_TABS = (models.SignHereTab, models.DateTab,
+                    models.DateSignedTab, models.ApproveTab,
+                    models.DeclineTab)
+
+#: Pre-encoded ``"tabs_name":`` keys, by tab class.
+_TABS_NAME_KEYS = {}
+
+
+def tabs_name_key(tabs_name):
+    """Return pre-encoded key for ``tabs_name``."""
+    try:
+        return _TABS_NAME_KEYS[tabs_name]
+    except KeyError:
+        return _TABS_NAME_KEYS.setdefault(tabs_name, key(tabs_name))
+
+
+def write_tab(tab, write):
+    """Write JSON of ``tab``."""
+    if type(tab) in POSITIONNED_TABS:
+        write(_TAB_TEMPLATE % (encode_value(tab.documentId),
+                               encode_value(tab.pageNumber),
+                               encode_value(tab.xPosition),
+                               encode_value(tab.yPosition)))
+    else:
+        write(encode_value(tab.to_dict()))
+
+
+_SIGNER_KEYS = dict((name, key(name)) for name in [
+    'clientUserId', 'email', 'emailNotification', 'name', 'recipientId',
+    'routingOrder', 'tabs', 'accessCode', 'note', 'emailBody',
+    'emailSubject', 'supportedLanguage'])
+
+
+def write_email_notification(recipient, write):
+    """Write ``emailNotification`` value of ``recipient``."""
+    if recipient.emailBody or recipient.emailSubject \
+            or recipient.supportedLanguage:
+        write(b'{')
+        write(_SIGNER_KEYS['emailBody'])
+        write(encode_value(recipient.emailBody))
+        write(b',')
+        write(_SIGNER_KEYS['emailSubject'])
+        write(encode_value(recipient.emailSubject))
+        write(b',')
+        write(_SIGNER_KEYS['supportedLanguage'])
+        write(encode_value(recipient.supportedLanguage))
+        write(b'}')
+    else:
+        write(b'null')
+
+
+def write_signer(signer, write):
+    """Write JSON of ``signer``, as in :meth:`models.Signer.to_dict`."""
+    if type(signer) is not models.Signer:
+        write(encode_value(signer.to_dict()))
+        return
+    write(b'{')
+    for name in ['clientUserId', 'email', 'name', 'recipientId',
+                 'routingOrder', 'accessCode', 'note']:
+        write(_SIGNER_KEYS[name])
+        write(encode_value(getattr(signer, name)))
+        write(b',')
+    write(_SIGNER_KEYS['emailNotification'])
+    write_email_notification(signer, write)
+    write(b',')
+    write(_SIGNER_KEYS['tabs'])
+    # Group tabs by type, keeping order of first occurrence. Bulk tabs are
+    # added to groups as pre-encoded JSON.
+    groups = {}
+    order = []
+    for tab in signer.tabs:
+        if tab.bulk:
+            items = tab.encoded_groups()
+        else:
+            items = [(tab.tabs_name, tab)]
+        for tabs_name, item in items:
+            try:
+                groups[tabs_name].append(item)
+            except KeyError:
+                groups[tabs_name] = [item]
+                order.append(tabs_name)
+    write(b'{')
+    for group_index, tabs_name in enumerate(order):
+        if group_index:
+            write(b',')
+        write(tabs_name_key(tabs_name))
+        write(b'[')
+        for index, item in enumerate(groups[tabs_name]):
+            if index:
+                write(b',')
+            if type(item) is bytes:
+                write(item)
+            else:
+                write_tab(item, write)
+        write(b']')
+    write(b'}}')
+
+
+def write_list(items, write, write_item):
+    """Write JSON array of ``items``, each one with ``write_item``."""
+    write(b'[')
+    for index, item in enumerate(items):
+        if index:
+            write(b',')
+        write_item(item, write)
+    write(b']')
+
+
+def write_model(model, write):
+    """Write JSON of ``model``, using its ``to_dict()``."""
+    write(encode_value(model.to_dict()))
+
+
+#: Attribute names and pre-encoded keys (with separator) of envelopes.
+_ENVELOPE_KEYS = [(name, (b',' if index else b'{') + key(name))
+                  for index, name in enumerate(['status', 'emailBlurb',
+                                                'emailSubject', 'customFields',
+                                                'emailSettings'])]
+
+
+def write_envelope(envelope, write):
+    """Write JSON of ``envelope``, as in :meth:`models.Envelope.to_dict`."""
+    if type(envelope) is not models.Envelope:
+        write(encode_value(envelope.to_dict()))
+        return
+    for name, encoded_key in _ENVELOPE_KEYS:
+        write(encoded_key)
+        write(encode_value(getattr(envelope, name)))
+    if envelope.eventNotification:
+        write(b',"eventNotification":')
+        write_model(envelope.eventNotification, write)
+    if envelope.templateId:
+        write(b',"templateId":')
+        write(encode_value(envelope.templateId))
+        write(b',"templateRoles":')
+        write_list([role for role in envelope.templateRoles
+                    if isinstance(role, models.Role)],
+                   write, write_model)
+    else:
+        write(b',"documents":')
+        write_list(envelope.documents, write, write_model)
+        write(b',"recipients":{"signers":')
+        write_list([signer for signer in envelope.signers
+                    if isinstance(signer, models.Signer)],
+                   write, write_signer)
+        write(b',"carbonCopies":')
+        write_list([recipient for recipient in envelope.carbonCopyRecipients
+                    if isinstance(recipient, models.CarbonCopyRecipient)],
+                   write, write_model)
+        write(b',"certifiedDeliveries":')
+        write_list(
+            [recipient for recipient in envelope.certifiedDeliveries
+             if isinstance(recipient, models.CertifiedDeliveryRecipient)],
+            write, write_model)
+        write(b'}')
+    write(b'}')
+
+
+def write_json(model, write):
+    """Write JSON bytes of ``model`` with ``write`` callable."""
+    if isinstance(model, models.Envelope):
+        write_envelope(model, write)
+    elif isinstance(model, models.Signer):
+        write_signer(model, write)
+    elif isinstance(model, models.Tab):
+        write_tab(model, write)
+    else:
+        write_model(model, write)
+
+
+def encode(model):
+    """Return JSON bytes of ``model``."""
+    chunks = []
+    write_json(model, chunks.append)
+    return b''.join(chunks)
@@ -5,6 +5,18 @@ class DocuSignException(Exception):
     """An error occurred with DocuSign API."""
 
 
+class DocuSignValidationError(DocuSignException):
+    """Envelope is not valid, according to local validation.
+
+    ``errors`` is the list of error messages.
+
+    """
+    def __init__(self, errors):
+        super(DocuSignValidationError, self).__init__(
+            'Invalid envelope: {0}'.format('; '.join(errors)))
+        self.errors = errors
+
+
 class DocuSignOAuth2Exception(DocuSignException):
     def __init__(self, error_obj):
         self.error_obj = error_obj
@@ -0,0 +1,251 @@
+"""Columnar export of events read from DocuSign callbacks.
+
+:class:`EventColumns` accumulates events of many
+:class:`~pydocusign.parser.DocuSignCallbackParser` in arrays, instead of one
+dictionary per event. Strings (envelope IDs, recipient IDs, statuses...) are
+dictionary-encoded: columns store integer codes. Datetimes are stored as
+UTC timestamps.
+
+Columns are written as CSV or in a compact binary format. Both can be written
+block by block with :meth:`EventColumns.flush`, so that exporting a large
+archive of callbacks does not require keeping every event in memory.
+
+"""
+from array import array
+import calendar
+import csv
+import struct
+import sys
+
+try:
+    import numpy
+except ImportError:  # Optional dependency.
+    numpy = None
+
+
+#: Names of columns, in order.
+COLUMNS = ['envelopeId', 'object', 'status', 'recipientId', 'clientUserId',
+           'timestamp']
+
+#: Magic string at beginning of binary exports.
+BINARY_MAGIC = b'PYDOCUSIGN-EVENTS-1\n'
+
+#: Header of binary blocks: number of rows and number of new strings.
+BLOCK_HEADER = struct.Struct('<II')
+
+#: Header of strings in binary blocks: length of UTF-8 value.
+STRING_HEADER = struct.Struct('<I')
+
+
+def timestamp(value):
+    """Return UTC timestamp (float seconds) of timezone-aware ``value``.
+
+    >>> from dateutil.tz import tzoffset
+    >>> from datetime import datetime
+    >>> timestamp(datetime(1970, 1, 1, 0, 0, 1, 500000,
+    ...                    tzinfo=tzoffset(None, 3600)))
+    -3598.5
+
+    """
+    return calendar.timegm(value.utctimetuple()) + value.microsecond / 1e6
+
+
+def array_bytes(values):
+    """Return little-endian bytes of array ``values``."""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    try:
+        return values.tobytes()
+    except AttributeError:  # Python 2.
+        return values.tostring()
+
+
+def bytes_array(typecode, data):
+    """Return array of ``typecode`` read from little-endian bytes ``data``."""
+    values = array(typecode)
+    try:
+        values.frombytes(data)
+    except AttributeError:  # Python 2.
+        values.fromstring(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+class EventColumns(object):
+    """Array-backed table of callback events.
+
+    >>> from datetime import datetime
+    >>> from dateutil.tz import tzutc
+    >>> from pydocusign.parser import CallbackEvent
+    >>> columns = EventColumns()
+    >>> columns.add_event('envelope-1', CallbackEvent(
+    ...     datetime(2014, 10, 6, tzinfo=tzutc()), 'envelope', 'Sent',
+    ...     None, None))
+    >>> len(columns)
+    1
+    >>> list(columns.rows())
+    [('envelope-1', 'envelope', 'Sent', None, None, 1412553600.0)]
+
+    """
+    #: Code of ``None`` in string columns.
+    NONE = -1
+
+    def __init__(self):
+        #: Dictionary of strings: code is position in list.
+        self.strings = []
+        self._codes = {}
+        #: Number of strings already written by :meth:`write_binary`.
+        self._flushed_strings = 0
+        self._flushed = False
+        self.clear()
+
+    def clear(self):
+        """Remove rows. String dictionary is kept."""
+        self.envelope_ids = array('i')
+        self.objects = array('i')
+        self.statuses = array('i')
+        self.recipient_ids = array('i')
+        self.client_user_ids = array('i')
+        self.timestamps = array('d')
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def encode(self, value):
+        """Return code of string ``value`` in :attr:`strings`."""
+        if value is None:
+            return self.NONE
+        try:
+            return self._codes[value]
+        except KeyError:
+            code = self._codes[value] = len(self.strings)
+            self.strings.append(value)
+            return code
+
+    def decode(self, code):
+        """Return string of ``code``."""
+        if code == self.NONE:
+            return None
+        return self.strings[code]
+
+    def add_event(self, envelope_id, event):
+        """Append :class:`~pydocusign.parser.CallbackEvent` of envelope."""
+        encode = self.encode
+        self.envelope_ids.append(encode(envelope_id))
+        self.objects.append(encode(event.object))
+        self.statuses.append(encode(event.status))
+        self.recipient_ids.append(encode(event.recipientId))
+        self.client_user_ids.append(encode(event.clientUserId))
+        self.timestamps.append(timestamp(event.datetime))
+
+    def add_parser(self, parser):
+        """Append events of :class:`~pydocusign.parser.DocuSignCallbackParser`.
+        """
+        envelope_id = parser.envelope_id
+        for event in parser.event_records:
+            self.add_event(envelope_id, event)
+
+    @property
+    def columns(self):
+        """List of arrays, in :data:`COLUMNS` order."""
+        return [self.envelope_ids, self.objects, self.statuses,
+                self.recipient_ids, self.client_user_ids, self.timestamps]
+
+    def rows(self):
+        """Yield rows as tuples of decoded values, in :data:`COLUMNS` order."""
+        decode = self.decode
+        for envelope_id, obj, status, recipient_id, client_user_id, instant \
+                in zip(*self.columns):
+            yield (decode(envelope_id), decode(obj), decode(status),
+                   decode(recipient_id), decode(client_user_id), instant)
+
+    def to_numpy(self):
+        """Return dictionary of NumPy arrays, keyed by column name.
+
+        String columns are decoded as object arrays. Requires NumPy.
+
+        """
+        if numpy is None:
+            raise ImportError('NumPy is required for EventColumns.to_numpy()')
+        strings = numpy.array(self.strings + [None], dtype=object)
+        result = {}
+        for name, values in zip(COLUMNS, self.columns):
+            values = numpy.frombuffer(values, dtype=values.typecode)
+            if name != 'timestamp':
+                values = strings[values]  # NONE (-1) is last item: None.
+            result[name] = values
+        return result
+
+    def write_csv(self, output, header=True):
+        """Write rows as CSV in file-like ``output``.
+
+        Empty strings stand for ``None``.
+
+        """
+        writer = csv.writer(output)
+        if header:
+            writer.writerow(COLUMNS)
+        for row in self.rows():
+            writer.writerow(['' if value is None else value for value in row])
+
+    def write_binary(self, output):
+        """Write rows as a binary block in file-like ``output``.
+
+        Block holds strings added since previous block, then columns as
+        little-endian arrays. Write :data:`BINARY_MAGIC` before first block.
+        See :meth:`read_binary`.
+
+        """
+        new_strings = self.strings[self._flushed_strings:]
+        output.write(BLOCK_HEADER.pack(len(self), len(new_strings)))
+        for value in new_strings:
+            value = value.encode('utf-8')
+            output.write(STRING_HEADER.pack(len(value)))
+            output.write(value)
+        for values in self.columns:
+            output.write(array_bytes(values))
+        self._flushed_strings = len(self.strings)
+
+    def flush(self, output, format='csv'):
+        """Write rows in ``output`` with ``format``, then :meth:`clear` them.
+
+        ``format`` is either ``'csv'`` or ``'binary'``. CSV header or binary
+        magic is written on first flush of this instance.
+
+        """
+        first = not self._flushed
+        if format == 'csv':
+            self.write_csv(output, header=first)
+        elif format == 'binary':
+            if first:
+                output.write(BINARY_MAGIC)
+            self.write_binary(output)
+        else:
+            raise ValueError('Unknown export format: {0}'.format(format))
+        self._flushed = True
+        self.clear()
+
+    @classmethod
+    def read_binary(cls, input_file):
+        """Return :class:`EventColumns` read from binary export."""
+        if input_file.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError('Not a pydocusign binary export.')
+        columns = cls()
+        stored = columns.columns
+        while True:
+            header = input_file.read(BLOCK_HEADER.size)
+            if not header:
+                break
+            count, string_count = BLOCK_HEADER.unpack(header)
+            for index in range(string_count):
+                size, = STRING_HEADER.unpack(
+                    input_file.read(STRING_HEADER.size))
+                columns.encode(input_file.read(size).decode('utf-8'))
+            for values in stored:
+                size = count * values.itemsize
+                values.extend(bytes_array(values.typecode,
+                                          input_file.read(size)))
+        columns._flushed_strings = len(columns.strings)
+        return columns
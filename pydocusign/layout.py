@@ -0,0 +1,250 @@
+"""Bulk tab layouts, stored as columns.
+
+Placing tabs on a grid across many pages with one
+:class:`~pydocusign.models.SignHereTab` instance per tab is slow and memory
+hungry. :class:`TabColumns` holds tabs as integer arrays instead: one array
+per attribute, built from lists, ranges or NumPy arrays. It can be used as
+one item of :attr:`pydocusign.models.Signer.tabs`: it is serialized straight
+into the signer's ``tabs`` structure.
+
+>>> from pydocusign import models
+>>> columns = TabColumns(documentId=1, pageNumber=[1, 2, 3], xPosition=100,
+...                      yPosition=[50, 60, 70],
+...                      tabType=[models.SignHereTab, models.DateSignedTab,
+...                               models.SignHereTab])
+>>> len(columns)
+3
+>>> signer = models.Signer(name='Signer', recipientId=1, tabs=[columns])
+>>> [tab['pageNumber'] for tab in signer.to_dict()['tabs']['signHereTabs']]
+[1, 3]
+
+"""
+from array import array
+
+from pydocusign import encoder
+from pydocusign import models
+
+try:
+    import numpy
+except ImportError:  # Optional dependency.
+    numpy = None
+
+
+#: Tab types of layouts. Codes in :attr:`TabColumns.tabTypes` are positions
+#: in this list.
+TAB_TYPES = [models.SignHereTab, models.DateTab, models.DateSignedTab,
+             models.ApproveTab, models.DeclineTab]
+
+#: Template of tab JSON, formatted with integer values of a row.
+ROW_TEMPLATE = b'{' + b','.join(
+    encoder.key(name) + b'%d' for name in models.PositionnedTab.attributes
+) + b'}'
+
+
+def tab_type_code(tab_type):
+    """Return code of ``tab_type``: a class, a ``tabs_name`` or a code.
+
+    >>> tab_type_code(models.DateTab), tab_type_code('dateSignedTabs')
+    (1, 2)
+
+    """
+    if isinstance(tab_type, int):
+        if not 0 <= tab_type < len(TAB_TYPES):
+            raise ValueError('Unknown tab type code: {0}'.format(tab_type))
+        return tab_type
+    for code, model in enumerate(TAB_TYPES):
+        if tab_type is model or tab_type == model.tabs_name:
+            return code
+    raise ValueError('Unsupported tab type: {0!r}'.format(tab_type))
+
+
+def int_array(values):
+    """Return ``array('i')`` of ``values``: array, list or NumPy array."""
+    if isinstance(values, array) and values.typecode == 'i':
+        return values
+    if hasattr(values, 'tolist'):  # NumPy array or array.
+        values = values.tolist()
+    return array('i', values)
+
+
+def out_of_bounds(values, low, high=None):
+    """Return positions of ``values`` lower than ``low`` or above ``high``.
+
+    Uses NumPy, if available.
+
+    >>> out_of_bounds(array('i', [0, 5, 10, -1]), 0, 9)
+    [2, 3]
+
+    """
+    if not values:
+        return []
+    if numpy is not None:
+        data = numpy.frombuffer(values, dtype=values.typecode)
+        mask = data < low
+        if high is not None:
+            mask |= data > high
+        return numpy.flatnonzero(mask).tolist()
+    if high is None:
+        return [index for index, value in enumerate(values) if value < low]
+    return [index for index, value in enumerate(values)
+            if value < low or value > high]
+
+
+class TabColumns(models.Tab):
+    """Positionned tabs, stored as columns.
+
+    Arguments are either sequences of the same length (lists, ranges,
+    arrays, NumPy arrays...) or scalars, repeated for every tab. ``tabType``
+    items are tab classes of :data:`TAB_TYPES`, ``tabs_name`` strings or
+    codes. ``recipientId`` is optional: it is used by :meth:`assign` to
+    dispatch tabs to signers.
+
+    Columns are arrays: as with other models, call :meth:`invalidate` after
+    changing them in place.
+
+    """
+    __slots__ = ('documentIds', 'pageNumbers', 'xPositions', 'yPositions',
+                 'tabTypes', 'recipientIds')
+    bulk = True
+
+    def __init__(self, documentId, pageNumber=1, xPosition=0,
+                 yPosition=0, tabType=models.SignHereTab, recipientId=None):
+        columns = [documentId, pageNumber, xPosition, yPosition, tabType,
+                   recipientId]
+        lengths = set(len(column) for column in columns
+                      if self.is_sequence(column))
+        if len(lengths) > 1:
+            raise ValueError(
+                'Tab columns have different lengths: {0}'.format(
+                    sorted(lengths)))
+        size = lengths.pop() if lengths else 1
+
+        def column(values, convert=None):
+            if not self.is_sequence(values):
+                values = [values] * size
+            elif convert is not None:
+                values = [convert(value) for value in values]
+            return int_array(values)
+
+        #: Document IDs.
+        self.documentIds = column(documentId)
+        #: Page numbers, from 1.
+        self.pageNumbers = column(pageNumber)
+        #: Horizontal offsets of tabs on pages, from left.
+        self.xPositions = column(xPosition)
+        #: Vertical offsets of tabs on pages, from top.
+        self.yPositions = column(yPosition)
+        #: Codes of tab types, see :data:`TAB_TYPES`.
+        self.tabTypes = column(
+            tabType if self.is_sequence(tabType)
+            else tab_type_code(tabType), tab_type_code)
+        #: Recipient IDs, or ``None``.
+        self.recipientIds = None if recipientId is None \
+            else column(recipientId)
+
+    @staticmethod
+    def is_sequence(value):
+        """Return ``True`` if ``value`` is a column, not a scalar."""
+        return hasattr(value, '__len__') and not isinstance(
+            value, (str, bytes, encoder.text_type))
+
+    def __len__(self):
+        return len(self.pageNumbers)
+
+    @property
+    def columns(self):
+        """List of arrays: documentIds, pageNumbers, xPositions, yPositions.
+        """
+        return [self.documentIds, self.pageNumbers, self.xPositions,
+                self.yPositions]
+
+    def validate(self, pageCount=None, width=None, height=None):
+        """Raise ``ValueError`` if tabs are out of pages.
+
+        Page numbers must be in ``1..pageCount`` and positions in
+        ``0..width`` and ``0..height``. Limits which are ``None`` are not
+        checked.
+
+        """
+        errors = []
+        for name, values, low, high in [
+                ('pageNumber', self.pageNumbers, 1, pageCount),
+                ('xPosition', self.xPositions, 0, width),
+                ('yPosition', self.yPositions, 0, height)]:
+            positions = out_of_bounds(values, low, high)
+            if positions:
+                errors.append('{name} out of bounds at rows {rows}'.format(
+                    name=name,
+                    rows=', '.join(str(row) for row in positions[:10])))
+        if errors:
+            raise ValueError('; '.join(errors))
+
+    def select(self, rows):
+        """Return :class:`TabColumns` of ``rows`` (list of positions)."""
+        return TabColumns(
+            documentId=[self.documentIds[row] for row in rows],
+            pageNumber=[self.pageNumbers[row] for row in rows],
+            xPosition=[self.xPositions[row] for row in rows],
+            yPosition=[self.yPositions[row] for row in rows],
+            tabType=[self.tabTypes[row] for row in rows],
+            recipientId=None if self.recipientIds is None
+            else [self.recipientIds[row] for row in rows])
+
+    def assign(self, signers):
+        """Append tabs to ``signers``, according to :attr:`recipientIds`.
+
+        Raise ``ValueError`` if some tabs belong to none of ``signers``.
+
+        """
+        if self.recipientIds is None:
+            raise ValueError('Tab columns have no recipientId column.')
+        rows = {}
+        for row, recipient_id in enumerate(self.recipientIds):
+            rows.setdefault(recipient_id, []).append(row)
+        for signer in signers:
+            recipient_rows = rows.pop(int(signer.recipientId), None)
+            if recipient_rows:
+                signer.tabs = signer.tabs + [self.select(recipient_rows)]
+        if rows:
+            raise ValueError('Tabs without signer, for recipients {0}'.format(
+                ', '.join(str(recipient_id) for recipient_id in sorted(rows))))
+
+    def groups(self):
+        """Return list of ``(tabs_name, rows)``, rows being tuples of values.
+
+        Groups are in order of first occurrence of tab types.
+
+        """
+        rows_by_code = {}
+        order = []
+        for row in zip(self.tabTypes, *self.columns):
+            code = row[0]
+            try:
+                rows_by_code[code].append(row[1:])
+            except KeyError:
+                rows_by_code[code] = [row[1:]]
+                order.append(code)
+        return [(TAB_TYPES[tab_type].tabs_name, rows_by_code[tab_type])
+                for tab_type in order]
+
+    @models.cached_dict
+    def to_dict(self):
+        """Return dictionary of tab dictionaries lists, keyed by tabs name.
+
+        This is the ``tabs`` structure of
+        :meth:`pydocusign.models.Signer.to_dict`.
+
+        """
+        names = models.PositionnedTab.attributes
+        return dict((tabs_name, [dict(zip(names, row)) for row in rows])
+                    for tabs_name, rows in self.groups())
+
+    def encoded_groups(self):
+        """Return list of ``(tabs_name, json)`` groups.
+
+        ``json`` is comma-separated JSON (bytes) of tabs of group, as written
+        by :func:`pydocusign.encoder.write_signer`.
+
+        """
+        return [(tabs_name, b','.join([ROW_TEMPLATE % row for row in rows]))
+                for tabs_name, rows in self.groups()]
@@ -7,6 +7,12 @@ See https://www.docusign.com/developer-center/explore/common-terms
    CamelCase is used here to mimic DocuSign names.
 
 """
+import contextlib
+import functools
+import hashlib
+import mmap
+import os
+import threading
 
 ENVELOPE_STATUS_CREATED = 'Created'
 ENVELOPE_STATUS_DRAFT = 'Draft'
@@ -60,18 +66,129 @@ DEFAULT_RECIPIENT_EVENTS = [
     ]
 
 
+class _DictCaching(threading.local):
+    #: Models with a cached ``to_dict()`` result, while :func:`cached_dicts`
+    #: is active in current thread. ``None`` means caching is off.
+    models = None
+
+
+_dict_caching = _DictCaching()
+
+
+@contextlib.contextmanager
+def cached_dicts():
+    """Context manager which caches ``to_dict()`` results of models.
+
+    Caching is off by default: models do not keep a second tree of dicts.
+    Use it when the same models are serialized several times, for instance
+    to send many envelopes which differ by a few attributes. Caches are
+    dropped on exit. Models must not be changed by other threads meanwhile.
+
+    >>> tab = SignHereTab(documentId=1)
+    >>> tab.to_dict() is tab.to_dict()
+    False
+    >>> with cached_dicts():
+    ...     tab.to_dict() is tab.to_dict()
+    True
+
+    """
+    if _dict_caching.models is not None:  # Nested.
+        yield
+        return
+    _dict_caching.models = models = []
+    try:
+        yield
+    finally:
+        _dict_caching.models = None
+        for model in models:
+            object.__setattr__(model, '_dict_cache', None)
+
+
+def cached_dict(to_dict):
+    """Decorator for ``to_dict()`` methods of models: cache result within
+    :func:`cached_dicts`.
+
+    Cached result is dropped when an attribute of the model is assigned
+    (see :meth:`DocuSignObject.__setattr__`), and is rebuilt when one of
+    :meth:`DocuSignObject.dict_children` was added, removed, or rebuilt its
+    own dict. So only the changed subtrees of an envelope are rebuilt.
+
+    """
+    @functools.wraps(to_dict)
+    def wrapper(self):
+        models = _dict_caching.models
+        if models is None:
+            return to_dict(self)
+        cache = getattr(self, '_dict_cache', None)
+        children = [child for child in self.dict_children()
+                    if isinstance(child, DocuSignObject)]
+        if cache is not None:
+            fingerprint, data = cache
+            if len(fingerprint) == len(children) and all(
+                    child is cached_child and child.to_dict() is cached_data
+                    for child, (cached_child, cached_data)
+                    in zip(children, fingerprint)):
+                return data
+        else:
+            models.append(self)
+        data = to_dict(self)
+        fingerprint = [(child, child.to_dict()) for child in children]
+        object.__setattr__(self, '_dict_cache', (fingerprint, data))
+        return data
+    return wrapper
+
+
 class DocuSignObject(object):
-    """Base class for DocuSign objects."""
+    """Base class for DocuSign objects.
+
+    Models use ``__slots__``, so that instances have no ``__dict__``: large
+    envelopes hold many tabs and recipients.
+
+    Within :func:`cached_dicts`, results of ``to_dict()`` are cached, and
+    shared: do not modify them. Assigning attributes of models is tracked,
+    but in-place changes of non-model values (such as ``values`` of advanced
+    tabs) are not: call :meth:`invalidate` after them.
+
+    """
+    __slots__ = ('_dict_cache',)
+
     #: API fields. Used to iterate attributes.
     attributes = []
     #: DocuSign client, typically assigned by client itself.
     client = None
 
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if _dict_caching.models is not None:
+            object.__setattr__(self, '_dict_cache', None)
+
+    def invalidate(self):
+        """Drop cached ``to_dict()`` result."""
+        object.__setattr__(self, '_dict_cache', None)
+
+    def dict_children(self):
+        """Return models whose dicts are part of ``to_dict()`` result."""
+        return ()
+
+    @cached_dict
     def to_dict(self):
         """Return dict representation of model."""
         data = dict([(k, getattr(self, k)) for k in self.attributes])
         return data
 
+    def __getstate__(self):
+        """Return state for pickle and copy, since instances have slots."""
+        state = dict(getattr(self, '__dict__', {}))
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if name != '_dict_cache' and hasattr(self, name):
+                    state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
     def __unicode__(self):
         return self.to_dict()
 
@@ -85,11 +202,16 @@ class Tab(DocuSignObject):
     https://www.docusign.com/p/RESTAPIGuide/RESTAPIGuide.htm#REST%20API%20References/Tab%20Parameters.htm
 
     """
+    __slots__ = ()
     tabs_name = None
+    #: Whether instance holds many tabs, possibly of several types. See
+    #: :class:`pydocusign.layout.TabColumns`.
+    bulk = False
 
 
 class PositionnedTab(Tab):
     """Base class for a positionned DocuSign Tab."""
+    __slots__ = ('documentId', 'pageNumber', 'xPosition', 'yPosition')
     attributes = ['documentId', 'pageNumber', 'xPosition', 'yPosition']
 
     def __init__(self, documentId=None, pageNumber=1, xPosition=0,
@@ -110,6 +232,7 @@ class PositionnedTab(Tab):
 
 class SignHereTab(PositionnedTab):
     """Tag to have a recipient place his signature in the document."""
+    __slots__ = ()
     tabs_name = 'signHereTabs'
 
     def to_dict(self):
@@ -134,6 +257,7 @@ class SignHereTab(PositionnedTab):
 
 class DateTab(PositionnedTab):
     """Tag to have a recipient place a date in the document."""
+    __slots__ = ()
     tabs_name = 'dateTabs'
 
     def to_dict(self):
@@ -158,6 +282,7 @@ class DateTab(PositionnedTab):
 
 class DateSignedTab(PositionnedTab):
     """Tag where you want the date the recipient signed the document to automatically appear."""
+    __slots__ = ()
     tabs_name = 'dateSignedTabs'
 
     def to_dict(self):
@@ -182,6 +307,7 @@ class DateSignedTab(PositionnedTab):
 
 class ApproveTab(PositionnedTab):
     """Tag to have a recipient approve the document."""
+    __slots__ = ()
     tabs_name = 'approveTabs'
 
     def to_dict(self):
@@ -206,6 +332,7 @@ class ApproveTab(PositionnedTab):
 
 class DeclineTab(PositionnedTab):
     """Tag to have a recipient decline the document."""
+    __slots__ = ()
     tabs_name = 'declineTabs'
 
     def to_dict(self):
@@ -213,7 +340,22 @@ class DeclineTab(PositionnedTab):
 
 
 class AdvancedTab(Tab):
-    """Advanced Tab base class."""
+    """Advanced Tab base class.
+
+    Options are stored in :attr:`values` dictionary, and can be read and
+    assigned as attributes.
+
+    >>> tab = NoteTab(documentId=1, yPosition=10, tabLabel='note')
+    >>> tab.height, tab.tabLabel
+    (33, 'note')
+    >>> tab.height = 40
+    >>> tab.values['height']
+    40
+    >>> tab.to_dict()['yPosition']
+    10
+
+    """
+    __slots__ = ('values',)
     base_options = {
         'documentId': None,
         'pageNumber': 1,
@@ -221,32 +363,56 @@ class AdvancedTab(Tab):
         'yPosition': None,
     }
     options = {}
+    attributes = ['documentId', 'pageNumber', 'xPosition', 'yPosition']
 
     def __init__(self, **kwargs):
-        self.attributes = {}
-        self.attributes.update(self.base_options)
-        self.attributes.update(self.options)
-        self.attributes.update(kwargs)
+        #: Dictionary of options: :attr:`base_options`, :attr:`options`, then
+        #: keyword arguments.
+        self.values = {}
+        self.values.update(self.base_options)
+        self.values.update(self.options)
+        self.values.update(kwargs)
+
+    def __getattr__(self, name):
+        if name == 'values':  # Not initialized yet, e.g. while unpickling.
+            raise AttributeError(name)
+        try:
+            return self.values[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        if name in ('values', '_dict_cache'):
+            super(AdvancedTab, self).__setattr__(name, value)
+        else:
+            self.values[name] = value
+            if _dict_caching.models is not None:
+                self.invalidate()
 
+    @cached_dict
     def to_dict(self):
-        return self.attributes
+        return dict(self.values)
 
 
 class NoteTab(AdvancedTab):
     """Tag to have a recipient add notes the document."""
+    __slots__ = ()
     tabs_name = 'noteTabs'
     options = {
         'height': 33,
         'width': 66,
     }
+    attributes = AdvancedTab.attributes + ['height', 'width']
 
 
 class SignerAttachmentTab(AdvancedTab):
     """Tag to have a recipient add attachments the document."""
+    __slots__ = ()
     tabs_name = 'signerAttachmentTabs'
     options = {
         'required': False,
     }
+    attributes = AdvancedTab.attributes + ['required']
 
 
 class Recipient(DocuSignObject):
@@ -256,6 +422,8 @@ class Recipient(DocuSignObject):
     https://www.docusign.com/p/RESTAPIGuide/RESTAPIGuide.htm#REST%20API%20References/Recipient%20Parameter.htm
 
     """
+    __slots__ = ()
+
     # Pseudo-constants.
     STATUS_AUTHENTICATION_FAILED = RECIPIENT_STATUS_AUTHENTICATION_FAILED
     STATUS_AUTO_RESPONDED = RECIPIENT_STATUS_AUTO_RESPONDED
@@ -276,6 +444,9 @@ class Signer(Recipient):
     https://www.docusign.com/p/RESTAPIGuide/RESTAPIGuide.htm#REST%20API%20References/Recipients/Signers%20Recipient.htm
 
     """
+    __slots__ = ('clientUserId', 'email', 'emailBody', 'emailSubject',
+                 'supportedLanguage', 'name', 'recipientId', 'routingOrder',
+                 'tabs', 'userId', 'accessCode', 'note', 'roleName')
     attributes = ['clientUserId', 'email', 'emailBody', 'emailSubject', 'name',
                   'recipientId', 'routingOrder', 'supportedLanguage', 'tabs',
                   'accessCode', 'note']
@@ -283,7 +454,7 @@ class Signer(Recipient):
     def __init__(self, clientUserId=None, email='', emailBody=None,
                  emailSubject=None, name='', recipientId=None, routingOrder=0,
                  supportedLanguage=None, tabs=None, userId=None,
-                 accessCode=None, note=''):
+                 accessCode=None, note='', roleName=None):
         """Setup."""
         #: If ``None`` then the recipient is remote (email sent) else embedded.
         self.clientUserId = clientUserId
@@ -325,6 +496,13 @@ class Signer(Recipient):
         self.accessCode = accessCode
         self.note = note
 
+        #: Role name, when signer was read from a template's envelope.
+        self.roleName = roleName
+
+    def dict_children(self):
+        return self.tabs
+
+    @cached_dict
     def to_dict(self):
         """Return dict representation of model.
 
@@ -405,12 +583,19 @@ class Signer(Recipient):
                 'supportedLanguage': self.supportedLanguage,
             }
         for tab in self.tabs:
+            if tab.bulk:
+                for tabs_name, tabs in tab.to_dict().items():
+                    data['tabs'].setdefault(tabs_name, []).extend(tabs)
+                continue
             data['tabs'].setdefault(tab.tabs_name, [])
             data['tabs'][tab.tabs_name].append(tab.to_dict())
         return data
 
 
 class CarbonCopyRecipient(Recipient):
+    __slots__ = ('clientUserId', 'email', 'emailBody', 'emailSubject',
+                 'supportedLanguage', 'name', 'recipientId', 'routingOrder',
+                 'userId', 'accessCode', 'note')
     attributes = ['clientUserId', 'email', 'emailBody', 'emailSubject', 'name',
                   'recipientId', 'routingOrder', 'supportedLanguage', 'tabs',
                   'accessCode', 'note']
@@ -431,6 +616,7 @@ class CarbonCopyRecipient(Recipient):
         self.accessCode = accessCode
         self.note = note
 
+    @cached_dict
     def to_dict(self):
         data = {
             'email': self.email,
@@ -451,7 +637,7 @@ class CarbonCopyRecipient(Recipient):
 
 
 class CertifiedDeliveryRecipient(CarbonCopyRecipient):
-    pass
+    __slots__ = ()
 
 
 class Role(Recipient):
@@ -463,12 +649,15 @@ class Role(Recipient):
     (templateRoles)
 
     """
+    __slots__ = ('clientUserId', 'email', 'emailBody', 'emailSubject',
+                 'supportedLanguage', 'name', 'roleName', 'userId',
+                 'recipientId')
     attributes = ['clientUserId', 'email', 'emailBody', 'emailSubject', 'name',
                   'supportedLanguage', 'roleName']
 
     def __init__(self, clientUserId=None, email='', emailBody=None,
                  emailSubject=None, name='', supportedLanguage=None,
-                 roleName='', userId=None):
+                 roleName='', userId=None, recipientId=None):
         """Setup."""
         #: If ``None`` then the recipient is remote (email sent) else embedded.
         self.clientUserId = clientUserId
@@ -496,6 +685,11 @@ class Role(Recipient):
         #: User ID on DocuSign side. It is an UUID.
         self.userId = userId
 
+        #: ID of recipient created from role, on DocuSign side. Assigned by
+        #: :meth:`Envelope.get_recipients`.
+        self.recipientId = recipientId
+
+    @cached_dict
     def to_dict(self):
         """Return dict representation of model.
 
@@ -552,6 +746,7 @@ class Role(Recipient):
 
 class Document(DocuSignObject):
     """A document to sign."""
+    __slots__ = ('documentId', 'name', 'data')
     attributes = ['documentId', 'name']
 
     def __init__(self, documentId=None, name='', data=None):
@@ -581,8 +776,85 @@ class Document(DocuSignObject):
         return super(Document, self).to_dict()
 
 
+class FileDocument(Document):
+    """A document to sign, read from file ``path``.
+
+    :attr:`data` is a read-only memory map of the file: content is read
+    lazily, by the operating system, and its pages are shared by requests
+    and processes using the same file. Clients stream it without copying it
+    in memory.
+
+    >>> import tempfile
+    >>> with tempfile.NamedTemporaryFile(suffix='.pdf') as pdf_file:
+    ...     _ = pdf_file.write(b'%PDF-1.4 content')
+    ...     pdf_file.flush()
+    ...     document = FileDocument(pdf_file.name, documentId=1)
+    >>> document.size
+    16
+    >>> document.sha256 == hashlib.sha256(b'%PDF-1.4 content').hexdigest()
+    True
+    >>> document.to_dict()['name'].endswith('.pdf')
+    True
+    >>> document.close()
+
+    """
+    __slots__ = ('path', '_sha256')
+
+    def __init__(self, path, documentId=None, name=None):
+        """Setup."""
+        #: Path of file.
+        self.path = path
+        self._sha256 = None
+        with open(path, 'rb') as document_file:
+            data = mmap.mmap(document_file.fileno(), 0,
+                             access=mmap.ACCESS_READ)
+        super(FileDocument, self).__init__(
+            documentId=documentId,
+            name=os.path.basename(path) if name is None else name,
+            data=data)
+
+    @property
+    def size(self):
+        """Size of document, in bytes."""
+        return len(self.data)
+
+    @property
+    def sha256(self):
+        """SHA-256 (hexadecimal) of document content, computed once."""
+        if self._sha256 is None:
+            object.__setattr__(self, '_sha256',
+                               hashlib.sha256(self.data).hexdigest())
+        return self._sha256
+
+    def close(self):
+        """Close memory map."""
+        self.data.close()
+
+    def __getstate__(self):
+        """Return state for pickle and copy: file is mapped again."""
+        return {'path': self.path, 'documentId': self.documentId,
+                'name': self.name}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
 class EventNotification(DocuSignObject):
     """Envelope's event notification, typically callback URL and options."""
+    __slots__ = (
+        'url',
+        'loggingEnabled',
+        'requireAcknoledgement',
+        'useSoapInterface',
+        'soapNameSpace',
+        'includeCertificateWithSoap',
+        'signMessageWithX509Cert',
+        'includeDocuments',
+        'includeTimeZone',
+        'includeSenderAccountAsCustomField',
+        'envelopeEvents',
+        'recipientEvents',
+    )
     attributes = [
         'url',
         'loggingEnabled',
@@ -698,8 +970,28 @@ class EventNotification(DocuSignObject):
         return super(EventNotification, self).to_dict()
 
 
+def routing_order(recipient):
+    """Return routing order of ``recipient`` as an integer, for sorting."""
+    return int(recipient.routingOrder or 0)
+
+
+def recipient_keys(client_user_id, recipient_id):
+    """Return keys identifying a recipient, most specific first."""
+    keys = []
+    if client_user_id:
+        keys.append(('clientUserId', client_user_id))
+    if recipient_id:
+        keys.append(('recipientId', str(recipient_id)))
+    return keys
+
+
 class Envelope(DocuSignObject):
     """An envelope."""
+    __slots__ = ('documents', 'emailBlurb', 'emailSubject',
+                 'eventNotification', 'signers', 'carbonCopyRecipients',
+                 'certifiedDeliveries', 'templateId', 'templateRoles',
+                 'status', 'emailSettings', 'customFields', 'envelopeId',
+                 'sobo_email', 'client')
     attributes = ['documents', 'emailBlurb', 'emailSubject',
                   'eventNotification', 'recipients', 'templateId',
                   'templateRoles', 'status']
@@ -715,19 +1007,37 @@ class Envelope(DocuSignObject):
     STATUS_LIST = ENVELOPE_STATUS_LIST
     DEFAULT_EVENTS = DEFAULT_ENVELOPE_EVENTS
 
+    #: Recipient types: key in DocuSign API recipients data, envelope
+    #: attribute and model. Subclasses come before their parent class.
+    recipient_types = [
+        ('signers', 'signers', Signer),
+        ('certifiedDeliveries', 'certifiedDeliveries',
+         CertifiedDeliveryRecipient),
+        ('carbonCopies', 'carbonCopyRecipients', CarbonCopyRecipient),
+    ]
+
     def __init__(self, documents=None, emailBlurb='', emailSubject='',
                  signers=None, carbonCopyRecipients=None, certifiedDeliveries=None, templateId=None, templateRoles=None,
                  status=ENVELOPE_STATUS_SENT, envelopeId=None,
-                 eventNotification=None, emailSettings=None, customFields=None, sobo_email=None):
+                 eventNotification=None, emailSettings=None, customFields=None, sobo_email=None,
+                 recipients=None):
 
-        """Setup."""
+        """Setup.
+
+        ``recipients`` is a mixed list of signers, carbon copies and
+        certified deliveries, dispatched to their attributes. See
+        :attr:`recipients`.
+
+        """
         self.documents = documents or []
         self.emailBlurb = emailBlurb
         self.emailSubject = emailSubject
         self.eventNotification = eventNotification
-        self.signers = signers or {}
-        self.carbonCopyRecipients = carbonCopyRecipients or {}
-        self.certifiedDeliveries = certifiedDeliveries or {}
+        self.signers = signers or []
+        self.carbonCopyRecipients = carbonCopyRecipients or []
+        self.certifiedDeliveries = certifiedDeliveries or []
+        if recipients:
+            self.recipients = recipients
         self.templateId = templateId
         self.templateRoles = templateRoles
         self.status = status
@@ -741,6 +1051,60 @@ class Envelope(DocuSignObject):
         #: If None, will use logged in user.
         self.sobo_email = sobo_email
 
+        #: DocuSign client, typically assigned by client itself.
+        self.client = None
+
+    @property
+    def recipients(self):
+        """List of signers, carbon copies and certified deliveries.
+
+        Recipients are sorted by routing order. Assigning a list dispatches
+        recipients to :attr:`signers`, :attr:`carbonCopyRecipients` and
+        :attr:`certifiedDeliveries`, by type.
+
+        >>> signer = Signer(name='Signer', routingOrder=2)
+        >>> copy = CarbonCopyRecipient(name='Copy', routingOrder=1)
+        >>> envelope = Envelope(recipients=[signer, copy])
+        >>> envelope.signers == [signer]
+        True
+        >>> envelope.recipients == [copy, signer]
+        True
+
+        """
+        recipients = []
+        for data_key, attribute, model in self.recipient_types:
+            recipients.extend(getattr(self, attribute))
+        recipients.sort(key=routing_order)
+        return recipients
+
+    @recipients.setter
+    def recipients(self, recipients):
+        recipients_by_attribute = dict(
+            (attribute, []) for data_key, attribute, model
+            in self.recipient_types)
+        for recipient in recipients:
+            for data_key, attribute, model in self.recipient_types:
+                if isinstance(recipient, model):
+                    recipients_by_attribute[attribute].append(recipient)
+                    break
+            else:
+                raise TypeError(
+                    'Not a signer, carbon copy or certified delivery: '
+                    '{0!r}'.format(recipient))
+        for attribute, value in recipients_by_attribute.items():
+            setattr(self, attribute, value)
+
+    def dict_children(self):
+        children = []
+        for value in [self.documents, self.signers,
+                      self.carbonCopyRecipients, self.certifiedDeliveries,
+                      self.templateRoles or []]:
+            children.extend(value)
+        if self.eventNotification:
+            children.append(self.eventNotification)
+        return children
+
+    @cached_dict
     def to_dict(self):
         """Return dict representation of model.
 
@@ -841,53 +1205,71 @@ class Envelope(DocuSignObject):
         return data
 
     def get_recipients(self, client=None):
-        """Use client to fetch and update info about recipients.
+        """Use client to fetch recipients and replace local ones.
 
         If ``client`` is ``None``, :attr:`client` is tried.
 
-        .. warning::
+        Signers, carbon copies and certified deliveries are replaced by
+        DocuSign data, in routing order. Local recipients are matched by
+        ``clientUserId`` (else ``recipientId``): matching instances are
+        updated and kept, so that other attributes (such as tabs) are
+        preserved. Other local recipients are dropped.
 
-           This is currently a partial update. It supports only some recipient
-           types (signers) and some fields (userId). At the moment, it updates
-           the list of recipients, it does not replace the current list with
-           data from DocuSign, i.e. if another thread updates the envelope,
-           this method will fail.
-
-           This partial implementation is enough to cover current `pydocusign`
-           features. Feel free to pull request if you need something better ;)
+        For envelopes from templates, recipients created from roles are
+        synced as signers, and :attr:`templateRoles` matching signers by
+        ``clientUserId`` get their ``userId``, ``recipientId``, ``name`` and
+        ``email``.
 
         """
         if client is None:
             client = self.client
         data = client.get_envelope_recipients(self.envelopeId)
         if self.templateId:
-            initial_recipients = self.templateRoles
-        else:
-            initial_recipients = self.recipients
-        synced_recipients = []
-        for recipient_data in data.get('signers', []):
-            recipient = Signer()
-            client_user_id = recipient_data.get('clientUserId', None)
-            if client_user_id:
-                for index, initial_recipient in enumerate(initial_recipients):
-                    if initial_recipient.clientUserId == client_user_id:
-                        recipient = initial_recipient
-                        del (initial_recipients[index])
+            roles = {}
+            for role in self.templateRoles or []:
+                if role.clientUserId:
+                    roles.setdefault(role.clientUserId, role)
+            for recipient_data in data.get('signers') or []:
+                role = roles.pop(recipient_data.get('clientUserId'), None)
+                if role is not None:
+                    role.userId = recipient_data.get('userId', None)
+                    role.recipientId = recipient_data.get('recipientId', None)
+                    role.name = recipient_data.get('name', '')
+                    role.email = recipient_data.get('email', None)
+        for data_key, attribute, model in self.recipient_types:
+            index = {}
+            for recipient in getattr(self, attribute):
+                for key in recipient_keys(recipient.clientUserId,
+                                          recipient.recipientId):
+                    index.setdefault(key, recipient)
+            synced_recipients = []
+            for recipient_data in data.get(data_key) or []:
+                client_user_id = recipient_data.get('clientUserId', None)
+                recipient_id = recipient_data.get('recipientId', None)
+                recipient = None
+                for key in recipient_keys(client_user_id, recipient_id):
+                    recipient = index.get(key)
+                    if recipient is not None:
                         break
-            recipient.routingOrder = int(recipient_data.get('routingOrder', 1))
-            recipient.name = recipient_data.get('name', '')
-            recipient.userId = recipient_data.get('userId', None)
-            recipient.recipientId = recipient_data.get('recipientId', None)
-            recipient.clientUserId = recipient_data.get('clientUserId', None)
-            recipient.email = recipient_data.get('email', None)
-            recipient.roleName = recipient_data.get('roleName', None)
-            synced_recipients.append(recipient)
-
-        def cmp_recipients(a, b):
-            return cmp(a.routingOrder, b.routingOrder)
-
-        synced_recipients = sorted(synced_recipients, cmp_recipients)
-        self.recipients = synced_recipients
+                if recipient is None:
+                    recipient = model()
+                else:
+                    for key in recipient_keys(recipient.clientUserId,
+                                              recipient.recipientId):
+                        if index.get(key) is recipient:
+                            del index[key]
+                recipient.routingOrder = int(
+                    recipient_data.get('routingOrder', 1))
+                recipient.name = recipient_data.get('name', '')
+                recipient.userId = recipient_data.get('userId', None)
+                recipient.recipientId = recipient_id
+                recipient.clientUserId = client_user_id
+                recipient.email = recipient_data.get('email', None)
+                if isinstance(recipient, Signer):
+                    recipient.roleName = recipient_data.get('roleName', None)
+                synced_recipients.append(recipient)
+            synced_recipients.sort(key=routing_order)
+            setattr(self, attribute, synced_recipients)
 
     def post_recipient_view(self, recipient, returnUrl, client=None):
         """Use ``client`` to fetch embedded signing URL for recipient.
@@ -1,37 +1,526 @@
 """Utilities to parse DocuSign callback responses."""
-from collections import OrderedDict
+from collections import namedtuple, OrderedDict
+from io import BytesIO
+import base64
+import datetime
+import hashlib
+import heapq
+import operator
+import os
+import re
+import tempfile
 
-from bs4 import BeautifulSoup
 import dateutil.parser
+from dateutil.tz import tzoffset
+from lxml import etree
 
 import pydocusign
 
 
+#: Regular expression for DocuSign timestamps, which look like
+#: ``2014-10-06T01:41:40.6076508``, with 0 to 7 fractional digits.
+DATETIME_REGEX = re.compile(
+    r'^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(?:\.(\d{0,7}))?$')
+
+#: Shared ``tzoffset`` instances, by offset in hours.
+TZOFFSETS = {}
+
+
+def timezone(offset):
+    """Return shared ``tzoffset`` instance for ``offset`` (in hours).
+
+    >>> timezone(-7)
+    tzoffset(None, -25200)
+    >>> timezone(-7) is timezone(-7)
+    True
+
+    """
+    try:
+        return TZOFFSETS[offset]
+    except KeyError:
+        return TZOFFSETS.setdefault(offset,
+                                    tzoffset(None, int(offset * 3600)))
+
+
+def parse_datetime(value, offset):
+    """Return datetime from DocuSign timestamp ``value`` at ``offset`` hours.
+
+    Timestamps matching :data:`DATETIME_REGEX` are converted directly.
+    Microseconds are truncated, as DocuSign provides up to 7 fractional
+    digits. Other values are parsed with ``dateutil``.
+
+    >>> parse_datetime('2014-10-06T01:41:40.6076508', -7)
+    ... # doctest: +NORMALIZE_WHITESPACE
+    datetime.datetime(2014, 10, 6, 1, 41, 40, 607650,
+                      tzinfo=tzoffset(None, -25200))
+    >>> parse_datetime('2014-10-06T01:41:40', 2)
+    ... # doctest: +NORMALIZE_WHITESPACE
+    datetime.datetime(2014, 10, 6, 1, 41, 40,
+                      tzinfo=tzoffset(None, 7200))
+    >>> parse_datetime('10/06/2014 01:41:40', -7)
+    ... # doctest: +NORMALIZE_WHITESPACE
+    datetime.datetime(2014, 10, 6, 1, 41, 40,
+                      tzinfo=tzoffset(None, -25200))
+
+    """
+    match = DATETIME_REGEX.match(value)
+    if match is None:
+        instant = dateutil.parser.parse(value)
+        if instant.tzinfo is None:
+            instant = instant.replace(tzinfo=timezone(offset))
+        return instant
+    year, month, day, hour, minute, second, fraction = match.groups()
+    if fraction:
+        microsecond = int(fraction[:6].ljust(6, '0'))
+    else:
+        microsecond = 0
+    return datetime.datetime(int(year), int(month), int(day),
+                             int(hour), int(minute), int(second),
+                             microsecond, timezone(offset))
+
+
+def local_name(tag):
+    """Return ``tag`` without XML namespace.
+
+    >>> local_name('{http://www.docusign.net/API/3.0}EnvelopeStatus')
+    'EnvelopeStatus'
+    >>> local_name('EnvelopeStatus')
+    'EnvelopeStatus'
+
+    """
+    return tag.rsplit('}', 1)[-1]
+
+
+#: Size of chunks fed to XML parser, in bytes.
+CHUNK_SIZE = 64 * 1024
+
+#: Document embedded in callback, see :class:`Base64Writer`.
+CallbackDocument = namedtuple(
+    'CallbackDocument',
+    ['name', 'documentId', 'documentType', 'size', 'sha256', 'path'])
+
+#: Data read from callback, see :func:`extract_callback_data`.
+CallbackData = namedtuple(
+    'CallbackData',
+    ['envelope', 'recipients', 'custom_fields', 'timezone_offset',
+     'documents'])
+
+
+#: Value of ``object`` for envelope events.
+EVENT_ENVELOPE = 'envelope'
+
+#: Value of ``object`` for recipient events.
+EVENT_RECIPIENT = 'recipient'
+
+
+class CallbackEvent(namedtuple('CallbackEvent', ['datetime', 'object',
+                                                 'status', 'recipientId',
+                                                 'clientUserId'])):
+    """Immutable event read from DocuSign callback.
+
+    ``recipientId`` and ``clientUserId`` are ``None`` for envelope events.
+
+    >>> event = CallbackEvent(datetime.datetime(2014, 10, 6), EVENT_RECIPIENT,
+    ...                       'Sent', 'some-uuid', '12')
+    >>> event.status
+    'Sent'
+    >>> event.to_dict() == {
+    ...     'datetime': datetime.datetime(2014, 10, 6),
+    ...     'object': 'recipient',
+    ...     'status': 'Sent',
+    ...     'recipient': '12',
+    ...     'recipientId': 'some-uuid',
+    ...     'clientUserId': '12',
+    ... }
+    True
+
+    """
+    __slots__ = ()
+
+    def to_dict(self):
+        """Return event as dictionary, like items of parser's ``events``."""
+        if self.object == EVENT_ENVELOPE:
+            return {
+                'datetime': self.datetime,
+                'object': self.object,
+                'status': self.status,
+                'recipient': None,
+            }
+        return {
+            'datetime': self.datetime,
+            'object': self.object,
+            'status': self.status,
+            'recipient': self.clientUserId,  # Backward compat.
+            'recipientId': self.recipientId,
+            'clientUserId': self.clientUserId,
+        }
+
+
+#: Sort key of events: chronological order.
+event_sort_key = operator.attrgetter('datetime')
+
+
+def merge_events(*streams):
+    """Merge chronologically sorted ``streams`` of events into one list.
+
+    On equal datetimes, events of first streams come first.
+
+    """
+    decorated = [
+        [(event.datetime, stream_index, index, event)
+         for index, event in enumerate(stream)]
+        for stream_index, stream in enumerate(streams)]
+    return [item[-1] for item in heapq.merge(*decorated)]
+
+
+class Base64Writer(object):
+    """Decode base64 text incrementally into file-like ``fileobj``.
+
+    Size and SHA-256 of decoded data are computed along the way.
+
+    >>> from io import BytesIO
+    >>> output = BytesIO()
+    >>> writer = Base64Writer(output)
+    >>> for chunk in ['SGVsb', 'G8sIH\\n', 'dvcmxkIQ==']:
+    ...     writer.write(chunk)
+    >>> writer.close()
+    >>> output.getvalue() == b'Hello, world!'
+    True
+    >>> writer.size
+    13
+
+    """
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        self._pending = b''
+
+    def write(self, text):
+        """Decode ``text``, which may end in the middle of a base64 quantum."""
+        if not isinstance(text, bytes):
+            text = text.encode('ascii')
+        data = self._pending + b''.join(text.split())
+        cut = len(data) - len(data) % 4
+        self._pending = data[cut:]
+        if cut:
+            decoded = base64.b64decode(data[:cut])
+            self.fileobj.write(decoded)
+            self.size += len(decoded)
+            self.sha256.update(decoded)
+
+    def close(self):
+        """Check all data has been decoded."""
+        if self._pending:
+            raise ValueError('Invalid base64 data in callback document.')
+
+
+class CallbackTarget(object):
+    """lxml parser target that collects DocuSign callback data.
+
+    See :func:`extract_callback_data`.
+
+    """
+    def __init__(self, document_dir=None, document_sink=None):
+        self.document_dir = document_dir
+        self.document_sink = document_sink
+        self.envelope = {}
+        self.recipients = []
+        self.custom_fields = OrderedDict()
+        self.timezone_offset = None
+        self.documents = []
+        # Stack of [name, text chunks] for currently open elements. Text
+        # chunks is None for elements with children or ignored text.
+        self._stack = []
+        self._recipient = self._custom_field = None
+        self._document = self._document_file = self._document_writer = None
+
+    def doctype(self, name, pubid, system):
+        """Reject DTDs: callbacks have none, and entities are an attack
+        vector (external entities, exponential expansion)."""
+        raise ValueError('DOCTYPE is not allowed in DocuSign callbacks.')
+
+    def start(self, tag, attrib):
+        name = local_name(tag)
+        parent = self._stack[-1][0] if self._stack else None
+        if self._stack:
+            self._stack[-1][1] = None  # Has children.
+        if name == 'PDFBytes' and self._document is not None:
+            # Do not keep document in memory.
+            self._stack.append([name, None])
+            if self.document_dir is not None:
+                file_descriptor, path = tempfile.mkstemp(
+                    dir=self.document_dir, suffix='.pdf')
+                self._document['path'] = path
+                self._document_file = os.fdopen(file_descriptor, 'wb')
+            elif self.document_sink is not None:
+                self._document_file = self.document_sink()
+                self._document['path'] = getattr(self._document_file, 'name',
+                                                 None)
+            if self._document_file is not None:
+                self._document_writer = Base64Writer(self._document_file)
+            return
+        self._stack.append([name, []])
+        if name == 'RecipientStatus' and parent == 'RecipientStatuses':
+            self._recipient = {}
+            self.recipients.append(self._recipient)
+        elif name == 'CustomField' and parent == 'CustomFields':
+            self._custom_field = {}
+        elif name == 'DocumentPDF' and parent == 'DocumentPDFs':
+            self._document = {}
+
+    def data(self, data):
+        if self._document_writer is not None:
+            self._document_writer.write(data)
+            return
+        chunks = self._stack[-1][1]
+        if chunks is not None:
+            chunks.append(data)
+
+    def end(self, tag):
+        name, chunks = self._stack.pop()
+        parent = self._stack[-1][0] if self._stack else None
+        if chunks:
+            text = ''.join(chunks)
+            if parent == 'EnvelopeStatus':
+                self.envelope[name] = text
+            elif parent == 'RecipientStatus' and self._recipient is not None:
+                self._recipient[name] = text
+            elif parent == 'CustomField' and self._custom_field is not None:
+                self._custom_field[name] = text
+            elif parent == 'DocumentPDF' and self._document is not None:
+                self._document[name] = text
+            elif name == 'TimeZoneOffset' and self.timezone_offset is None:
+                self.timezone_offset = text
+        if name == 'RecipientStatus':
+            self._recipient = None
+        elif name == 'CustomField' and self._custom_field is not None:
+            if 'Name' in self._custom_field:
+                self.custom_fields[self._custom_field['Name']] = \
+                    self._custom_field.get('Value', '')
+            self._custom_field = None
+        elif name == 'PDFBytes' and self._document_writer is not None:
+            self._document_writer.close()
+            self._document['writer'] = self._document_writer
+            if self.document_dir is not None:
+                self._document_file.close()  # Sink files are left open.
+            self._document_file = self._document_writer = None
+        elif name == 'DocumentPDF' and self._document is not None:
+            writer = self._document.get('writer')
+            if writer is not None:
+                self.documents.append(CallbackDocument(
+                    name=self._document.get('Name'),
+                    documentId=self._document.get('DocumentID'),
+                    documentType=self._document.get('DocumentType'),
+                    size=writer.size,
+                    sha256=writer.sha256.hexdigest(),
+                    path=self._document['path']))
+            self._document = None
+
+    def close(self):
+        return CallbackData(self.envelope, self.recipients,
+                            self.custom_fields, self.timezone_offset,
+                            self.documents)
+
+    def abort(self):
+        """Clean up after a parse error: close document file, and remove
+        files written to ``document_dir``. Sink files are left to caller."""
+        if self._document_file is not None and self.document_dir is not None:
+            self._document_file.close()
+        self._document_file = self._document_writer = None
+        if self.document_dir is None:
+            return
+        paths = [document.path for document in self.documents]
+        if self._document is not None and 'path' in self._document:
+            paths.append(self._document['path'])
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def extract_callback_data(xml_file, document_dir=None, document_sink=None):
+    """Read DocuSign callback XML from file-like ``xml_file`` in one pass.
+
+    Return :data:`CallbackData` where:
+
+    * ``envelope`` is a dictionary of ``EnvelopeStatus``'s text children;
+    * ``recipients`` is a list of dictionaries of ``RecipientStatus``'s text
+      children, in document order;
+    * ``custom_fields`` is an ordered dictionary of ``CustomField`` names and
+      values;
+    * ``timezone_offset`` is ``TimeZoneOffset``'s text, or ``None``;
+    * ``documents`` is a list of :data:`CallbackDocument`.
+
+    XML is fed to the parser by chunks, and no tree is built. Embedded
+    documents (``DocumentPDFs``) are not kept in memory: they are decoded
+    while XML is read, and written in a new file in ``document_dir`` if
+    provided, or in the writable file-like object returned by
+    ``document_sink()`` if provided. Files returned by ``document_sink`` are
+    not closed. Without ``document_dir`` nor ``document_sink``, documents are
+    skipped.
+
+    Entities are not resolved, DTDs and network are not loaded, and
+    documents with a DOCTYPE are rejected with ``ValueError``.
+
+    """
+    target = CallbackTarget(document_dir=document_dir,
+                            document_sink=document_sink)
+    parser = etree.XMLParser(target=target, resolve_entities=False,
+                             no_network=True, load_dtd=False)
+    try:
+        chunk = xml_file.read(CHUNK_SIZE).lstrip()
+        while chunk:
+            parser.feed(chunk)
+            chunk = xml_file.read(CHUNK_SIZE)
+        return parser.close()
+    except Exception:
+        target.abort()
+        raise
+
+
+class cached_property(property):
+    """Read-only property computed once per instance.
+
+    Computed value is stored in instance's ``__dict__``.
+
+    """
+    def __init__(self, func):
+        super(cached_property, self).__init__(func, doc=func.__doc__)
+        self.__doc__ = func.__doc__  # Instead of cached_property's one.
+        self.name = func.__name__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            value = instance.__dict__[self.name] = self.fget(instance)
+            return value
+
+
 class DocuSignCallbackParser(object):
-    """Parser for DocuSign callback responses (XML body)."""
-    def __init__(self, xml_source):
-        #: Raw XML source string.
+    """Parser for DocuSign callback responses (XML body).
+
+    XML is read once, at instanciation, with :func:`extract_callback_data`.
+    ``xml_source`` is either a string or a file-like object.
+
+    Documents embedded in callback (see ``includeDocuments`` option of
+    :class:`~pydocusign.models.EventNotification`) are skipped by default.
+    They are written as files in ``document_dir`` if provided, or in file-like
+    objects returned by ``document_sink()`` callable if provided. See
+    :attr:`documents`.
+    Recipients are indexed by ``ClientUserId`` and ``RecipientId``.
+    Properties are computed once, on first access: do not alter the values
+    they return, except :attr:`recipients` which is a copy.
+
+    """
+    def __init__(self, xml_source, document_dir=None, document_sink=None):
+        #: Raw XML source string, or file-like object.
         self.xml_source = xml_source
 
-        #: BeautifulSoup XML tree.
-        self.xml_soup = BeautifulSoup(self.xml_source, ["lxml", "xml"])
+        if hasattr(xml_source, 'read'):
+            xml_file = xml_source
+        else:
+            if not isinstance(xml_source, bytes):
+                xml_source = xml_source.encode('utf-8')
+            xml_file = BytesIO(xml_source)
+        data = extract_callback_data(xml_file, document_dir=document_dir,
+                                     document_sink=document_sink)
+        self._envelope = data.envelope
+        self._recipients = data.recipients
+        self._custom_fields = data.custom_fields
+        self._timezone_offset = data.timezone_offset
+
+        #: List of :data:`CallbackDocument`, i.e. documents embedded in
+        #: callback, written to ``document_dir`` or ``document_sink``.
+        self.documents = data.documents
+
+        # Indexes of recipients. First occurence wins.
+        self._recipients_by_client_user_id = {}
+        self._recipients_by_recipient_id = {}
+        for recipient in self._recipients:
+            if 'ClientUserId' in recipient:
+                self._recipients_by_client_user_id.setdefault(
+                    recipient['ClientUserId'], recipient)
+            if 'RecipientId' in recipient:
+                self._recipients_by_recipient_id.setdefault(
+                    recipient['RecipientId'], recipient)
+
+        # Converted datetimes, by source string.
+        self._datetimes = {}
 
     @property
+    def xml_soup(self):
+        """BeautifulSoup XML tree, built on demand.
+
+        Parser's properties do not use it: it is kept for backward
+        compatibility only.
+
+        """
+        try:
+            return self._xml_soup
+        except AttributeError:
+            from bs4 import BeautifulSoup
+            self._xml_soup = BeautifulSoup(self.xml_source, ["lxml", "xml"])
+            return self._xml_soup
+
+    @staticmethod
+    def status_name(status, status_list):
+        """Return name of ``status`` in ``status_list``, case insensitive.
+
+        >>> DocuSignCallbackParser.status_name(
+        ...     'authenticationfailed',
+        ...     pydocusign.Recipient.STATUS_LIST)
+        'AuthenticationFailed'
+
+        """
+        lower_status = status.lower()
+        for name in status_list:
+            if name.lower() == lower_status:
+                return name
+        return status.title()
+
+    @cached_property
     def envelope_status(self):
-        """Envelope status.
+        """Envelope status, i.e. ``EnvelopeStatus``'s own ``Status``.
 
         Raise ``ValueError`` if status is not valid.
 
+        Reading this property does not alter parsed data: other properties,
+        such as :attr:`recipients`, can be read before or after it.
+
+        >>> xml = '''
+        ... <DocuSignEnvelopeInformation>
+        ...   <EnvelopeStatus>
+        ...     <RecipientStatuses>
+        ...       <RecipientStatus>
+        ...         <RoutingOrder>1</RoutingOrder>
+        ...         <Status>Delivered</Status>
+        ...         <ClientUserId>12</ClientUserId>
+        ...       </RecipientStatus>
+        ...     </RecipientStatuses>
+        ...     <Status>Sent</Status>
+        ...   </EnvelopeStatus>
+        ... </DocuSignEnvelopeInformation>
+        ... '''
+        >>> parser = DocuSignCallbackParser(xml_source=xml)
+        >>> print(parser.envelope_status)
+        Sent
+        >>> print(parser.recipients['12']['Status'])
+        Delivered
+
         """
-        self.xml_soup.EnvelopeStatus.RecipientStatuses.extract()
-        status = self.xml_soup.EnvelopeStatus.Status.string
+        status = self._envelope.get('Status')
         if status is None:
             raise ValueError('Could not read envelope status from XML.')
         if status not in pydocusign.Envelope.STATUS_LIST:
             raise ValueError('Unknown status {status}'.format(status=status))
         return status
 
-    @property
+    @cached_property
     def timezone_offset(self):
         """Timezone offset.
 
@@ -46,7 +535,9 @@ class DocuSignCallbackParser(object):
         -7
 
         """
-        return int(self.xml_soup.TimeZoneOffset.string)
+        if self._timezone_offset is None:
+            raise ValueError('Could not read timezone offset from XML.')
+        return int(self._timezone_offset)
 
     def datetime(self, value):
         """Return datetime converted from string.
@@ -68,12 +559,14 @@ class DocuSignCallbackParser(object):
                           tzinfo=tzoffset(None, -25200))
 
         """
-        value = '{datetime}{offset}'.format(
-            datetime=value,
-            offset=self.timezone_offset)
-        return dateutil.parser.parse(value)
+        try:
+            return self._datetimes[value]
+        except KeyError:
+            instant = parse_datetime(value, self.timezone_offset)
+            self._datetimes[value] = instant
+            return instant
 
-    @property
+    @cached_property
     def time_generated(self):
         """Datetime of callback generation.
 
@@ -93,9 +586,9 @@ class DocuSignCallbackParser(object):
                           tzinfo=tzoffset(None, -25200))
 
         """
-        return self.datetime(self.xml_soup.EnvelopeStatus.TimeGenerated.string)
+        return self.datetime(self._envelope['TimeGenerated'])
 
-    @property
+    @cached_property
     def envelope_id(self):
         """Envelope ID
 
@@ -111,7 +604,7 @@ class DocuSignCallbackParser(object):
         some-uuid
 
         """
-        return self.xml_soup.EnvelopeStatus.EnvelopeID.string
+        return self._envelope.get('EnvelopeID')
 
     def envelope_status_datetime(self, status):
         """Datetime of envelope status, or None.
@@ -144,14 +637,11 @@ class DocuSignCallbackParser(object):
         True
 
         """
-        status_attr = status.title()
-        status_soup = self.xml_soup.EnvelopeStatus.find(
-            status_attr,
-            recursive=False)
-        if status_soup:
-            return self.datetime(status_soup.string)
-        else:
+        status_attr = self.status_name(status, pydocusign.Envelope.STATUS_LIST)
+        value = self._envelope.get(status_attr)
+        if value is None:
             return None
+        return self.datetime(value)
 
     def recipient_status_datetime(self, recipient_id, status):
         """Datetime of recipient status, or None.
@@ -196,32 +686,80 @@ class DocuSignCallbackParser(object):
                           tzinfo=tzoffset(None, -25200))
 
         """
-        status_attr = status.title()
-        for recipient_soup in self.xml_soup.EnvelopeStatus \
-                                           .RecipientStatuses \
-                                           .children:
+        status_attr = self.status_name(status,
+                                       pydocusign.Recipient.STATUS_LIST)
+        try:
+            recipient = self._recipients_by_client_user_id[recipient_id]
+        except KeyError:
             try:
-                current_recipient_id = recipient_soup.ClientUserId.string
-            except AttributeError:
-                pass
-            else:
-                if recipient_id == current_recipient_id:
-                    status_soup = recipient_soup.find(
-                        status_attr,
-                        recursive=False)
-                    if status_soup:
-                        return self.datetime(status_soup.string)
-                    return None
-        return None
+                recipient = self._recipients_by_recipient_id[recipient_id]
+            except KeyError:
+                return None
+        value = recipient.get(status_attr)
+        if value is None:
+            return None
+        return self.datetime(value)
 
     def cmp_events(self, left, right):
-        """Compare ``left`` and ``right`` events."""
-        return cmp(left['datetime'], right['datetime'])
+        """Compare ``left`` and ``right`` events.
 
-    @property
+        Deprecated: events are sorted with :func:`event_sort_key`.
+
+        """
+        left, right = left['datetime'], right['datetime']
+        return (left > right) - (left < right)
+
+    @cached_property
+    def envelope_event_records(self):
+        """Chronological list of :class:`CallbackEvent` for envelope."""
+        events = []
+        for status in pydocusign.Envelope.STATUS_LIST:
+            instant = self.envelope_status_datetime(status)
+            if instant:
+                events.append(CallbackEvent(instant, EVENT_ENVELOPE, status,
+                                            None, None))
+        events.sort(key=event_sort_key)
+        return events
+
+    @cached_property
+    def recipient_event_records(self):
+        """Chronological list of :class:`CallbackEvent` for recipients."""
+        events = []
+        for recipient in self._recipients:
+            try:
+                recipient_id = recipient['RecipientId']
+                client_user_id = recipient['ClientUserId']
+            except KeyError:
+                continue
+            for status in pydocusign.Recipient.STATUS_LIST:
+                value = recipient.get(status)
+                if value is None:
+                    continue
+                instant = self.datetime(value)
+                if instant:
+                    events.append(CallbackEvent(instant, EVENT_RECIPIENT,
+                                                status, recipient_id,
+                                                client_user_id))
+        events.sort(key=event_sort_key)
+        return events
+
+    @cached_property
+    def event_records(self):
+        """Chronological list of :class:`CallbackEvent`.
+
+        Envelope and recipient events are merged. On equal datetimes,
+        envelope events come first.
+
+        """
+        return merge_events(self.envelope_event_records,
+                            self.recipient_event_records)
+
+    @cached_property
     def envelope_events(self):
         """Ordered (chronological) list of events for envelope.
 
+        Dictionaries built from :attr:`envelope_event_records`.
+
         >>> from datetime import datetime
         >>> from dateutil.tz import tzoffset
         >>> xml = '''
@@ -263,21 +801,15 @@ class DocuSignCallbackParser(object):
         True
 
         """
-        events = []
-        for status in pydocusign.Envelope.STATUS_LIST:
-            instant = self.envelope_status_datetime(status)
-            if instant:
-                events.append({
-                    'datetime': instant,
-                    'status': status,
-                })
-        events.sort(self.cmp_events)
-        return events
+        return [{'datetime': event.datetime, 'status': event.status}
+                for event in self.envelope_event_records]
 
-    @property
+    @cached_property
     def recipient_events(self):
         """Ordered (chronological) list of events for recipients.
 
+        Dictionaries built from :attr:`recipient_event_records`.
+
         >>> from datetime import datetime
         >>> from dateutil.tz import tzoffset
         >>> xml = '''
@@ -334,33 +866,18 @@ class DocuSignCallbackParser(object):
 
         """
         events = []
-        for recipient_soup in self.xml_soup.EnvelopeStatus \
-                                           .RecipientStatuses \
-                                           .children:
-            try:
-                recipient_id = recipient_soup.RecipientId.string
-                client_user_id = recipient_soup.ClientUserId.string
-            except AttributeError:
-                pass
-            else:
-                for status in pydocusign.Recipient.STATUS_LIST:
-                    instant = self.recipient_status_datetime(
-                        client_user_id, status)
-                    if instant:
-                        events.append({
-                            'datetime': instant,
-                            'status': status,
-                            'recipient': client_user_id,  # Backward compat.
-                            'recipientId': recipient_id,
-                            'clientUserId': client_user_id,
-                        })
-        events.sort(self.cmp_events)
+        for event in self.recipient_event_records:
+            event = event.to_dict()
+            del event['object']
+            events.append(event)
         return events
 
-    @property
+    @cached_property
     def events(self):
         """Ordered (chronological, from oldest ot latest) list of events.
 
+        Dictionaries built from :attr:`event_records`.
+
         >>> from datetime import datetime
         >>> from dateutil.tz import tzoffset
         >>> xml = '''
@@ -433,21 +950,15 @@ class DocuSignCallbackParser(object):
         True
 
         """
-        events = []
-        for event in self.envelope_events:
-            event['object'] = 'envelope'
-            event['recipient'] = None
-            events.append(event)
-        for event in self.recipient_events:
-            event['object'] = 'recipient'
-            events.append(event)
-        events.sort(self.cmp_events)
-        return events
+        return [event.to_dict() for event in self.event_records]
 
     @property
     def recipients(self):
         """Dictionary of recipients, ordered by routing order.
 
+        A new copy is returned on each access, so callers may alter it.
+        Conversions are computed once.
+
         >>> from datetime import datetime
         >>> from dateutil.tz import tzoffset
         >>> xml = '''
@@ -492,44 +1003,63 @@ class DocuSignCallbackParser(object):
         True
 
         """
+        return OrderedDict((key, dict(recipient))
+                           for key, recipient in self._recipient_dicts.items())
+
+    @cached_property
+    def _recipient_dicts(self):
+        """Converted recipients, shared copy of :attr:`recipients`."""
         recipients = []
-        for recipient_soup in self.xml_soup.EnvelopeStatus \
-                                           .RecipientStatuses \
-                                           .children:
-            try:
-                recipient_soup.children
-            except AttributeError:  # Not a node.
-                continue
-            recipient = {}
-            # Assign.
-            for child_soup in recipient_soup.children:
-                if not child_soup.name:
-                    continue
-                if child_soup.string is None:
-                    continue
-                recipient[child_soup.name] = child_soup.string
+        for source in self._recipients:
+            recipient = dict(source)
             # Transform.
             recipient['RoutingOrder'] = int(recipient['RoutingOrder'])
             for status in pydocusign.Recipient.STATUS_LIST:
                 try:
                     if status == 'Completed':
-                        recipient[status] = self.datetime(recipient['Signed'])
+                        recipient[status] = self.datetime(source['Signed'])
                     else:
-                        recipient[status] = self.datetime(recipient[status])
+                        recipient[status] = self.datetime(source[status])
                 except KeyError:
                     pass
             # Register.
             recipients.append(recipient)
         # Sort by routing order.
-        recipients.sort(lambda a, b: cmp(a['RoutingOrder'], b['RoutingOrder']))
+        recipients.sort(key=operator.itemgetter('RoutingOrder'))
         # Return OrderedDict.
         recipients = OrderedDict([(rec['ClientUserId'], rec)
                                   for rec in recipients])
         return recipients
 
     @property
+    def envelope_fields(self):
+        """Dictionary of envelope status fields, as raw text values.
+
+        >>> xml = '''
+        ... <DocuSignEnvelopeInformation>
+        ...   <EnvelopeStatus>
+        ...     <EnvelopeID>some-uuid</EnvelopeID>
+        ...   </EnvelopeStatus>
+        ... </DocuSignEnvelopeInformation>
+        ... '''
+        >>> parser = DocuSignCallbackParser(xml_source=xml)
+        >>> 'TimeGenerated' in parser.envelope_fields
+        False
+
+        """
+        return self._envelope
+
+    @property
+    def recipient_fields(self):
+        """List of recipient status fields, as dictionaries of raw text
+        values, in callback order.
+
+        Unlike :attr:`recipients`, values are not converted and recipients
+        without ``ClientUserId`` are included.
+
+        """
+        return self._recipients
+
+    @cached_property
     def custom_fields(self):
-        custom_fields = {}
-        for field in self.xml_soup.findAll('CustomField'):
-            custom_fields[field.Name.text] = field.Value.text
-        return custom_fields
\ No newline at end of file
+        return dict(self._custom_fields)
\ No newline at end of file
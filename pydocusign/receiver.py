@@ -0,0 +1,196 @@
+"""Receiver for DocuSign Connect notifications (callbacks).
+
+DocuSign retries notifications which are not acknowledged quickly. So
+:class:`CallbackReceiver` acknowledges notifications as soon as they pass
+cheap validation, and queues them. Worker threads then parse them with
+:class:`~pydocusign.parser.DocuSignCallbackParser` and run handlers.
+
+"""
+import logging
+import threading
+try:
+    import Queue as queue
+except ImportError:  # Python 3.
+    import queue
+
+from pydocusign.parser import DocuSignCallbackParser
+
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackReceiver(object):
+    """WSGI application that receives DocuSign Connect notifications.
+
+    ``handlers`` is a list of callables. Each one is called with a
+    :class:`~pydocusign.parser.DocuSignCallbackParser` instance for every
+    notification.
+
+    At most ``queue_size`` notifications wait for workers. When queue is full,
+    notifications are answered with ``503 Service Unavailable``, so that
+    DocuSign delivers them again later.
+
+    If ``deduplicator`` is a :class:`~pydocusign.dedup.CallbackDeduplicator`,
+    notifications already received are acknowledged but not queued.
+    Notifications whose processing fails are forgotten, so that DocuSign's
+    redelivery is processed again. Call :meth:`stop` before exiting, so that
+    queued notifications are processed too.
+
+    >>> receiver = CallbackReceiver(workers=1)
+    >>> receiver.receive(b'') == (400, 'Invalid notification')
+    True
+
+    """
+    def __init__(self, handlers=None, queue_size=1000, workers=4,
+                 max_body_size=100 * 1024 * 1024, deduplicator=None):
+        #: Callables run by workers with parsed notifications.
+        self.handlers = list(handlers or [])
+
+        #: Queue of raw notification bodies.
+        self.queue = queue.Queue(maxsize=queue_size)
+
+        #: Number of worker threads.
+        self.workers = workers
+
+        #: Maximum size of accepted notifications, in bytes.
+        self.max_body_size = max_body_size
+
+        #: Optional :class:`~pydocusign.dedup.CallbackDeduplicator`.
+        self.deduplicator = deduplicator
+
+        self._threads = []
+        self._counters = dict.fromkeys(
+            ['received', 'accepted', 'rejected', 'duplicates', 'overloaded',
+             'processed', 'failed'],
+            0)
+        self._counters_lock = threading.Lock()
+
+    def count(self, name, value=1):
+        """Increment ``name`` counter of :attr:`metrics`."""
+        with self._counters_lock:
+            self._counters[name] += value
+
+    @property
+    def metrics(self):
+        """Dictionary of counters and current queue size.
+
+        * ``received``: notifications received;
+        * ``accepted``: notifications queued;
+        * ``rejected``: notifications that failed validation;
+        * ``duplicates``: notifications already received;
+        * ``overloaded``: notifications refused because queue was full;
+        * ``processed``: notifications parsed and handled;
+        * ``failed``: notifications whose parsing or handling failed;
+        * ``queued``: notifications waiting for workers.
+
+        """
+        with self._counters_lock:
+            metrics = dict(self._counters)
+        metrics['queued'] = self.queue.qsize()
+        return metrics
+
+    def start(self):
+        """Start worker threads."""
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self.work,
+                name='pydocusign-receiver-{index}'.format(index=index))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Process queued notifications, then stop worker threads."""
+        for thread in self._threads:
+            self.queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def validate(self, body):
+        """Return ``True`` if ``body`` looks like a DocuSign notification.
+
+        This is a cheap check: body is not parsed. Bodies with a DOCTYPE are
+        rejected early, parser would refuse them anyway.
+
+        """
+        head = body[:1024]
+        return b'DocuSignEnvelopeInformation' in head \
+            and b'<!DOCTYPE' not in head
+
+    def receive(self, body):
+        """Validate and queue notification ``body``.
+
+        Return ``(status_code, message)`` for the HTTP response.
+
+        """
+        self.count('received')
+        if not self.validate(body):
+            self.count('rejected')
+            return 400, 'Invalid notification'
+        if self.deduplicator is not None \
+                and not self.deduplicator.add(body):
+            self.count('duplicates')
+            return 200, 'Duplicate notification'
+        try:
+            self.queue.put_nowait(body)
+        except queue.Full:
+            if self.deduplicator is not None:
+                self.deduplicator.discard(body)  # Accept redelivery.
+            self.count('overloaded')
+            return 503, 'Too many notifications'
+        self.count('accepted')
+        return 200, 'OK'
+
+    def process(self, body):
+        """Parse notification ``body`` and run :attr:`handlers` with it."""
+        try:
+            parser = DocuSignCallbackParser(body)
+            for handler in self.handlers:
+                handler(parser)
+        except Exception:
+            if self.deduplicator is not None:
+                self.deduplicator.discard(body)  # Accept redelivery.
+            self.count('failed')
+            logger.exception('Failed to process DocuSign notification.')
+        else:
+            self.count('processed')
+
+    def work(self):
+        """Worker loop: process queued notifications until ``None``."""
+        while True:
+            body = self.queue.get()
+            try:
+                if body is None:
+                    return
+                self.process(body)
+            finally:
+                self.queue.task_done()
+
+    def __call__(self, environ, start_response):
+        """WSGI entry point."""
+        if environ['REQUEST_METHOD'] != 'POST':
+            status, message = 405, 'Method Not Allowed'
+        else:
+            try:
+                length = int(environ.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                length = 0
+            if length > self.max_body_size:
+                self.count('received')
+                self.count('rejected')
+                status, message = 413, 'Notification too large'
+            else:
+                body = environ['wsgi.input'].read(length)
+                status, message = self.receive(body)
+        reasons = {
+            200: 'OK',
+            400: 'Bad Request',
+            405: 'Method Not Allowed',
+            413: 'Request Entity Too Large',
+            503: 'Service Unavailable',
+        }
+        start_response(
+            '{code} {reason}'.format(code=status, reason=reasons[status]),
+            [('Content-Type', 'text/plain')])
+        return [message.encode('utf-8')]
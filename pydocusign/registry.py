@@ -0,0 +1,189 @@
+"""Content-addressed registry of documents, reused across envelopes.
+
+Envelopes often share the same large documents. :class:`DocumentRegistry`
+identifies documents by SHA-256 of their content. Once a document has been
+seen ``threshold`` times, it is uploaded as a DocuSign server template, and
+later envelopes reference this template in composite templates instead of
+uploading the document again.
+
+:class:`~pydocusign.client.DocuSignClient` uses it, when given as
+``document_registry`` argument, for ``create_envelope_from_document()``.
+
+"""
+import hashlib
+import threading
+
+from pydocusign import models
+
+
+#: Size of chunks read to hash documents.
+CHUNK_SIZE = 64 * 1024
+
+#: Document ID of the single document of registry templates.
+TEMPLATE_DOCUMENT_ID = '1'
+
+
+def document_digest(document):
+    """Return SHA-256 (hexadecimal) of ``document.data`` content.
+
+    Digest of :class:`~pydocusign.models.FileDocument` is computed once.
+
+    >>> from io import BytesIO
+    >>> from pydocusign.models import Document
+    >>> document_digest(Document(data=BytesIO(b'abc')))[:16]
+    'ba7816bf8f01cfea'
+
+    """
+    if isinstance(document, models.FileDocument):
+        return document.sha256
+    sha256 = hashlib.sha256()
+    document.data.seek(0)
+    while True:
+        chunk = document.data.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        sha256.update(chunk)
+    document.data.seek(0)
+    return sha256.hexdigest()
+
+
+def document_recipients(recipients, documentId, templateDocumentId):
+    """Return copy of ``recipients`` data with tabs of one document only.
+
+    ``recipients`` is the ``recipients`` item of
+    :meth:`pydocusign.models.Envelope.to_dict`. Tabs whose ``documentId`` is
+    ``documentId`` are kept, with ``templateDocumentId`` as document ID.
+
+    """
+    documentId = str(documentId)
+    result = {}
+    for recipient_type, recipient_list in recipients.items():
+        result[recipient_type] = []
+        for recipient in recipient_list:
+            recipient = dict(recipient)
+            if recipient.get('tabs'):
+                tabs = {}
+                for tabs_name, tab_list in recipient['tabs'].items():
+                    tab_list = [dict(tab, documentId=templateDocumentId)
+                                for tab in tab_list
+                                if str(tab['documentId']) == documentId]
+                    if tab_list:
+                        tabs[tabs_name] = tab_list
+                recipient['tabs'] = tabs
+            result[recipient_type].append(recipient)
+    return result
+
+
+class _PendingTemplate(object):
+    """Template being created for a document, awaited by other callers."""
+    def __init__(self):
+        #: Set when creation is over, i.e. :attr:`template_id` is known.
+        self.done = threading.Event()
+        #: ID of created template, ``None`` if creation failed.
+        self.template_id = None
+
+
+class DocumentRegistry(object):
+    """Registry of server templates holding documents, keyed by content.
+
+    Documents seen at least ``threshold`` times are uploaded as templates:
+    with ``threshold=1``, each distinct content is uploaded exactly once,
+    but single-use documents also become templates.
+
+    ``templates`` is an optional dictionary of template IDs keyed by
+    document digest, for instance :attr:`templates` of a previous registry.
+
+    Registry is thread-safe. Templates are created without holding the
+    registry lock: concurrent callers for the same document wait for the
+    creation, others go on.
+
+    """
+    def __init__(self, threshold=2, templates=None,
+                 template_name='pydocusign-{digest}'):
+        #: Number of occurrences after which documents become templates.
+        self.threshold = threshold
+
+        #: Template IDs, keyed by document digest.
+        self.templates = dict(templates or {})
+
+        #: Format of names of created templates, with ``digest``.
+        self.template_name = template_name
+
+        self._counts = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def template_id(self, client, document):
+        """Return ID of template holding ``document``, or ``None``.
+
+        Count an occurrence of ``document``, and create template with
+        ``client`` if ``document`` reaches :attr:`threshold`. While template
+        is being created, other callers for the same document wait for it.
+        If creation fails, the creating caller gets the exception, and the
+        waiting ones get ``None``.
+
+        """
+        digest = document_digest(document)
+        with self._lock:
+            template_id = self.templates.get(digest)
+            if template_id is not None:
+                return template_id
+            pending = self._pending.get(digest)
+            if pending is None:
+                count = self._counts[digest] = self._counts.get(digest, 0) + 1
+                if count < self.threshold:
+                    return None
+                del self._counts[digest]
+                pending = self._pending[digest] = _PendingTemplate()
+                is_creator = True
+            else:
+                is_creator = False
+        if not is_creator:
+            pending.done.wait()
+            return pending.template_id
+        try:
+            pending.template_id = client.create_template_from_document(
+                document, self.template_name.format(digest=digest))
+        finally:
+            with self._lock:
+                del self._pending[digest]
+                if pending.template_id is not None:
+                    self.templates[digest] = pending.template_id
+            pending.done.set()
+        return pending.template_id
+
+    def composite_templates(self, client, envelope):
+        """Return ``(composite_templates, documents)`` for ``envelope``.
+
+        ``composite_templates`` is a list of composite template data, one
+        per document of ``envelope``: a server template reference for
+        registered documents, else the document itself. ``documents`` are
+        the documents to upload. If no document is registered,
+        ``composite_templates`` is ``None``.
+
+        """
+        recipients = envelope.to_dict()['recipients']
+        composite_templates = []
+        documents = []
+        for sequence, document in enumerate(envelope.documents, 1):
+            template_id = self.template_id(client, document)
+            if template_id is None:
+                documents.append(document)
+                composite_template = {'document': document.to_dict()}
+                template_document_id = document.documentId
+            else:
+                composite_template = {'serverTemplates': [{
+                    'sequence': '1',
+                    'templateId': template_id,
+                }]}
+                template_document_id = TEMPLATE_DOCUMENT_ID
+            composite_template['compositeTemplateId'] = str(sequence)
+            composite_template['inlineTemplates'] = [{
+                'sequence': '2',
+                'recipients': document_recipients(
+                    recipients, document.documentId, template_document_id),
+            }]
+            composite_templates.append(composite_template)
+        if len(documents) == len(envelope.documents):
+            return None, documents
+        return composite_templates, documents
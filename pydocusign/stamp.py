@@ -0,0 +1,115 @@
+"""Precompiled envelope requests, for high-volume sends.
+
+When the same envelope is sent to many recipients, only a few values change:
+names, emails, client user IDs, some tab values... An :class:`EnvelopeStamp`
+serializes the request for a model envelope once, with :class:`StampField`
+placeholders instead of variable values. Then each request body is produced
+by filling placeholders only.
+
+>>> from pydocusign import models
+>>> signer = models.Signer(name=StampField('name'), recipientId=1,
+...                        tabs=[models.SignHereTab(documentId=1)])
+>>> stamp = EnvelopeStamp.from_json(models.Envelope(signers=[signer]))
+>>> stamp.fields == ['name']
+True
+>>> import json
+>>> data = json.loads(stamp.render({'name': 'John'}).decode('utf-8'))
+>>> data['recipients']['signers'][0]['name'] == 'John'
+True
+
+"""
+import re
+
+from pydocusign import encoder
+
+
+#: Prefix and suffix of placeholders: a private use character, which is not
+#: expected in actual values.
+MARKER = u'\ue000'
+
+#: Regular expression for placeholders in encoded (ASCII) JSON.
+PLACEHOLDER_REGEX = re.compile(br'"\\ue000stamp:(\w+)\\ue000"')
+
+#: Regular expression for field names.
+NAME_REGEX = re.compile(r'^\w+$')
+
+
+class StampField(encoder.text_type):
+    """Placeholder for a variable value of an envelope.
+
+    Use it as value of model attributes. It is a string, so that it is
+    serialized as any other value, then replaced by :class:`EnvelopeStamp`.
+
+    """
+    __slots__ = ()
+
+    def __new__(cls, name):
+        if not NAME_REGEX.match(name):
+            raise ValueError(
+                'Stamp field names are made of letters, digits and '
+                'underscores, got {0!r}.'.format(name))
+        return super(StampField, cls).__new__(
+            cls, u'{marker}stamp:{name}{marker}'.format(marker=MARKER,
+                                                        name=name))
+
+    @property
+    def name(self):
+        """Name of field."""
+        return self[len(MARKER) + len(u'stamp:'):-len(MARKER)]
+
+
+class EnvelopeStamp(object):
+    """Request for envelope, compiled once and filled for each send.
+
+    ``parts`` is a dictionary of ``url``, ``headers`` and ``body`` (bytes)
+    of the request, as returned by
+    :meth:`~pydocusign.client.DocuSignClient.envelope_stamp`. Body holds
+    :class:`StampField` placeholders.
+
+    """
+    def __init__(self, parts):
+        #: URL of request.
+        self.url = parts['url']
+
+        #: Headers of request, without ``Content-Length``.
+        self.headers = dict(parts['headers'])
+        self.headers.pop('Content-Length', None)
+
+        split = PLACEHOLDER_REGEX.split(parts['body'])
+        #: Invariant chunks of body, around placeholders.
+        self.segments = split[0::2]
+
+        #: Names of fields, in order of placeholders in body.
+        self.fields = [name.decode('ascii') for name in split[1::2]]
+
+    @classmethod
+    def from_json(cls, model):
+        """Return stamp whose body is JSON of ``model`` only."""
+        return cls({'url': None, 'headers': {},
+                    'body': encoder.encode(model)})
+
+    def write(self, values, write):
+        """Write body, with ``values`` of fields, with ``write`` callable."""
+        write(self.segments[0])
+        for name, segment in zip(self.fields, self.segments[1:]):
+            try:
+                value = values[name]
+            except KeyError:
+                raise KeyError(
+                    'Missing value for stamp field {0!r}.'.format(name))
+            write(encoder.encode_value(value))
+            write(segment)
+
+    def render(self, values):
+        """Return body (bytes), with ``values`` of fields."""
+        chunks = []
+        self.write(values, chunks.append)
+        return b''.join(chunks)
+
+    def request_parts(self, values):
+        """Return ``url``, ``headers`` and ``body`` of request for ``values``.
+        """
+        body = self.render(values)
+        headers = dict(self.headers)
+        headers['Content-Length'] = len(body)
+        return {'url': self.url, 'headers': headers, 'body': body}
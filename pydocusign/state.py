@@ -0,0 +1,164 @@
+"""Envelope states, maintained from DocuSign callbacks.
+
+:class:`EnvelopeStateIndex` folds
+:class:`~pydocusign.parser.DocuSignCallbackParser` instances in as callbacks
+arrive, so that current status of envelopes and recipients is known without
+calling DocuSign API.
+
+"""
+from collections import namedtuple, OrderedDict
+import os
+import pickle
+import tempfile
+import threading
+
+from pydocusign import models
+
+
+#: Recipient statuses that do not expect any more action from recipient.
+RECIPIENT_DONE_STATUSES = [
+    models.RECIPIENT_STATUS_SIGNED,
+    models.RECIPIENT_STATUS_COMPLETED,
+    models.RECIPIENT_STATUS_DECLINED,
+]
+
+#: State of a recipient, as of last callback.
+RecipientState = namedtuple(
+    'RecipientState',
+    ['recipientId', 'clientUserId', 'routingOrder', 'status'])
+
+#: State of an envelope, as of last callback. ``recipients`` is an ordered
+#: dictionary of :data:`RecipientState`, keyed by ClientUserId (or
+#: RecipientId for recipients without ClientUserId), in routing order.
+EnvelopeState = namedtuple(
+    'EnvelopeState',
+    ['envelopeId', 'status', 'timeGenerated', 'lastEvent', 'recipients'])
+
+
+def envelope_state(parser):
+    """Return :data:`EnvelopeState` of DocuSign callback ``parser``."""
+    recipients = []
+    for recipient in parser.recipient_fields:
+        recipients.append(RecipientState(
+            recipientId=recipient.get('RecipientId'),
+            clientUserId=recipient.get('ClientUserId'),
+            routingOrder=int(recipient.get('RoutingOrder') or 0),
+            status=recipient.get('Status')))
+    recipients.sort(key=lambda recipient: recipient.routingOrder)
+    if 'TimeGenerated' in parser.envelope_fields:
+        time_generated = parser.time_generated
+    else:
+        time_generated = None
+    events = parser.event_records
+    return EnvelopeState(
+        envelopeId=parser.envelope_id,
+        status=parser.envelope_status,
+        timeGenerated=time_generated,
+        lastEvent=events[-1].datetime if events else None,
+        recipients=OrderedDict(
+            (recipient.clientUserId or recipient.recipientId, recipient)
+            for recipient in recipients))
+
+
+class EnvelopeStateIndex(object):
+    """In-memory index of envelope states, keyed by envelope ID.
+
+    Call :meth:`update` with every callback, for instance as a
+    :class:`~pydocusign.receiver.CallbackReceiver` handler. Callbacks hold a
+    full snapshot of envelope, so latest one wins: callbacks received out of
+    order are recognized by their ``TimeGenerated`` (or latest event, if
+    missing), and older ones are ignored.
+
+    If ``path`` is given, index is loaded from this file, if it exists, and
+    :meth:`save` writes it there.
+
+    """
+    def __init__(self, path=None):
+        #: Optional path to persistent file. See :meth:`save`.
+        self.path = path
+        self._states = {}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            with open(path, 'rb') as state_file:
+                self._states = pickle.load(state_file)
+
+    def __len__(self):
+        return len(self._states)
+
+    def __contains__(self, envelope_id):
+        return envelope_id in self._states
+
+    @staticmethod
+    def version(state):
+        """Return value used to order ``state`` snapshots of an envelope."""
+        return state.timeGenerated or state.lastEvent
+
+    def update(self, parser):
+        """Fold DocuSign callback ``parser`` into index.
+
+        Return ``True`` if envelope state was updated, ``False`` if callback
+        is older than known state.
+
+        """
+        state = envelope_state(parser)
+        with self._lock:
+            current = self._states.get(state.envelopeId)
+            if current is not None:
+                version = self.version(state)
+                current_version = self.version(current)
+                if version is None or (current_version is not None and
+                                       version <= current_version):
+                    return False
+            self._states[state.envelopeId] = state
+        return True
+
+    __call__ = update
+
+    def get(self, envelope_id, default=None):
+        """Return :data:`EnvelopeState` of envelope, or ``default``."""
+        return self._states.get(envelope_id, default)
+
+    def status(self, envelope_id):
+        """Return status of envelope, or ``None`` if unknown."""
+        state = self._states.get(envelope_id)
+        return state.status if state is not None else None
+
+    def recipient_status(self, envelope_id, client_user_id):
+        """Return status of recipient in envelope, or ``None`` if unknown."""
+        state = self._states.get(envelope_id)
+        if state is None:
+            return None
+        recipient = state.recipients.get(client_user_id)
+        return recipient.status if recipient is not None else None
+
+    def pending_recipients(self, envelope_id):
+        """Return list of :data:`RecipientState` that still have to sign.
+
+        Recipients are in routing order.
+
+        """
+        state = self._states.get(envelope_id)
+        if state is None:
+            return []
+        return [recipient for recipient in state.recipients.values()
+                if recipient.status not in RECIPIENT_DONE_STATUSES]
+
+    def discard(self, envelope_id):
+        """Forget envelope."""
+        with self._lock:
+            self._states.pop(envelope_id, None)
+
+    def save(self, path=None):
+        """Write index to ``path`` (defaults to :attr:`path`), atomically."""
+        path = path or self.path
+        with self._lock:
+            states = dict(self._states)
+        directory = os.path.dirname(os.path.abspath(path))
+        file_descriptor, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(file_descriptor, 'wb') as state_file:
+                pickle.dump(states, state_file, pickle.HIGHEST_PROTOCOL)
+            os.rename(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
@@ -1,10 +1,32 @@
 """Utilities to run tests around `pydocusign`."""
+import base64
+import datetime
 import json
+import math
 import os
+import random
+import threading
+import time
+import uuid
 
 import requests
 
 
+#: URL of callback template on diecutter web service.
+DIECUTTER_TEMPLATE_URL = ('http://diecutter.io/github/'
+                          'novapost/pydocusign/master/'
+                          'pydocusign/templates/callback.xml')
+
+#: Recipient statuses :func:`generate_callback_data` picks from by default.
+SYNTHETIC_RECIPIENT_STATUSES = ['Sent', 'Delivered', 'Completed', 'Declined']
+
+#: Jinja2 templates, by name. See :func:`render_template`.
+_templates = {}
+
+#: Base64-encoded random documents, by size. See :func:`document_payload`.
+_document_payloads = {}
+
+
 def fixtures_dir():
     """Return absolute path to `pydocusign`'s fixtures dir, as best guess.
 
@@ -33,24 +55,49 @@ def fixtures_dir():
     return os.path.normpath(os.path.join(project_dir, 'fixtures'))
 
 
-def generate_notification_callback_body(
-        data,
-        template_url='http://diecutter.io/github/'
-                     'novapost/pydocusign/master/'
-                     'pydocusign/templates/callback.xml'):
-    """Return custom body content to mimic DocuSign notification callbacks.
+def templates_dir():
+    """Return absolute path to `pydocusign`'s templates dir."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'templates')
+
+
+def render_template(data, template='callback.xml'):
+    """Render bundled ``template`` with ``data``, locally. Requires Jinja2.
+
+    Templates are loaded once, from :func:`templates_dir`.
 
-    Body content is generated from template, using diecutter web service.
+    """
+    try:
+        compiled = _templates[template]
+    except KeyError:
+        import jinja2  # Test requirement, not required at runtime.
+        environment = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(templates_dir()),
+            autoescape=True)
+        compiled = _templates[template] = environment.get_template(template)
+    return compiled.render(**data)
+
+
+def generate_notification_callback_body(data, template_url=None):
+    """Return custom body content to mimic DocuSign notification callbacks.
 
     ``data`` argument is a dictionary of data you expect in the callback.
 
+    If ``template_url`` is ``None`` (the default), body content is rendered
+    locally from ``pydocusign/templates/callback.xml``, with Jinja2. See
+    :func:`render_template`.
+
+    Else, body content is generated using diecutter web service.
     ``template_url`` is diecutter's template resource URL, which is typically
     in the form
-    ``http://diecutter.io/github/{owner}/{project}/{revision}/{path}``
+    ``http://diecutter.io/github/{owner}/{project}/{revision}/{path}``,
+    such as :data:`DIECUTTER_TEMPLATE_URL`.
 
     Raise exception if a problem occurs during content generation.
 
     """
+    if template_url is None:
+        return render_template(data)
     payload = json.dumps(data)
     headers = {'content-type': 'application/json'}
     try:
@@ -77,15 +124,312 @@ def generate_notification_callback_body(
     return response.text
 
 
-def post_notification_callback(callback_url, data, template_url=None):
+def post_notification_callback(callback_url, data, template_url=None,
+                               session=None):
     """Post fake notification callback to ``callback_url``, return response.
 
     Additional arguments: ``data`` and ``template_url``. See
     :func:`generate_notification_callback_body`.
 
+    ``session`` is an optional :class:`requests.Session`, whose connections
+    are reused. See also :func:`replay_callbacks` for load tests.
+
     """
     body = generate_notification_callback_body(data, template_url)
-    # POST body to callback URL.
+    return post_callback_body(callback_url, body, session=session)
+
+
+def post_callback_body(callback_url, body, session=None, timeout=None):
+    """Post callback ``body`` to ``callback_url``, return response."""
+    if not isinstance(body, bytes):
+        body = body.encode('utf-8')
     headers = {'content-type': 'text/xml'}
-    response = requests.post(callback_url, data=body, headers=headers)
-    return response
+    return (session or requests).post(callback_url, data=body,
+                                      headers=headers, timeout=timeout)
+
+
+class ReplayReport(object):
+    """Results of :func:`replay_callbacks`: latencies and errors.
+
+    >>> report = ReplayReport(duration=2.0)
+    >>> for latency in [0.1, 0.2, 0.3, 0.4]:
+    ...     report.add(latency, 200)
+    >>> report.add(1.0, None)
+    >>> report.count, report.errors, report.error_rate
+    (5, 1, 0.2)
+    >>> report.percentile(50)
+    0.3
+    >>> report.throughput
+    2.5
+
+    """
+    def __init__(self, duration=0.0):
+        #: List of request latencies, in seconds.
+        self.latencies = []
+
+        #: Dictionary of response counts by status code. ``None`` stands for
+        #: requests that failed without response (connection errors,
+        #: timeouts).
+        self.statuses = {}
+
+        #: Duration of replay, in seconds.
+        self.duration = duration
+
+        self._lock = threading.Lock()
+
+    def add(self, latency, status):
+        """Record a request of ``latency`` seconds, with ``status`` code."""
+        with self._lock:
+            self.latencies.append(latency)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    @property
+    def count(self):
+        """Number of requests."""
+        return len(self.latencies)
+
+    @property
+    def errors(self):
+        """Number of failed requests: no response, or status >= 400."""
+        return sum(count for status, count in self.statuses.items()
+                   if status is None or status >= 400)
+
+    @property
+    def error_rate(self):
+        """Ratio of failed requests."""
+        return float(self.errors) / self.count if self.count else 0.0
+
+    @property
+    def throughput(self):
+        """Requests per second."""
+        return self.count / self.duration if self.duration else 0.0
+
+    def percentile(self, percent):
+        """Return ``percent`` percentile of latencies (nearest rank)."""
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        rank = int(math.ceil(percent / 100.0 * len(latencies))) - 1
+        return latencies[min(max(rank, 0), len(latencies) - 1)]
+
+    def summary(self):
+        """Return dictionary of main metrics."""
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'error_rate': self.error_rate,
+            'duration': self.duration,
+            'throughput': self.throughput,
+            'statuses': dict(self.statuses),
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': max(self.latencies) if self.latencies else None,
+        }
+
+
+def replay_callbacks(callback_url, bodies, concurrency=10, rate=None,
+                     timeout=30, session_factory=requests.Session):
+    """Post callback ``bodies`` to ``callback_url``, return report.
+
+    Return :class:`ReplayReport`.
+
+    ``bodies`` is an iterable of callback bodies, such as
+    :func:`generate_callback_corpus`. It is consumed lazily.
+
+    ``concurrency`` threads post bodies, each one with its own session
+    (from ``session_factory``), so that connections are reused.
+
+    If ``rate`` is not ``None``, requests are scheduled at ``rate`` requests
+    per second (within ``concurrency`` limit). Latencies are then measured
+    from scheduled time, so that delays caused by a slow endpoint are
+    reported, not hidden.
+
+    """
+    bodies = iter(bodies)
+    lock = threading.Lock()
+    sequence = [0]
+    report = ReplayReport()
+    start = time.time()
+
+    def next_body():
+        """Return ``(scheduled_time, body)``, or ``None`` when done."""
+        with lock:
+            try:
+                body = next(bodies)
+            except StopIteration:
+                return None
+            index = sequence[0]
+            sequence[0] += 1
+        scheduled = start + index / float(rate) if rate else None
+        return scheduled, body
+
+    def worker():
+        session = session_factory()
+        try:
+            while True:
+                item = next_body()
+                if item is None:
+                    return
+                scheduled, body = item
+                if scheduled is not None:
+                    delay = scheduled - time.time()
+                    if delay > 0:
+                        time.sleep(delay)
+                sent = time.time()
+                try:
+                    response = post_callback_body(callback_url, body,
+                                                  session=session,
+                                                  timeout=timeout)
+                    status = response.status_code
+                except requests.exceptions.RequestException:
+                    status = None
+                report.add(time.time() - (scheduled or sent), status)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=worker) for index in range(concurrency)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report.duration = time.time() - start
+    return report
+
+
+def document_payload(size):
+    """Return base64-encoded random document of ``size`` bytes.
+
+    Payloads are generated once per size, and wrapped in lines like DocuSign
+    does.
+
+    """
+    try:
+        return _document_payloads[size]
+    except KeyError:
+        content = b'%PDF-1.4\n' + os.urandom(max(size - 9, 0))
+        payload = base64.encodestring(content[:size]).decode('ascii')
+        return _document_payloads.setdefault(size, payload)
+
+
+def format_datetime(value):
+    """Return DocuSign representation of datetime ``value``.
+
+    >>> format_datetime(datetime.datetime(2014, 10, 6, 1, 10, 0, 12))
+    '2014-10-06T01:10:00.000012'
+
+    """
+    return value.strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+
+def generate_callback_data(recipients=2, statuses=None, document_size=0,
+                           documents=1, envelope_id=None, random=random):
+    """Return random ``data`` for :func:`generate_notification_callback_body`.
+
+    ``recipients`` is the number of recipients, or ``(min, max)`` range.
+
+    ``statuses`` is the list of recipient statuses to pick from, at random.
+    Defaults to :data:`SYNTHETIC_RECIPIENT_STATUSES`. Envelope status is
+    derived from recipient statuses.
+
+    If ``document_size`` is positive, callback includes ``documents``
+    documents (``DocumentPDFs``) of ``document_size`` bytes each.
+
+    ``random`` is a :class:`random.Random` instance (or :mod:`random` module).
+
+    >>> import random
+    >>> data = generate_callback_data(recipients=3, statuses=['Completed'],
+    ...                               random=random.Random(42))
+    >>> len(data['RecipientStatuses'])
+    3
+    >>> data['Status']
+    'Completed'
+
+    """
+    if statuses is None:
+        statuses = SYNTHETIC_RECIPIENT_STATUSES
+    if isinstance(recipients, (tuple, list)):
+        recipients = random.randint(*recipients)
+    if envelope_id is None:
+        envelope_id = str(uuid.UUID(int=random.getrandbits(128)))
+    created = datetime.datetime(2014, 1, 1) + datetime.timedelta(
+        seconds=random.randint(0, 365 * 24 * 3600),
+        microseconds=random.randint(0, 999999))
+    sent = created + datetime.timedelta(seconds=random.randint(1, 3600))
+
+    def later(instant):
+        """Return random datetime after ``instant``."""
+        return instant + datetime.timedelta(
+            seconds=random.randint(1, 3 * 24 * 3600),
+            microseconds=random.randint(0, 999999))
+
+    latest = sent
+    recipient_statuses = []
+    for index in range(recipients):
+        status = random.choice(statuses)
+        recipient = {
+            'Email': 'signer-{0}@example.com'.format(index),
+            'UserName': 'Signer {0}'.format(index),
+            'ClientUserId': 'client-{0}'.format(index),
+            'RecipientId': str(uuid.UUID(int=random.getrandbits(128))),
+            'Status': status,
+            'Sent': format_datetime(sent),
+        }
+        instant = sent
+        if status in ('Delivered', 'Completed', 'Declined'):
+            instant = later(instant)
+            recipient['Delivered'] = format_datetime(instant)
+        if status == 'Completed':
+            instant = later(instant)
+            recipient['Signed'] = format_datetime(instant)
+        elif status == 'Declined':
+            instant = later(instant)
+            recipient['Declined'] = format_datetime(instant)
+            recipient['DeclineReason'] = 'Declined by synthetic signer.'
+        latest = max(latest, instant)
+        recipient_statuses.append(recipient)
+    data = {
+        'RecipientStatuses': recipient_statuses,
+        'EnvelopeId': envelope_id,
+        'Subject': 'Synthetic signature.',
+        'UserName': 'Bob',
+        'Email': 'bob@example.com',
+        'AccountId': str(random.randint(1, 999999)),
+        'AccountName': 'Bobby',
+        'Created': format_datetime(created),
+        'Sent': format_datetime(sent),
+        'TimeGenerated': format_datetime(later(latest)),
+    }
+    found = set(recipient['Status'] for recipient in recipient_statuses)
+    if 'Declined' in found:
+        data['Status'] = 'Declined'
+        data['Declined'] = format_datetime(latest)
+    elif found == set(['Completed']):
+        data['Status'] = 'Completed'
+        data['Delivered'] = data['Signed'] = data['Completed'] = \
+            format_datetime(latest)
+    elif found & set(['Delivered', 'Completed']):
+        data['Status'] = 'Delivered'
+        data['Delivered'] = format_datetime(latest)
+    else:
+        data['Status'] = 'Sent'
+    if document_size > 0:
+        payload = document_payload(document_size)
+        data['DocumentPDFs'] = [
+            {'Name': 'document-{0}.pdf'.format(index), 'PDFBytes': payload}
+            for index in range(1, documents + 1)]
+    return data
+
+
+def generate_callback_corpus(count, seed=None, **kwargs):
+    """Yield ``count`` synthetic callback bodies, rendered locally.
+
+    ``seed`` makes the corpus reproducible. Other keyword arguments are
+    passed to :func:`generate_callback_data`.
+
+    """
+    generator = random.Random(seed)
+    for index in range(count):
+        data = generate_callback_data(random=generator, **kwargs)
+        yield render_template(data)
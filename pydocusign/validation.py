@@ -0,0 +1,138 @@
+"""Local validation of envelopes, before they are sent to DocuSign.
+
+:func:`validate_envelope` walks an :class:`~pydocusign.models.Envelope` once
+and returns the errors DocuSign would answer with ``400 Bad Request``:
+missing required fields, duplicate recipient IDs, routing orders out of
+range, tabs referencing unknown documents or placed out of pages...
+:func:`check_envelope` raises them as
+:class:`~pydocusign.exceptions.DocuSignValidationError`.
+
+>>> from io import BytesIO
+>>> from pydocusign import models
+>>> envelope = models.Envelope(
+...     emailSubject='Subject',
+...     documents=[models.Document(documentId=1, name='doc.pdf',
+...                                data=BytesIO(b'%PDF'))],
+...     signers=[models.Signer(name='Name', email='name@example.com',
+...                            recipientId=1,
+...                            tabs=[models.SignHereTab(documentId=2)])])
+>>> validate_envelope(envelope)
+['signers[0].tabs[0].documentId: unknown document 2']
+
+"""
+from pydocusign import exceptions
+from pydocusign import models
+
+
+#: Bounds of routing orders. 0 stands for "not set" in pydocusign models.
+ROUTING_ORDER_RANGE = (0, 999)
+
+
+def as_int(value):
+    """Return ``value`` as an integer, or ``None`` if it is not one."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def tab_errors(tab, path, document_ids):
+    """Yield errors of ``tab``, whose documents are ``document_ids``."""
+    if tab.bulk:  # pydocusign.layout.TabColumns.
+        for document_id in sorted(set(tab.documentIds)):
+            if str(document_id) not in document_ids:
+                yield '{path}.documentId: unknown document {id}'.format(
+                    path=path, id=document_id)
+        try:
+            tab.validate()
+        except ValueError as exception:
+            yield '{path}: {error}'.format(path=path, error=exception)
+        return
+    document_id = getattr(tab, 'documentId', None)
+    if document_id is None:
+        yield '{path}.documentId: required'.format(path=path)
+    elif str(document_id) not in document_ids:
+        yield '{path}.documentId: unknown document {id}'.format(
+            path=path, id=document_id)
+    page_number = as_int(getattr(tab, 'pageNumber', None))
+    if page_number is not None and page_number < 1:
+        yield '{path}.pageNumber: must be 1 or more'.format(path=path)
+    for name in ('xPosition', 'yPosition'):
+        value = as_int(getattr(tab, name, None))
+        if value is not None and value < 0:
+            yield '{path}.{name}: must be positive'.format(path=path,
+                                                           name=name)
+
+
+def recipient_errors(recipient, path, required=('name', 'email')):
+    """Yield errors of ``recipient`` fields."""
+    for name in required:
+        if not getattr(recipient, name, None):
+            yield '{path}.{name}: required'.format(path=path, name=name)
+    routing_order = getattr(recipient, 'routingOrder', None)
+    if routing_order is not None:
+        low, high = ROUTING_ORDER_RANGE
+        routing_order = as_int(routing_order)
+        if routing_order is None or not low <= routing_order <= high:
+            yield '{path}.routingOrder: must be an integer in {low}..{high}' \
+                .format(path=path, low=low, high=high)
+
+
+def validate_envelope(envelope):
+    """Return list of errors of ``envelope``. Empty list means valid."""
+    errors = []
+    if envelope.templateId:  # Subject may come from template.
+        for index, role in enumerate(envelope.templateRoles or []):
+            path = 'templateRoles[{index}]'.format(index=index)
+            errors.extend(recipient_errors(role, path,
+                                           ('roleName', 'name', 'email')))
+        return errors
+
+    if envelope.status == models.ENVELOPE_STATUS_SENT \
+            and not envelope.emailSubject:
+        errors.append('emailSubject: required to send envelope')
+    document_ids = set()
+    if not envelope.documents:
+        errors.append('documents: at least one document is required')
+    for index, document in enumerate(envelope.documents):
+        path = 'documents[{index}]'.format(index=index)
+        if document.documentId is None:
+            errors.append('{path}.documentId: required'.format(path=path))
+        elif str(document.documentId) in document_ids:
+            errors.append('{path}.documentId: duplicate {id}'.format(
+                path=path, id=document.documentId))
+        else:
+            document_ids.add(str(document.documentId))
+        if not document.name:
+            errors.append('{path}.name: required'.format(path=path))
+        if document.data is None:
+            errors.append('{path}.data: required'.format(path=path))
+
+    recipient_ids = set()
+    for data_key, attribute, model in envelope.recipient_types:
+        for index, recipient in enumerate(getattr(envelope, attribute)):
+            path = '{attribute}[{index}]'.format(attribute=attribute,
+                                                 index=index)
+            errors.extend(recipient_errors(recipient, path))
+            if recipient.recipientId is None:
+                errors.append('{path}.recipientId: required'.format(
+                    path=path))
+            elif str(recipient.recipientId) in recipient_ids:
+                errors.append('{path}.recipientId: duplicate {id}'.format(
+                    path=path, id=recipient.recipientId))
+            else:
+                recipient_ids.add(str(recipient.recipientId))
+            for tab_index, tab in enumerate(getattr(recipient, 'tabs', ())):
+                errors.extend(tab_errors(
+                    tab, '{path}.tabs[{index}]'.format(path=path,
+                                                       index=tab_index),
+                    document_ids))
+    return errors
+
+
+def check_envelope(envelope):
+    """Raise :class:`~pydocusign.exceptions.DocuSignValidationError` if
+    ``envelope`` is not valid."""
+    errors = validate_envelope(envelope)
+    if errors:
+        raise exceptions.DocuSignValidationError(errors)
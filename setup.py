@@ -58,8 +58,13 @@ REQUIREMENTS = [
     'requests',
     'setuptools',
 ]
-ENTRY_POINTS = {}
+ENTRY_POINTS = {
+    'console_scripts': [
+        'pydocusign-batch = pydocusign.batch:main',
+    ],
+}
 TEST_REQUIREMENTS = [
+    'jinja2',
     'tox',
 ]
 if IS_PYTHON2:
@@ -75,6 +80,7 @@ SETUP_REQUIREMENTS = [
 EXTRA_REQUIREMENTS = {
     'test': TEST_REQUIREMENTS,
     'ssh': ['fabric', 'fabtools'],
+    'numpy': ['numpy'],
 }
 
 
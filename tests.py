@@ -1,18 +1,45 @@
 """Tests for `pydocusign`."""
+import base64
+import copy
+import csv
 from datetime import datetime
+import hashlib
+from io import BytesIO, StringIO
+import itertools
 import json
 import os
+import pickle
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
 import unittest
+from wsgiref.simple_server import make_server, WSGIRequestHandler
 try:
     from unittest import mock
 except ImportError:  # Python 2 fallback.
     import mock
 
 
+import dateutil.parser
 from dateutil.tz import tzoffset
+from lxml import etree
 
 import pydocusign
+from pydocusign import batch
+from pydocusign import bulk
+from pydocusign import encoder
+from pydocusign import layout
 from pydocusign import models
+from pydocusign import registry
+from pydocusign import validation
+from pydocusign.client import _ChunksReader
+from pydocusign.dedup import callback_key, MemoryDedupStore, SQLiteDedupStore
+from pydocusign.export import COLUMNS, EventColumns, timestamp
+from pydocusign.parser import CallbackEvent, extract_callback_data
+from pydocusign.parser import parse_datetime
+from pydocusign.state import envelope_state
 import pydocusign.test
 
 
@@ -183,6 +210,223 @@ class DocuSignClientTestCase(unittest.TestCase):
             docusign.login_information)
 
 
+class RequestCoalescingTestCase(unittest.TestCase):
+    """Test suite for ``DocuSignClient(coalesce_requests=True)``."""
+    def setUp(self):
+        self.client = pydocusign.DocuSignClient(
+            root_url='http://example.com',
+            account_id='some-uuid',
+            coalesce_requests=True)
+        self.released = threading.Event()
+        self.calls = []
+        #: Notified when a request reaches transport or a caller waits for an
+        #: in-flight request.
+        self.arrived = threading.Condition()
+        self.waiting = 0
+        test = self
+
+        class WaitCountingEvent(object):
+            """Event which counts callers waiting for it."""
+            def __init__(self):
+                self.event = threading.Event()
+                self.set = self.event.set
+
+            def wait(self, *args):
+                with test.arrived:
+                    test.waiting += 1
+                    test.arrived.notify_all()
+                return self.event.wait(*args)
+
+        class InFlightRequest(pydocusign.client._InFlightRequest):
+            def __init__(self):
+                super(InFlightRequest, self).__init__()
+                self.done = WaitCountingEvent()
+
+        patcher = mock.patch('pydocusign.client._InFlightRequest',
+                             InFlightRequest)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fake_request(self, url, **kwargs):
+        """Fake DocuSignClient._request, which blocks until released."""
+        with self.arrived:
+            self.calls.append(url)
+            self.arrived.notify_all()
+        self.released.wait()
+        if url.endswith('/error/'):
+            raise pydocusign.exceptions.DocuSignException('Fake error')
+        return {'envelopeId': 'fake-envelope-id'}
+
+    def run_concurrently(self, func, count=5):
+        """Run ``func`` in ``count`` threads, release requests, return
+        results.
+
+        Requests are released once every thread either reached transport or
+        waits for an in-flight request.
+
+        """
+        results = []
+
+        def target():
+            try:
+                results.append(func())
+            except Exception as exception:
+                results.append(exception)
+
+        threads = [threading.Thread(target=target) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        deadline = time.time() + 10
+        try:
+            with self.arrived:
+                while len(self.calls) + self.waiting < count:
+                    self.assertLess(time.time(), deadline)
+                    self.arrived.wait(1)
+        finally:
+            self.released.set()
+            for thread in threads:
+                thread.join()
+        return results
+
+    def test_concurrent_identical_gets(self):
+        """Concurrent identical GET requests share one HTTP request."""
+        self.client._request = mock.Mock(side_effect=self.fake_request)
+        results = self.run_concurrently(
+            lambda: self.client.get_envelope('fake-envelope-id'))
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(results, [{'envelopeId': 'fake-envelope-id'}] * 5)
+        # Callers get distinct copies of the result.
+        self.assertEqual(len(set(id(result) for result in results)), 5)
+        self.assertEqual(self.client._in_flight, {})
+
+    def test_concurrent_different_gets(self):
+        """Concurrent GET requests for different URLs are not coalesced."""
+        self.client._request = mock.Mock(side_effect=self.fake_request)
+        counter = iter(range(5))
+        self.run_concurrently(
+            lambda: self.client.get_envelope(next(counter)))
+        self.assertEqual(len(self.calls), 5)
+
+    def test_exception_is_shared(self):
+        """Exception raised by coalesced request is raised for every caller."""
+        self.client._request = mock.Mock(side_effect=self.fake_request)
+        results = self.run_concurrently(
+            lambda: self.client.get('/error/'))
+        self.assertEqual(len(self.calls), 1)
+        for result in results:
+            self.assertIsInstance(result,
+                                  pydocusign.exceptions.DocuSignException)
+
+    def test_disabled_by_default(self):
+        """Requests are not coalesced by default."""
+        self.client = pydocusign.DocuSignClient(
+            root_url='http://example.com',
+            account_id='some-uuid')
+        self.client._request = mock.Mock(side_effect=self.fake_request)
+        self.run_concurrently(
+            lambda: self.client.get_envelope('fake-envelope-id'))
+        self.assertEqual(len(self.calls), 5)
+
+
+class EnvelopeCacheTestCase(unittest.TestCase):
+    """Test suite for :class:`pydocusign.cache.EnvelopeCache`."""
+    def setUp(self):
+        self.now = 1000.0
+        self.cache = pydocusign.EnvelopeCache(max_size=2, ttl=10,
+                                              clock=lambda: self.now)
+        self.client = pydocusign.DocuSignClient(
+            root_url='http://example.com',
+            account_id='some-uuid',
+            cache=self.cache)
+        self.client._request = mock.Mock(
+            return_value={'status': 'sent'})
+
+    def test_read_through(self):
+        """Cached reads do not perform requests."""
+        for i in range(3):
+            self.assertEqual(self.client.get_envelope('envelope-1'),
+                             {'status': 'sent'})
+            self.client.get_envelope_recipients('envelope-1')
+            self.client.get_envelope_custom_fields('envelope-1')
+        self.assertEqual(self.client._request.call_count, 3)
+
+    def test_result_copies(self):
+        """Altering returned data does not alter cache."""
+        self.client.get_envelope('envelope-1')['status'] = 'altered'
+        self.assertEqual(self.client.get_envelope('envelope-1'),
+                         {'status': 'sent'})
+
+    def test_ttl(self):
+        """Expired entries are fetched again."""
+        self.client.get_envelope('envelope-1')
+        self.now += 10
+        self.client.get_envelope('envelope-1')
+        self.assertEqual(self.client._request.call_count, 2)
+
+    def test_max_size(self):
+        """Least recently used envelopes are dropped first."""
+        self.client.get_envelope('envelope-1')
+        self.client.get_envelope('envelope-2')
+        self.client.get_envelope('envelope-1')
+        self.client.get_envelope('envelope-3')
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.get('envelope-2', 'envelope'), None)
+        self.assertEqual(self.cache.get('envelope-1', 'envelope'),
+                         {'status': 'sent'})
+
+    def test_write_invalidates(self):
+        """Client's write operations on envelope invalidate cache."""
+        self.client.get_envelope('envelope-1')
+        self.client.void_envelope('envelope-1', voidedReason='Test')
+        self.client.get_envelope('envelope-1')
+        self.assertEqual(self.client._request.call_count, 3)
+
+    def test_document_writes_invalidate(self):
+        """Uploading or deleting documents invalidates cache."""
+        self.client.get_envelope('envelope-1')
+        self.client.upload_document_to_envelope('envelope-1', 2,
+                                                file_data=b'%PDF')
+        self.assertIsNone(self.cache.get('envelope-1', 'envelope'))
+        self.client.get_envelope('envelope-1')
+        self.client.delete_envelope_documents('envelope-1', [2])
+        self.assertIsNone(self.cache.get('envelope-1', 'envelope'))
+
+    def test_stale_write(self):
+        """Data fetched before invalidation is not cached after it."""
+        def request(*args, **kwargs):
+            # Envelope is voided by another thread during GET.
+            self.cache.invalidate('envelope-1')
+            return {'status': 'sent'}
+        self.client._request = mock.Mock(side_effect=request)
+        self.assertEqual(self.client.get_envelope('envelope-1'),
+                         {'status': 'sent'})
+        self.assertEqual(self.cache.get('envelope-1', 'envelope'), None)
+        # Without concurrent invalidation, data is cached.
+        self.client._request = mock.Mock(return_value={'status': 'voided'})
+        self.client.get_envelope('envelope-1')
+        self.assertEqual(self.cache.get('envelope-1', 'envelope'),
+                         {'status': 'voided'})
+
+    def test_generation_bounded(self):
+        """Generations of forgotten envelopes still detect invalidation."""
+        generation = self.cache.generation('envelope-1')
+        for envelope_id in ['envelope-1', 'envelope-2', 'envelope-3']:
+            self.cache.invalidate(envelope_id)
+        self.assertEqual(len(self.cache._generations), 2)
+        self.cache.set('envelope-1', 'envelope', {}, generation)
+        self.assertEqual(self.cache.get('envelope-1', 'envelope'), None)
+
+    def test_update_from_callback(self):
+        """Callbacks invalidate entries of notified envelope."""
+        self.client.get_envelope('envelope-1')
+        self.client.get_envelope('envelope-2')
+        parser = mock.Mock(envelope_id='envelope-1')
+        self.cache.update_from_callback(parser)
+        self.assertEqual(self.cache.get('envelope-1', 'envelope'), None)
+        self.assertEqual(self.cache.get('envelope-2', 'envelope'),
+                         {'status': 'sent'})
+
+
 class EnvelopetestCase(unittest.TestCase):
     """Test suite for :class:`pydocusign.models.Envelope`."""
     def test_get_recipients(self):
@@ -261,6 +505,723 @@ class EnvelopetestCase(unittest.TestCase):
                          'paul.english@example.com')
         self.assertEqual(envelope.recipients[1].name, 'Paul English')
 
+    def test_get_recipients_all_types(self):
+        """Envelope.get_recipients() replaces every recipient type."""
+        signer = models.Signer(recipientId=1, clientUserId='signer',
+                               tabs=[models.SignHereTab(documentId=1)])
+        envelope = models.Envelope(
+            signers=[signer],
+            carbonCopyRecipients=[models.CarbonCopyRecipient(recipientId=2),
+                                  models.CarbonCopyRecipient(recipientId=3)],
+            certifiedDeliveries=[
+                models.CertifiedDeliveryRecipient(recipientId=4)])
+        client = pydocusign.DocuSignClient()
+        client.get_envelope_recipients = mock.Mock(return_value={
+            'signers': [
+                {'recipientId': '5', 'routingOrder': '3', 'name': 'New'},
+                {'recipientId': '1', 'clientUserId': 'signer',
+                 'routingOrder': '2', 'name': 'Signer', 'roleName': 'Role'},
+            ],
+            'carbonCopies': [
+                {'recipientId': '3', 'routingOrder': '1', 'name': 'Copy'},
+            ],
+            'certifiedDeliveries': [],
+        })
+        envelope.get_recipients(client=client)
+        self.assertIs(envelope.signers[0], signer)
+        self.assertEqual(signer.name, 'Signer')
+        self.assertEqual(signer.roleName, 'Role')
+        self.assertEqual(len(signer.tabs), 1)
+        self.assertEqual([recipient.recipientId
+                          for recipient in envelope.signers], ['1', '5'])
+        self.assertEqual([recipient.name
+                          for recipient in envelope.carbonCopyRecipients],
+                         ['Copy'])
+        self.assertEqual(envelope.certifiedDeliveries, [])
+        self.assertEqual([recipient.name for recipient in envelope.recipients],
+                         ['Copy', 'Signer', 'New'])
+
+    def test_get_recipients_template(self):
+        """Envelope.get_recipients() updates template roles."""
+        roles = [
+            pydocusign.Role(clientUserId='1', email='one@example.com',
+                            name='One', roleName='Signer'),
+            pydocusign.Role(clientUserId='2', email='two@example.com',
+                            name='Two', roleName='Signer'),
+        ]
+        envelope = models.Envelope(templateId='template-id',
+                                   templateRoles=roles)
+        envelope.envelopeId = 'fake-envelope-id'
+        client = pydocusign.DocuSignClient(
+            root_url='http://example.com', account_id='some-uuid')
+        client.get_envelope_recipients = mock.Mock(return_value={
+            'signers': [
+                {'recipientId': '2', 'userId': '22', 'clientUserId': '2',
+                 'routingOrder': '2', 'email': 'two@example.com',
+                 'name': 'Two'},
+                {'recipientId': '1', 'userId': '11', 'clientUserId': '1',
+                 'routingOrder': '1', 'email': 'one@example.com',
+                 'name': 'One'},
+            ],
+        })
+        envelope.get_recipients(client=client)
+        self.assertEqual(envelope.templateRoles, roles)
+        self.assertEqual([role.userId for role in roles], ['11', '22'])
+        self.assertEqual([role.recipientId for role in roles], ['1', '2'])
+        self.assertEqual([signer.userId for signer in envelope.signers],
+                         ['11', '22'])
+
+
+class EncoderTestCase(unittest.TestCase):
+    """Tests around :mod:`pydocusign.encoder`."""
+    def assertSameJSON(self, model):
+        self.assertEqual(json.loads(encoder.encode(model).decode('ascii')),
+                         json.loads(json.dumps(model.to_dict())))
+
+    def test_envelope(self):
+        """Envelope JSON matches ``to_dict()``."""
+        signer = pydocusign.Signer(
+            clientUserId=u'J\xfcrgen', email='signer@example.com',
+            name='Name "quoted"\n', recipientId=1, emailSubject='Subject',
+            tabs=[pydocusign.SignHereTab(documentId=1, pageNumber=2),
+                  pydocusign.ApproveTab(documentId=1),
+                  pydocusign.NoteTab(documentId=1, tabLabel='note'),
+                  pydocusign.SignHereTab(documentId=2)])
+        envelope = pydocusign.Envelope(
+            documents=[pydocusign.Document(documentId=1, name='test.pdf')],
+            signers=[signer, pydocusign.Signer(name='Other')],
+            carbonCopyRecipients=[pydocusign.CarbonCopyRecipient(name='CC')],
+            eventNotification=pydocusign.EventNotification(url='fake'),
+            customFields={'textCustomFields': [{'name': 'a', 'value': 1}]})
+        self.assertSameJSON(envelope)
+        self.assertSameJSON(signer)
+        self.assertSameJSON(signer.tabs[2])
+
+    def test_template_envelope(self):
+        """Envelope from template JSON matches ``to_dict()``."""
+        self.assertSameJSON(pydocusign.Envelope(
+            templateId='template-id',
+            templateRoles=[pydocusign.Role(name='Name', roleName='Role')]))
+
+    def test_subclass(self):
+        """Subclasses are encoded with their ``to_dict()``."""
+
+        class CustomTab(pydocusign.SignHereTab):
+            __slots__ = ()
+
+            def to_dict(self):
+                return dict(super(CustomTab, self).to_dict(), custom=True)
+
+        self.assertTrue(
+            json.loads(encoder.encode(CustomTab()).decode('ascii'))['custom'])
+
+
+class TabColumnsTestCase(unittest.TestCase):
+    """Tests around :class:`pydocusign.layout.TabColumns`."""
+    def grid(self, pages=3, **kwargs):
+        """Return 4 tabs per page: 2 sign here, 2 date signed."""
+        count = pages * 4
+        return layout.TabColumns(
+            documentId=1,
+            pageNumber=[index // 4 + 1 for index in range(count)],
+            xPosition=[100 + (index % 2) * 200 for index in range(count)],
+            yPosition=[(index % 4) * 100 for index in range(count)],
+            tabType=['signHereTabs', 'signHereTabs',
+                     models.DateSignedTab, models.DateSignedTab] * pages,
+            **kwargs)
+
+    def test_signer_dict(self):
+        """Columns are serialized as tabs of equivalent tab objects."""
+        columns = self.grid()
+        tabs = [
+            (models.SignHereTab if tab_type == 0 else models.DateSignedTab)(
+                documentId=1, pageNumber=page, xPosition=x, yPosition=y)
+            for tab_type, page, x, y in zip(
+                columns.tabTypes, columns.pageNumbers, columns.xPositions,
+                columns.yPositions)]
+        expected = models.Signer(name='Signer', recipientId=1, tabs=tabs)
+        signer = models.Signer(name='Signer', recipientId=1, tabs=[columns])
+        self.assertEqual(signer.to_dict(), expected.to_dict())
+        self.assertEqual(json.loads(encoder.encode(signer).decode('ascii')),
+                         expected.to_dict())
+
+    def test_mixed_tabs(self):
+        """Columns and tab objects can be mixed."""
+        signer = models.Signer(name='Signer', recipientId=1, tabs=[
+            models.SignHereTab(documentId=2, pageNumber=9),
+            self.grid(pages=1),
+            models.ApproveTab(documentId=2)])
+        data = json.loads(encoder.encode(signer).decode('ascii'))
+        self.assertEqual(data, json.loads(json.dumps(signer.to_dict())))
+        self.assertEqual(len(data['tabs']['signHereTabs']), 3)
+        self.assertEqual(data['tabs']['signHereTabs'][0]['pageNumber'], 9)
+
+    def test_validate(self):
+        """Out of bounds rows are reported."""
+        columns = self.grid(pages=3)
+        columns.validate(pageCount=3, width=612, height=792)
+        with self.assertRaises(ValueError) as context:
+            columns.validate(pageCount=2, height=250)
+        message = str(context.exception)
+        self.assertIn('pageNumber out of bounds at rows 8, 9, 10, 11', message)
+        self.assertIn('yPosition out of bounds at rows 3, 7, 11', message)
+
+    def test_lengths(self):
+        """Columns must have the same length."""
+        with self.assertRaises(ValueError):
+            layout.TabColumns(documentId=1, pageNumber=[1, 2],
+                              xPosition=[1, 2, 3])
+        with self.assertRaises(ValueError):
+            layout.TabColumns(documentId=1, tabType='textTabs')
+
+    def test_assign(self):
+        """Tabs are dispatched to signers by recipientId."""
+        columns = self.grid(pages=2, recipientId=[1, 2] * 4)
+        signers = [models.Signer(recipientId=1), models.Signer(recipientId=2)]
+        columns.assign(signers)
+        for signer in signers:
+            self.assertEqual(len(signer.tabs), 1)
+            self.assertEqual(list(signer.tabs[0].recipientIds),
+                             [signer.recipientId] * 4)
+        with self.assertRaises(ValueError):
+            columns.assign(signers[:1])
+
+
+class FileDocumentTestCase(unittest.TestCase):
+    """Tests around :class:`pydocusign.models.FileDocument`."""
+    def setUp(self):
+        self.path = os.path.join(pydocusign.test.fixtures_dir(), 'test.pdf')
+        self.document = models.FileDocument(self.path, documentId=1)
+        self.addCleanup(self.document.close)
+        with open(self.path, 'rb') as pdf_file:
+            self.content = pdf_file.read()
+
+    def test_attributes(self):
+        """Size and digest are known without reading the file."""
+        self.assertEqual(self.document.name, 'test.pdf')
+        self.assertEqual(self.document.size, len(self.content))
+        self.assertEqual(self.document.sha256,
+                         hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(registry.document_digest(self.document),
+                         self.document.sha256)
+
+    def test_stream(self):
+        """Streamed request holds the memory map, and same bytes as body."""
+        client = pydocusign.DocuSignClient(
+            root_url='http://example.com',
+            account_id='some-uuid',
+            oauth2_token='some-oauth2-token')
+        envelope = pydocusign.Envelope(documents=[self.document])
+        parts = client._create_envelope_from_document_request(envelope)
+        self.assertIn(self.content, parts['body'])
+        streamed = client._create_envelope_from_document_request(
+            envelope, stream=True)
+        self.assertTrue(any(chunk is self.document.data
+                            for chunk in streamed['body']))
+        reader = _ChunksReader(streamed['body'])
+        self.assertEqual(reader.size, streamed['headers']['Content-Length'])
+        self.assertEqual(reader.size, parts['headers']['Content-Length'])
+        chunks = []
+        while True:
+            chunk = reader.read(1000)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        self.assertEqual(b''.join(chunks), parts['body'])
+
+    def test_pickle(self):
+        """File is mapped again when unpickled."""
+        document = pickle.loads(pickle.dumps(self.document))
+        self.addCleanup(document.close)
+        self.assertEqual(document.documentId, 1)
+        self.assertEqual(document.data[:], self.content)
+
+
+class ValidationTestCase(unittest.TestCase):
+    """Tests around :mod:`pydocusign.validation`."""
+    def envelope(self, **kwargs):
+        """Return valid envelope, updated with ``kwargs``."""
+        data = {
+            'emailSubject': 'Subject',
+            'documents': [
+                pydocusign.Document(documentId=1, name='one.pdf',
+                                    data=BytesIO(b'%PDF')),
+                pydocusign.Document(documentId=2, name='two.pdf',
+                                    data=BytesIO(b'%PDF'))],
+            'signers': [pydocusign.Signer(
+                name='Signer', email='signer@example.com', recipientId=1,
+                routingOrder=1,
+                tabs=[pydocusign.SignHereTab(documentId=1),
+                      pydocusign.NoteTab(documentId=2, tabLabel='note')])],
+            'carbonCopyRecipients': [pydocusign.CarbonCopyRecipient(
+                name='Copy', email='copy@example.com', recipientId=2)],
+        }
+        data.update(kwargs)
+        return pydocusign.Envelope(**data)
+
+    def test_valid(self):
+        """Valid envelopes have no errors."""
+        self.assertEqual(validation.validate_envelope(self.envelope()), [])
+        self.assertEqual(validation.validate_envelope(pydocusign.Envelope(
+            emailSubject='Subject', templateId='template-id',
+            templateRoles=[pydocusign.Role(name='Name', email='a@example.com',
+                                           roleName='Signer')])), [])
+        # Template envelopes may use subject of template.
+        self.assertEqual(validation.validate_envelope(pydocusign.Envelope(
+            templateId='template-id',
+            templateRoles=[pydocusign.Role(name='Name', email='a@example.com',
+                                           roleName='Signer')])), [])
+
+    def test_errors(self):
+        """Errors of the whole graph are reported at once."""
+        envelope = self.envelope(emailSubject='')
+        envelope.documents[1].documentId = 1
+        signer = envelope.signers[0]
+        signer.email = ''
+        signer.routingOrder = 1000
+        signer.tabs.append(pydocusign.SignHereTab(documentId=3, pageNumber=0))
+        signer.tabs.append(layout.TabColumns(documentId=[1, 4],
+                                             yPosition=[10, -10]))
+        envelope.carbonCopyRecipients[0].recipientId = 1
+        self.assertEqual(validation.validate_envelope(envelope), [
+            'emailSubject: required to send envelope',
+            'documents[1].documentId: duplicate 1',
+            'signers[0].email: required',
+            'signers[0].routingOrder: must be an integer in 0..999',
+            'signers[0].tabs[1].documentId: unknown document 2',
+            'signers[0].tabs[2].documentId: unknown document 3',
+            'signers[0].tabs[2].pageNumber: must be 1 or more',
+            'signers[0].tabs[3].documentId: unknown document 4',
+            'signers[0].tabs[3]: yPosition out of bounds at rows 1',
+            'carbonCopyRecipients[0].recipientId: duplicate 1',
+        ])
+
+    def test_client(self):
+        """Client validates envelopes before upload, if enabled."""
+        client = pydocusign.DocuSignClient(
+            root_url='http://example.com',
+            account_id='some-uuid',
+            oauth2_token='some-oauth2-token',
+            validate_envelopes=True)
+        client._create_envelope = mock.Mock(return_value='envelope-id')
+        envelope = self.envelope()
+        self.assertEqual(client.create_envelope_from_document(envelope),
+                         'envelope-id')
+        envelope.signers[0].recipientId = None
+        with self.assertRaises(pydocusign.exceptions.DocuSignValidationError) \
+                as context:
+            client.create_envelope_from_document(envelope)
+        self.assertEqual(context.exception.errors,
+                         ['signers[0].recipientId: required'])
+        self.assertEqual(client._create_envelope.call_count, 1)
+
+
+class DocumentRegistryTestCase(unittest.TestCase):
+    """Tests around :class:`pydocusign.registry.DocumentRegistry`."""
+    def setUp(self):
+        self.registry = pydocusign.DocumentRegistry(threshold=2)
+        self.client = pydocusign.DocuSignClient(
+            root_url='http://example.com',
+            account_id='some-uuid',
+            oauth2_token='some-oauth2-token',
+            document_registry=self.registry)
+        self.client.create_template_from_document = mock.Mock(
+            return_value='template-id')
+
+    def envelope(self, specific=b'specific'):
+        """Return envelope with a shared and a specific document."""
+        return pydocusign.Envelope(
+            documents=[
+                pydocusign.Document(documentId=1, name='shared.pdf',
+                                    data=BytesIO(b'shared' * 1000)),
+                pydocusign.Document(documentId=2, name='specific.pdf',
+                                    data=BytesIO(specific)),
+            ],
+            signers=[pydocusign.Signer(
+                name='Signer', recipientId=1,
+                tabs=[pydocusign.SignHereTab(documentId=1, pageNumber=3),
+                      pydocusign.SignHereTab(documentId=2)])])
+
+    def json_part(self, body):
+        """Return JSON part of multipart body."""
+        body = body.decode('latin-1')
+        start = body.index('{')
+        return json.loads(body[start:body.index('\r\n--myboundary', start)])
+
+    def test_shared_document(self):
+        """Documents seen ``threshold`` times are referenced as templates."""
+        first = self.client._create_envelope_from_document_request(
+            self.envelope())
+        self.assertIn(b'shared' * 1000, first['body'])
+        self.assertIn('documents', self.json_part(first['body']))
+        self.assertFalse(self.client.create_template_from_document.called)
+
+        for specific in [b'other', b'another']:
+            parts = self.client._create_envelope_from_document_request(
+                self.envelope(specific))
+            self.assertNotIn(b'shared' * 1000, parts['body'])
+            self.assertIn(specific, parts['body'])
+        self.client.create_template_from_document.assert_called_once_with(
+            mock.ANY, mock.ANY)
+
+        data = self.json_part(parts['body'])
+        self.assertNotIn('documents', data)
+        self.assertNotIn('recipients', data)
+        shared, specific = data['compositeTemplates']
+        self.assertEqual(shared['serverTemplates'][0]['templateId'],
+                         'template-id')
+        tabs = shared['inlineTemplates'][0]['recipients']['signers'][0]['tabs']
+        self.assertEqual(tabs['signHereTabs'],
+                         [{'documentId': '1', 'pageNumber': 3,
+                           'xPosition': 0, 'yPosition': 0}])
+        self.assertEqual(specific['document'],
+                         {'documentId': 2, 'name': 'specific.pdf'})
+        tabs = specific['inlineTemplates'][0]['recipients']['signers'][0][
+            'tabs']
+        self.assertEqual([tab['documentId'] for tab in tabs['signHereTabs']],
+                         [2])
+
+    def test_concurrent_creation(self):
+        """Template creation does not block other documents, and callers
+        for the same document wait for it."""
+        released = threading.Event()
+        uploading = threading.Event()
+
+        def create_template(document, name):
+            uploading.set()
+            released.wait()
+            return 'template-id'
+        self.client.create_template_from_document = mock.Mock(
+            side_effect=create_template)
+        self.registry.threshold = 1
+        shared = pydocusign.Document(data=BytesIO(b'shared'))
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            self.registry.template_id(self.client, shared)))
+            for index in range(3)]
+        threads[0].start()
+        uploading.wait()
+        for thread in threads[1:]:
+            thread.start()
+        # Registry is not locked during upload.
+        other = pydocusign.Document(data=BytesIO(b'other'))
+        self.registry.threshold = 2
+        self.assertIsNone(self.registry.template_id(self.client, other))
+        self.assertEqual(results, [])
+        released.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['template-id'] * 3)
+        self.assertEqual(
+            self.client.create_template_from_document.call_count, 1)
+
+    def test_creation_failure(self):
+        """Failed creation is retried by next caller."""
+        self.registry.threshold = 1
+        shared = pydocusign.Document(data=BytesIO(b'shared'))
+        self.client.create_template_from_document.side_effect = \
+            pydocusign.exceptions.DocuSignException('Fake error')
+        with self.assertRaises(pydocusign.exceptions.DocuSignException):
+            self.registry.template_id(self.client, shared)
+        self.client.create_template_from_document.side_effect = None
+        self.assertEqual(self.registry.template_id(self.client, shared),
+                         'template-id')
+
+    def test_create_template_from_document(self):
+        """Templates are created with document as multipart upload."""
+        client = pydocusign.DocuSignClient(
+            root_url='http://example.com',
+            account_id='some-uuid',
+            oauth2_token='some-oauth2-token')
+        client.post = mock.Mock(return_value={'templateId': 'new-id'})
+        document = pydocusign.Document(documentId=4, name='doc.pdf',
+                                       data=BytesIO(b'%PDF content'))
+        self.assertEqual(
+            client.create_template_from_document(document, 'name'), 'new-id')
+        args, kwargs = client.post.call_args
+        self.assertEqual(args, ('/accounts/some-uuid/templates',))
+        self.assertIn(b'%PDF content', kwargs['file_data'])
+        self.assertIn(b'documentId=1 ', kwargs['file_data'])
+        self.assertEqual(self.json_part(kwargs['file_data']), {
+            'envelopeTemplateDefinition': {'name': 'name'},
+            'documents': [{'documentId': '1', 'name': 'doc.pdf'}]})
+
+
+class BulkSendTestCase(unittest.TestCase):
+    """Tests around bulk send lists."""
+    def setUp(self):
+        self.client = pydocusign.DocuSignClient(
+            root_url='http://example.com',
+            account_id='some-uuid',
+            oauth2_token='some-oauth2-token')
+
+    def test_bulk_send(self):
+        """Copies are uploaded in lists of ``chunk_size`` copies."""
+        lists = []
+
+        def fake_post(url, data, expected_status_code):
+            if url.endswith('/bulk_send_lists'):
+                lists.append(data)
+                return {'listId': 'list-{0}'.format(len(lists))}
+            return {'batchId': 'batch-{0}'.format(data['listId'])}
+        self.client.post = mock.Mock(side_effect=fake_post)
+        copies = (pydocusign.Role(name='Name {0}'.format(index),
+                                  email='{0}@example.com'.format(index),
+                                  roleName='Signer')
+                  for index in range(5))
+        batch_ids = self.client.bulk_send('template-id', copies,
+                                          name='mailing', chunk_size=2)
+        self.assertEqual(batch_ids,
+                         ['batch-list-1', 'batch-list-2', 'batch-list-3'])
+        self.assertEqual([data['name'] for data in lists],
+                         ['mailing-1', 'mailing-2', 'mailing-3'])
+        self.assertEqual([len(data['bulkCopies']) for data in lists],
+                         [2, 2, 1])
+        recipient = lists[2]['bulkCopies'][0]['recipients'][0]
+        self.assertEqual(recipient['name'], 'Name 4')
+        self.assertEqual(recipient['roleName'], 'Signer')
+        self.assertEqual(
+            self.client.post.call_args[1]['data'],
+            {'listId': 'list-3', 'envelopeOrTemplateId': 'template-id'})
+
+    def test_read_roles_csv(self):
+        """CSV rows are read as roles."""
+        csv_file = StringIO(u'name,email,clientUserId,extra\n'
+                            u'A,a@example.com,,x\n'
+                            u'B,b@example.com,b-id,y\n')
+        roles = list(bulk.read_roles_csv(csv_file, roleName='Signer'))
+        self.assertEqual([role.name for role in roles], ['A', 'B'])
+        self.assertEqual([role.clientUserId for role in roles],
+                         [None, 'b-id'])
+        self.assertEqual([role.roleName for role in roles],
+                         ['Signer', 'Signer'])
+
+    def test_wait_batches(self):
+        """Batches are polled until nothing is queued."""
+        responses = {
+            'batch-1': [{'batchSize': '2', 'queued': '1', 'sent': '1'},
+                        {'batchSize': '2', 'queued': '0', 'sent': '1',
+                         'failed': '1'}],
+            'batch-2': [{'batchSize': '1', 'queued': '0', 'sent': '1'}],
+        }
+        self.client.get_bulk_send_batch = mock.Mock(
+            side_effect=lambda batch_id: responses[batch_id].pop(0))
+        sleep = mock.Mock()
+        statuses = bulk.wait_batches(self.client, ['batch-1', 'batch-2'],
+                                     interval=5, sleep=sleep)
+        self.assertEqual(statuses['batch-1']['failed'], '1')
+        self.assertEqual(self.client.get_bulk_send_batch.call_count, 3)
+        sleep.assert_called_once_with(5)
+
+    def test_wait_batches_timeout(self):
+        """Polling stops after ``timeout``."""
+        self.client.get_bulk_send_batch = mock.Mock(
+            return_value={'batchSize': '1', 'queued': '1'})
+        with self.assertRaises(pydocusign.exceptions.DocuSignException):
+            bulk.wait_batches(self.client, ['batch-1'], interval=5,
+                              timeout=12, sleep=mock.Mock(),
+                              clock=mock.Mock(side_effect=[0, 0, 5, 10]))
+
+
+class EnvelopeStampTestCase(unittest.TestCase):
+    """Tests around :mod:`pydocusign.stamp`."""
+    def setUp(self):
+        self.client = pydocusign.DocuSignClient(
+            root_url='http://example.com',
+            account_id='some-uuid',
+            oauth2_token='some-oauth2-token')
+
+    def envelope(self, name, email, client_user_id, x_position, pdf_file):
+        """Return envelope with variable values."""
+        return pydocusign.Envelope(
+            emailSubject='Subject',
+            documents=[pydocusign.Document(name='document.pdf', documentId=1,
+                                           data=pdf_file)],
+            signers=[pydocusign.Signer(
+                name=name, email=email, clientUserId=client_user_id,
+                recipientId=1,
+                tabs=[pydocusign.SignHereTab(documentId=1, pageNumber=1,
+                                             xPosition=x_position,
+                                             yPosition=100)])],
+            eventNotification=pydocusign.EventNotification(url='fake'))
+
+    def test_document_request(self):
+        """Stamp renders the same request as an actual envelope."""
+        values = {'name': u'J\xfcrgen "quoted"', 'email': 'j@example.com',
+                  'client': 'user-1', 'x': 120}
+        with open(os.path.join(pydocusign.test.fixtures_dir(), 'test.pdf'),
+                  'rb') as pdf_file:
+            stamp = self.client.envelope_stamp(self.envelope(
+                pydocusign.StampField('name'), pydocusign.StampField('email'),
+                pydocusign.StampField('client'), pydocusign.StampField('x'),
+                pdf_file))
+            expected = self.client._create_envelope_from_document_request(
+                self.envelope(values['name'], values['email'],
+                              values['client'], values['x'], pdf_file))
+        self.assertEqual(sorted(stamp.fields), ['client', 'email', 'name', 'x'])
+        parts = stamp.request_parts(values)
+        self.assertEqual(parts['url'], expected['url'])
+        self.assertEqual(parts['headers'], expected['headers'])
+        self.assertEqual(parts['body'], expected['body'])
+
+    def test_template_request(self):
+        """Stamps of template envelopes fill template roles."""
+        envelope = pydocusign.Envelope(
+            templateId='template-id',
+            templateRoles=[pydocusign.Role(
+                name=pydocusign.StampField('name'), roleName='Signer',
+                email=pydocusign.StampField('email'))])
+        stamp = self.client.envelope_stamp(envelope)
+        parts = stamp.request_parts({'name': 'Name', 'email': None})
+        body = parts['body'].decode('utf-8')
+        data = json.loads(body[body.index('{'):body.rindex('}') + 1])
+        self.assertEqual(data['templateRoles'][0]['name'], 'Name')
+        self.assertEqual(data['templateRoles'][0]['email'], None)
+        self.assertEqual(parts['headers']['Content-Length'],
+                         len(parts['body']))
+
+    def test_missing_value(self):
+        """Rendering without value of a field raises KeyError."""
+        stamp = pydocusign.EnvelopeStamp.from_json(
+            pydocusign.Signer(name=pydocusign.StampField('name')))
+        with self.assertRaises(KeyError):
+            stamp.render({})
+
+    def test_field_name(self):
+        """Field names are identifiers."""
+        self.assertEqual(pydocusign.StampField('first_name').name,
+                         'first_name')
+        with self.assertRaises(ValueError):
+            pydocusign.StampField('first name')
+
+
+class ModelSlotsTestCase(unittest.TestCase):
+    """Tests around ``__slots__`` of models."""
+    def test_no_dict(self):
+        """Model instances have no ``__dict__``."""
+        instances = [
+            pydocusign.SignHereTab(documentId=1),
+            pydocusign.NoteTab(documentId=1),
+            pydocusign.Signer(),
+            pydocusign.CarbonCopyRecipient(),
+            pydocusign.CertifiedDeliveryRecipient(),
+            pydocusign.Role(),
+            pydocusign.Document(),
+            pydocusign.EventNotification(),
+            pydocusign.Envelope(),
+        ]
+        for instance in instances:
+            self.assertFalse(hasattr(instance, '__dict__'), instance)
+
+    def test_advanced_tab_schema(self):
+        """``attributes`` of advanced tabs remains a class-level schema."""
+        tab = pydocusign.NoteTab(documentId=1, height=10)
+        self.assertEqual(pydocusign.NoteTab.attributes,
+                         ['documentId', 'pageNumber', 'xPosition',
+                          'yPosition', 'height', 'width'])
+        self.assertIs(tab.attributes, pydocusign.NoteTab.attributes)
+        self.assertEqual(tab.to_dict()['height'], 10)
+        self.assertRaises(AttributeError, getattr, tab, 'unknown')
+
+    def test_advanced_tab_options(self):
+        """Options of advanced tabs can be assigned as attributes."""
+        tab = pydocusign.NoteTab(documentId=1)
+        tab.height = 40
+        tab.tabLabel = 'note'
+        self.assertEqual(tab.values['height'], 40)
+        self.assertEqual(tab.to_dict()['tabLabel'], 'note')
+        with pydocusign.cached_dicts():
+            self.assertEqual(tab.to_dict()['height'], 40)
+            tab.height = 50
+            self.assertEqual(tab.to_dict()['height'], 50)
+
+    def test_pickle(self):
+        """Slotted models can be pickled and copied."""
+        signer = pydocusign.Signer(
+            name='Signer', tabs=[pydocusign.SignHereTab(documentId=1),
+                                 pydocusign.NoteTab(documentId=1)])
+        envelope = pydocusign.Envelope(signers=[signer])
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            loaded = pickle.loads(pickle.dumps(envelope, protocol))
+            self.assertEqual(loaded.to_dict(), envelope.to_dict())
+        self.assertEqual(copy.deepcopy(envelope).to_dict(),
+                         envelope.to_dict())
+
+
+class ModelDictCacheTestCase(unittest.TestCase):
+    """Tests around cached ``to_dict()`` of models."""
+    def setUp(self):
+        self.tabs = [pydocusign.SignHereTab(documentId=1, pageNumber=page)
+                     for page in range(1, 4)]
+        self.signers = [
+            pydocusign.Signer(clientUserId='client-1', tabs=self.tabs[:2]),
+            pydocusign.Signer(clientUserId='client-2', tabs=self.tabs[2:]),
+        ]
+        self.envelope = pydocusign.Envelope(
+            documents=[pydocusign.Document(documentId=1, name='test.pdf')],
+            signers=self.signers)
+        caching = pydocusign.cached_dicts()
+        caching.__enter__()
+        self.addCleanup(caching.__exit__, None, None, None)
+
+    def test_opt_in(self):
+        """Dicts are cached within ``cached_dicts()`` only."""
+        data = self.envelope.to_dict()
+        self.assertIs(self.envelope.to_dict(), data)
+        with pydocusign.cached_dicts():  # Nested: caches are kept.
+            self.assertIs(self.envelope.to_dict(), data)
+        self.assertIs(self.envelope.to_dict(), data)
+        self.doCleanups()
+        self.assertIsNone(getattr(self.envelope, '_dict_cache', None))
+        self.assertIsNone(getattr(self.tabs[0], '_dict_cache', None))
+        self.assertIsNot(self.envelope.to_dict(), self.envelope.to_dict())
+        self.assertIsNone(getattr(self.envelope, '_dict_cache', None))
+
+    def test_cached(self):
+        """Unchanged models return the same dict."""
+        data = self.envelope.to_dict()
+        self.assertIs(self.envelope.to_dict(), data)
+        self.assertIs(self.signers[0].to_dict(),
+                      data['recipients']['signers'][0])
+
+    def test_attribute_change(self):
+        """Changed subtrees are rebuilt, others are reused."""
+        data = self.envelope.to_dict()
+        self.tabs[2].pageNumber = 10
+        new_data = self.envelope.to_dict()
+        self.assertIsNot(new_data, data)
+        signers = new_data['recipients']['signers']
+        self.assertEqual(signers[1]['tabs']['signHereTabs'][0]['pageNumber'],
+                         10)
+        self.assertIs(signers[0], data['recipients']['signers'][0])
+        self.envelope.emailSubject = 'Subject'
+        self.assertEqual(self.envelope.to_dict()['emailSubject'], 'Subject')
+
+    def test_list_change(self):
+        """Adding or removing children rebuilds parents."""
+        data = self.envelope.to_dict()
+        self.signers[0].tabs.append(pydocusign.ApproveTab(documentId=1))
+        self.assertIn('approveTabs',
+                      self.envelope.to_dict()['recipients']['signers'][0][
+                          'tabs'])
+        self.signers.pop()
+        self.assertEqual(
+            len(self.envelope.to_dict()['recipients']['signers']), 1)
+        self.assertEqual(len(data['recipients']['signers']), 2)
+
+    def test_invalidate(self):
+        """In-place changes of non-model values need ``invalidate()``."""
+        tab = pydocusign.NoteTab(documentId=1)
+        self.signers[0].tabs.append(tab)
+        self.envelope.to_dict()
+        tab.values['height'] = 50
+        self.assertEqual(tab.to_dict()['height'], 33)
+        tab.invalidate()
+        self.assertEqual(
+            self.envelope.to_dict()['recipients']['signers'][0]['tabs'][
+                'noteTabs'][0]['height'],
+            50)
+
 
 class DocuSignCallbackParserTestCase(unittest.TestCase):
     """Tests around DocuSign callback content parsers.
@@ -297,6 +1258,762 @@ class DocuSignCallbackParserTestCase(unittest.TestCase):
         )
 
 
+class CallbackGeneratorTestCase(unittest.TestCase):
+    """Tests around local callback generation in :mod:`pydocusign.test`."""
+    def test_local_body(self):
+        """Bundled template is rendered without network."""
+        with mock.patch('requests.post') as post:
+            body = pydocusign.test.generate_notification_callback_body(
+                {'EnvelopeId': 'some-uuid', 'AccountName': 'Bob & Co'})
+        self.assertFalse(post.called)
+        parser = pydocusign.DocuSignCallbackParser(body)
+        self.assertEqual(parser.envelope_id, 'some-uuid')
+        self.assertEqual(parser.custom_fields['AccountName'], 'Bob & Co')
+
+    def test_corpus(self):
+        """Synthetic callbacks are parsed, and reproducible with seed."""
+        corpus = list(pydocusign.test.generate_callback_corpus(
+            20, seed=42, recipients=(1, 5), statuses=['Sent', 'Completed']))
+        self.assertEqual(
+            corpus, list(pydocusign.test.generate_callback_corpus(
+                20, seed=42, recipients=(1, 5),
+                statuses=['Sent', 'Completed'])))
+        for body in corpus:
+            parser = pydocusign.DocuSignCallbackParser(body)
+            self.assertIn(len(parser.recipients), range(1, 6))
+            self.assertIn(parser.envelope_status,
+                          ['Sent', 'Delivered', 'Completed'])
+            for recipient in parser.recipients.values():
+                self.assertIn(recipient['Status'], ['Sent', 'Completed'])
+
+    def test_documents(self):
+        """Synthetic callbacks include documents of ``document_size``."""
+        body = next(pydocusign.test.generate_callback_corpus(
+            1, document_size=5000, documents=2))
+        document_dir = tempfile.mkdtemp()
+        try:
+            parser = pydocusign.DocuSignCallbackParser(
+                body, document_dir=document_dir)
+            self.assertEqual([document.size for document in parser.documents],
+                             [5000, 5000])
+        finally:
+            shutil.rmtree(document_dir)
+
+
+class ReplayCallbacksTestCase(unittest.TestCase):
+    """Tests around :func:`pydocusign.test.replay_callbacks`."""
+    def setUp(self):
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        self.receiver = pydocusign.CallbackReceiver(queue_size=1000)
+        self.server = make_server('127.0.0.1', 0, self.receiver,
+                                  handler_class=QuietHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{0}/'.format(self.server.server_port)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_replay(self):
+        """Corpus is posted concurrently, latencies are reported."""
+        corpus = pydocusign.test.generate_callback_corpus(20, seed=1)
+        report = pydocusign.test.replay_callbacks(self.url, corpus,
+                                                  concurrency=4)
+        self.assertEqual(report.count, 20)
+        self.assertEqual(report.statuses, {200: 20})
+        self.assertEqual(report.error_rate, 0.0)
+        self.assertEqual(self.receiver.metrics['accepted'], 20)
+        summary = report.summary()
+        self.assertTrue(0 < summary['p50'] <= summary['p99'] <=
+                        summary['max'])
+
+    def test_rate(self):
+        """Requests are scheduled at ``rate``, errors are counted."""
+        bodies = ['not a callback'] * 5
+        report = pydocusign.test.replay_callbacks(self.url, bodies,
+                                                  concurrency=2, rate=50)
+        self.assertGreaterEqual(report.duration, 4 / 50.0)
+        self.assertEqual(report.statuses, {400: 5})
+        self.assertEqual(report.error_rate, 1.0)
+
+    def test_connection_errors(self):
+        """Requests without response are errors."""
+        self.tearDown()
+        report = pydocusign.test.replay_callbacks(self.url, ['body'] * 3,
+                                                  concurrency=1, timeout=1)
+        self.assertEqual(report.statuses, {None: 3})
+        self.setUp()
+
+
+class CallbackDataExtractionTestCase(unittest.TestCase):
+    """Tests around :func:`pydocusign.parser.extract_callback_data`."""
+    xml = b"""<?xml version="1.0" encoding="utf-8"?>
+<DocuSignEnvelopeInformation xmlns="http://www.docusign.net/API/3.0">
+  <EnvelopeStatus>
+    <RecipientStatuses>
+      <RecipientStatus>
+        <Status>Delivered</Status>
+        <RoutingOrder>1</RoutingOrder>
+        <Sent>2014-10-06T01:10:01.0</Sent>
+        <ClientUserId>id-john-doe</ClientUserId>
+        <CustomFields />
+        <RecipientId>rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr</RecipientId>
+      </RecipientStatus>
+    </RecipientStatuses>
+    <EnvelopeID>eeeeeeee-eeee-eeee-eeee-eeeeeeeeeeee</EnvelopeID>
+    <Status>Sent</Status>
+    <CustomFields>
+      <CustomField>
+        <Name>AccountId</Name>
+        <Value>123456</Value>
+      </CustomField>
+    </CustomFields>
+  </EnvelopeStatus>
+  <DocumentPDFs>
+    <DocumentPDF>
+      <Name>test.pdf</Name>
+      <PDFBytes>JVBERi0xLjQK</PDFBytes>
+      <Status>Ignored</Status>
+    </DocumentPDF>
+  </DocumentPDFs>
+  <TimeZoneOffset>-7</TimeZoneOffset>
+</DocuSignEnvelopeInformation>"""
+
+    #: "Billion laughs": nested entities expand exponentially.
+    entity_expansion_xml = (
+        b'<?xml version="1.0"?>\n<!DOCTYPE lolz [\n'
+        b'<!ENTITY lol0 "lol">\n' +
+        b''.join(
+            b'<!ENTITY lol' + str(level).encode('ascii') + b' "' +
+            (b'&lol' + str(level - 1).encode('ascii') + b';') * 10 + b'">\n'
+            for level in range(1, 10)) +
+        b']>\n<DocuSignEnvelopeInformation><EnvelopeStatus>'
+        b'<EnvelopeID>&lol9;</EnvelopeID>'
+        b'</EnvelopeStatus></DocuSignEnvelopeInformation>')
+
+    @staticmethod
+    def external_entity_xml(path):
+        """Return XML which includes file ``path`` as envelope ID (XXE)."""
+        return (
+            b'<?xml version="1.0"?>\n'
+            b'<!DOCTYPE d [<!ENTITY x SYSTEM "file://' +
+            path.encode('utf-8') + b'">]>\n'
+            b'<DocuSignEnvelopeInformation><EnvelopeStatus>'
+            b'<EnvelopeID>&x;</EnvelopeID>'
+            b'</EnvelopeStatus></DocuSignEnvelopeInformation>')
+
+    def test_extract(self):
+        """Namespaced XML is read, documents are ignored."""
+        data = extract_callback_data(BytesIO(self.xml))
+        self.assertEqual(data.envelope, {
+            'EnvelopeID': 'eeeeeeee-eeee-eeee-eeee-eeeeeeeeeeee',
+            'Status': 'Sent',
+        })
+        self.assertEqual(data.recipients, [{
+            'Status': 'Delivered',
+            'RoutingOrder': '1',
+            'Sent': '2014-10-06T01:10:01.0',
+            'ClientUserId': 'id-john-doe',
+            'RecipientId': 'rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr',
+        }])
+        self.assertEqual(data.custom_fields, {'AccountId': '123456'})
+        self.assertEqual(data.timezone_offset, '-7')
+        self.assertEqual(data.documents, [])
+
+    def test_entity_expansion(self):
+        """Entities are not expanded: DOCTYPE is rejected."""
+        start = time.time()
+        with self.assertRaises(ValueError):
+            pydocusign.DocuSignCallbackParser(self.entity_expansion_xml)
+        self.assertLess(time.time() - start, 1)
+
+    def test_external_entity(self):
+        """External entities are not loaded: DOCTYPE is rejected."""
+        with tempfile.NamedTemporaryFile() as secret:
+            secret.write(b'secret-content')
+            secret.flush()
+            with self.assertRaises(ValueError) as context:
+                pydocusign.DocuSignCallbackParser(
+                    self.external_entity_xml(secret.name))
+            self.assertNotIn('secret-content', str(context.exception))
+
+    def test_document_dir(self):
+        """Documents are decoded into files of ``document_dir``."""
+        content = b'%PDF-1.4\n' + os.urandom(200000)
+        xml = self.xml.replace(
+            b'JVBERi0xLjQK', base64.encodestring(content))  # With newlines.
+        document_dir = tempfile.mkdtemp()
+        try:
+            parser = pydocusign.DocuSignCallbackParser(
+                xml, document_dir=document_dir)
+            self.assertEqual(len(parser.documents), 1)
+            document = parser.documents[0]
+            self.assertEqual(document.name, 'test.pdf')
+            self.assertEqual(document.size, len(content))
+            self.assertEqual(document.sha256,
+                             hashlib.sha256(content).hexdigest())
+            self.assertEqual(os.path.dirname(document.path), document_dir)
+            with open(document.path, 'rb') as document_file:
+                self.assertEqual(document_file.read(), content)
+        finally:
+            shutil.rmtree(document_dir)
+
+    def test_document_dir_cleanup(self):
+        """Files of broken callbacks are removed from ``document_dir``."""
+        broken = [
+            (self.xml.replace(b'JVBERi0xLjQK', b'JVBERi0xLjQ'), ValueError),
+            (self.xml[:self.xml.index(b'JVBERi0xLjQK') + 8],
+             etree.XMLSyntaxError),
+        ]
+        document_dir = tempfile.mkdtemp()
+        try:
+            for xml, exception in broken:
+                with self.assertRaises(exception):
+                    pydocusign.DocuSignCallbackParser(
+                        xml, document_dir=document_dir)
+                self.assertEqual(os.listdir(document_dir), [])
+        finally:
+            shutil.rmtree(document_dir)
+
+    def test_document_sink(self):
+        """Documents are decoded into files returned by ``document_sink``."""
+        outputs = []
+
+        def document_sink():
+            outputs.append(BytesIO())
+            return outputs[-1]
+
+        parser = pydocusign.DocuSignCallbackParser(
+            BytesIO(self.xml), document_sink=document_sink)
+        self.assertEqual(outputs[0].getvalue(), b'%PDF-1.4\n')
+        self.assertEqual(parser.documents[0].size, 9)
+        self.assertEqual(parser.documents[0].path, None)
+
+    def test_parser(self):
+        """DocuSignCallbackParser reads the extracted data."""
+        parser = pydocusign.DocuSignCallbackParser(self.xml)
+        self.assertEqual(parser.envelope_status, models.ENVELOPE_STATUS_SENT)
+        self.assertEqual(parser.recipients['id-john-doe']['Status'],
+                         models.RECIPIENT_STATUS_DELIVERED)
+        self.assertEqual(parser.custom_fields, {'AccountId': '123456'})
+        self.assertEqual(len(parser.events), 1)
+
+
+class DocuSignCallbackParserIndexTestCase(unittest.TestCase):
+    """Tests around indexes and memoization in DocuSignCallbackParser."""
+    def setUp(self):
+        self.xml = self.callback_xml(150)
+
+    @staticmethod
+    def callback_xml(count):
+        """Return callback XML with ``count`` recipients."""
+        recipients = ''.join(
+            """<RecipientStatus>
+                 <RoutingOrder>{index}</RoutingOrder>
+                 <Sent>2014-10-06T01:10:01.{index}</Sent>
+                 <Delivered>2014-10-07T01:10:01.{index}</Delivered>
+                 <ClientUserId>client-{index}</ClientUserId>
+                 <RecipientId>recipient-{index}</RecipientId>
+               </RecipientStatus>""".format(index=index)
+            for index in range(1, count + 1))
+        return """<DocuSignEnvelopeInformation>
+          <EnvelopeStatus>
+            <RecipientStatuses>{recipients}</RecipientStatuses>
+            <Status>Sent</Status>
+            <Sent>2014-10-06T01:10:00.0</Sent>
+          </EnvelopeStatus>
+          <TimeZoneOffset>-7</TimeZoneOffset>
+        </DocuSignEnvelopeInformation>""".format(recipients=recipients)
+
+    def test_recipients(self):
+        """Recipients are indexed by ClientUserId and RecipientId."""
+        parser = pydocusign.DocuSignCallbackParser(self.xml)
+        self.assertEqual(len(parser.recipients), 150)
+        self.assertEqual(len(parser.recipient_events), 300)
+        self.assertEqual(len(parser.events), 301)
+        self.assertEqual(
+            parser.recipient_status_datetime('client-42', 'Delivered'),
+            parser.recipient_status_datetime('recipient-42', 'Delivered'))
+        self.assertEqual(
+            parser.recipient_status_datetime('client-42', 'Delivered'),
+            datetime(2014, 10, 7, 1, 10, 1, 420000,
+                     tzinfo=tzoffset(None, -25200)))
+        self.assertIsNone(
+            parser.recipient_status_datetime('unknown', 'Delivered'))
+
+    def test_memoization(self):
+        """Properties are computed once."""
+        parser = pydocusign.DocuSignCallbackParser(self.xml)
+        for name in ['envelope_status', 'envelope_events',
+                     'recipient_events', 'events', 'custom_fields']:
+            self.assertIs(getattr(parser, name), getattr(parser, name))
+
+    def test_recipients_copy(self):
+        """Altering ``recipients`` does not alter later reads."""
+        parser = pydocusign.DocuSignCallbackParser(self.xml)
+        recipients = parser.recipients
+        recipients['client-1']['Status'] = 'Altered'
+        del recipients['client-2']
+        self.assertEqual(len(parser.recipients), 150)
+        self.assertNotIn('Status', parser.recipients['client-1'])
+
+    def test_access_order(self):
+        """Properties have the same value whatever the access order."""
+        names = ['envelope_status', 'recipients', 'envelope_events',
+                 'recipient_events', 'events', 'custom_fields']
+        xml = self.callback_xml(3)
+        parser = pydocusign.DocuSignCallbackParser(xml)
+        expected = dict((name, getattr(parser, name)) for name in names)
+        for order in itertools.permutations(names):
+            parser = pydocusign.DocuSignCallbackParser(xml)
+            for name in order:
+                self.assertEqual(getattr(parser, name), expected[name])
+
+    def test_events_do_not_alter_other_properties(self):
+        """``events`` does not alter ``envelope_events``."""
+        parser = pydocusign.DocuSignCallbackParser(self.xml)
+        parser.events
+        self.assertNotIn('object', parser.envelope_events[0])
+
+    def test_event_records(self):
+        """``event_records`` are immutable events, merged chronologically."""
+        parser = pydocusign.DocuSignCallbackParser(self.xml)
+        records = parser.event_records
+        self.assertEqual(len(records), 301)
+        self.assertTrue(all(isinstance(event, CallbackEvent)
+                            for event in records))
+        self.assertEqual(
+            [event.datetime for event in records],
+            sorted(event.datetime for event in records))
+        self.assertEqual(records[0].object, 'envelope')
+        self.assertEqual(records[0].recipientId, None)
+        self.assertEqual([event.to_dict() for event in records],
+                         parser.events)
+        with self.assertRaises(AttributeError):
+            records[0].status = 'Voided'
+        with self.assertRaises(AttributeError):
+            records[0].extra = 'value'
+
+    def test_merge_ties(self):
+        """Envelope events come first on equal datetimes."""
+        xml = self.callback_xml(1).replace(
+            '2014-10-06T01:10:00.0', '2014-10-06T01:10:01.1')
+        parser = pydocusign.DocuSignCallbackParser(xml)
+        self.assertEqual([event.object for event in parser.event_records],
+                         ['envelope', 'recipient', 'recipient'])
+
+
+class EventColumnsTestCase(unittest.TestCase):
+    """Tests around :class:`pydocusign.export.EventColumns`."""
+    def setUp(self):
+        self.parsers = []
+        for count in (2, 3):
+            xml = DocuSignCallbackParserIndexTestCase.callback_xml(count)
+            xml = xml.replace(
+                '<Status>Sent</Status>',
+                '<Status>Sent</Status>'
+                '<EnvelopeID>envelope-{0}</EnvelopeID>'.format(count))
+            self.parsers.append(pydocusign.DocuSignCallbackParser(xml))
+
+    def test_add_parser(self):
+        """Events of parsers are dictionary-encoded in columns."""
+        columns = EventColumns()
+        for parser in self.parsers:
+            columns.add_parser(parser)
+        self.assertEqual(len(columns), 5 + 7)
+        rows = list(columns.rows())
+        self.assertEqual(rows[0], (
+            'envelope-2', 'envelope', 'Sent', None, None,
+            timestamp(self.parsers[0].event_records[0].datetime)))
+        self.assertEqual(rows[1][1:5],
+                         ('recipient', 'Sent', 'recipient-1', 'client-1'))
+        self.assertEqual(rows[-1][0], 'envelope-3')
+        # Statuses and objects are stored once.
+        self.assertEqual(columns.strings.count('Sent'), 1)
+        self.assertEqual(columns.strings.count('recipient'), 1)
+
+    def test_csv(self):
+        """Flushed CSV blocks form a single table."""
+        columns = EventColumns()
+        output = BytesIO()
+        for parser in self.parsers:
+            columns.add_parser(parser)
+            columns.flush(output)
+            self.assertEqual(len(columns), 0)
+        output.seek(0)
+        rows = list(csv.reader(output))
+        self.assertEqual(rows[0], COLUMNS)
+        self.assertEqual(len(rows), 1 + 12)
+        self.assertEqual(rows[1][:5], ['envelope-2', 'envelope', 'Sent', '',
+                                       ''])
+
+    def test_binary(self):
+        """Flushed binary blocks are read back as one table."""
+        expected = EventColumns()
+        columns = EventColumns()
+        output = BytesIO()
+        for parser in self.parsers:
+            expected.add_parser(parser)
+            columns.add_parser(parser)
+            columns.flush(output, format='binary')
+        output.seek(0)
+        loaded = EventColumns.read_binary(output)
+        self.assertEqual(list(loaded.rows()), list(expected.rows()))
+        with self.assertRaises(ValueError):
+            EventColumns.read_binary(BytesIO(b'not an export'))
+
+
+class EnvelopeStateIndexTestCase(unittest.TestCase):
+    """Tests around :class:`pydocusign.state.EnvelopeStateIndex`."""
+    def callback(self, time_generated, statuses, envelope_status='Sent'):
+        """Return parser of callback with recipients of ``statuses``."""
+        data = {
+            'EnvelopeId': 'envelope-1',
+            'Status': envelope_status,
+            'TimeGenerated': time_generated,
+            'RecipientStatuses': [
+                {'ClientUserId': 'client-{0}'.format(index), 'Status': status,
+                 'Sent': '2014-10-06T01:10:00.0'}
+                for index, status in enumerate(statuses)],
+        }
+        return pydocusign.DocuSignCallbackParser(
+            pydocusign.test.generate_notification_callback_body(data))
+
+    def test_update(self):
+        """Latest callback wins, whatever the order of arrival."""
+        index = pydocusign.EnvelopeStateIndex()
+        old = self.callback('2014-10-06T01:00:00.0', ['Sent', 'Sent'])
+        new = self.callback('2014-10-07T01:00:00.0', ['Completed', 'Sent'],
+                            envelope_status='Delivered')
+        self.assertTrue(index.update(new))
+        self.assertFalse(index.update(old))
+        self.assertFalse(index.update(new))
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.status('envelope-1'), 'Delivered')
+        self.assertEqual(index.recipient_status('envelope-1', 'client-0'),
+                         'Completed')
+        self.assertEqual(
+            [recipient.clientUserId
+             for recipient in index.pending_recipients('envelope-1')],
+            ['client-1'])
+        self.assertEqual(index.get('envelope-1').lastEvent,
+                         new.event_records[-1].datetime)
+        self.assertIsNone(index.status('unknown'))
+        self.assertEqual(index.pending_recipients('unknown'), [])
+
+    def test_envelope_state(self):
+        """State is built from raw fields: TimeGenerated is optional."""
+        parser = pydocusign.DocuSignCallbackParser(b"""
+            <DocuSignEnvelopeInformation><EnvelopeStatus>
+              <EnvelopeID>envelope-1</EnvelopeID><Status>Sent</Status>
+              <RecipientStatuses><RecipientStatus>
+                <RecipientId>1</RecipientId><Status>Sent</Status>
+              </RecipientStatus></RecipientStatuses>
+            </EnvelopeStatus></DocuSignEnvelopeInformation>""")
+        state = envelope_state(parser)
+        self.assertIsNone(state.timeGenerated)
+        self.assertEqual(list(state.recipients), ['1'])
+
+    def test_receiver_handler(self):
+        """Index is a callback receiver handler."""
+        index = pydocusign.EnvelopeStateIndex()
+        receiver = pydocusign.CallbackReceiver(handlers=[index], workers=1)
+        parser = self.callback('2014-10-06T01:00:00.0', ['Sent'])
+        receiver.process(parser.xml_source)
+        self.assertIn('envelope-1', index)
+
+    def test_persistence(self):
+        """Index is saved to and loaded from ``path``."""
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'states.pickle')
+            index = pydocusign.EnvelopeStateIndex(path)
+            index.update(self.callback('2014-10-06T01:00:00.0', ['Sent']))
+            index.save()
+            loaded = pydocusign.EnvelopeStateIndex(path)
+            self.assertEqual(loaded.get('envelope-1'),
+                             index.get('envelope-1'))
+            self.assertEqual(os.listdir(directory), ['states.pickle'])
+        finally:
+            shutil.rmtree(directory)
+
+
+class ParseDatetimeTestCase(unittest.TestCase):
+    """Tests around :func:`pydocusign.parser.parse_datetime`."""
+    def test_dateutil_compatibility(self):
+        """Fast path gives the same results as dateutil."""
+        for fraction in ['', '.1', '.12', '.123', '.1234', '.12345',
+                         '.123456', '.1234567', '.000012']:
+            for offset in [-7, 0, 2]:
+                value = '2014-10-06T01:41:40{fraction}'.format(
+                    fraction=fraction)
+                expected = dateutil.parser.parse(value).replace(
+                    tzinfo=tzoffset(None, offset * 3600))
+                result = parse_datetime(value, offset)
+                self.assertEqual(result, expected)
+                self.assertEqual(result.utcoffset(), expected.utcoffset())
+
+
+class BatchTestCase(unittest.TestCase):
+    """Tests around :mod:`pydocusign.batch`."""
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.callbacks = [
+            CallbackDataExtractionTestCase.xml.replace(
+                b'eeeeeeee-eeee-eeee-eeee-eeeeeeeeeeee',
+                'envelope-{index}'.format(index=index).encode('ascii'))
+            for index in range(10)
+        ]
+        self.callbacks.append(b'<Not a callback')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def assertRecords(self, records):
+        """Records of ``self.callbacks``, in order, are ``records``."""
+        self.assertEqual(len(records), 11)
+        for index, record in enumerate(records[:10]):
+            self.assertEqual(record['envelopeId'],
+                             'envelope-{index}'.format(index=index))
+            self.assertEqual(record['status'], 'Sent')
+            self.assertEqual(record['clientUserId'], 'id-john-doe')
+            self.assertEqual(record['datetime'],
+                             '2014-10-06T01:10:01-07:00')
+        self.assertIn('error', records[10])
+
+    def test_directory(self):
+        """Callbacks are read from directory and parsed in processes."""
+        for index, body in enumerate(self.callbacks):
+            path = os.path.join(self.tmp_dir, '{0:02d}.xml'.format(index))
+            with open(path, 'wb') as callback_file:
+                callback_file.write(body)
+        records = list(batch.parse_callbacks(
+            batch.iter_callbacks(self.tmp_dir), processes=2, chunksize=3))
+        self.assertRecords(records)
+
+    def test_tarball(self):
+        """Callbacks are read from tarball, output can be unordered."""
+        path = os.path.join(self.tmp_dir, 'callbacks.tar.gz')
+        with tarfile.open(path, 'w:gz') as tarball:
+            for index, body in enumerate(self.callbacks):
+                info = tarfile.TarInfo('{0:02d}.xml'.format(index))
+                info.size = len(body)
+                tarball.addfile(info, BytesIO(body))
+        records = list(batch.parse_callbacks(
+            batch.iter_callbacks(path), processes=2, chunksize=2,
+            ordered=False))
+        records.sort(key=lambda record: record['source'])
+        self.assertRecords(records)
+
+    def test_unordered(self):
+        """Unordered output yields chunks as soon as they are parsed."""
+        submitted = []
+
+        class Pool(object):
+            """Fake pool, where first chunk is parsed last."""
+            def __init__(self, processes):
+                pass
+
+            def apply_async(self, func, args, callback):
+                submitted.append((func, args, callback))
+                if len(submitted) > 1:
+                    callback(func(*args))
+                if len(submitted) == 4:  # Last chunk.
+                    func, args, callback = submitted[0]
+                    callback(func(*args))
+
+            def close(self):
+                pass
+            terminate = join = close
+
+        callbacks = [('{0:02d}'.format(index), body)
+                     for index, body in enumerate(self.callbacks)]
+        with mock.patch('multiprocessing.Pool', Pool):
+            records = list(batch.parse_callbacks(
+                callbacks, processes=2, chunksize=3, ordered=False))
+        self.assertEqual([record['source'] for record in records],
+                         ['03', '04', '05', '06', '07', '08', '09', '10',
+                          '00', '01', '02'])
+
+    def test_lines(self):
+        """Callbacks are read from newline-delimited archive, written as
+        JSON lines."""
+        path = os.path.join(self.tmp_dir, 'callbacks.txt')
+        with open(path, 'wb') as archive:
+            for body in self.callbacks:
+                archive.write(body.replace(b'\n', b' ') + b'\n')
+        output = os.path.join(self.tmp_dir, 'events.jsonl')
+        batch.main([path, '--output', output, '--processes', '1'])
+        with open(output) as output_file:
+            records = [json.loads(line) for line in output_file]
+        self.assertRecords(records)
+
+
+class CallbackReceiverTestCase(unittest.TestCase):
+    """Tests around :class:`pydocusign.receiver.CallbackReceiver`."""
+    def setUp(self):
+        self.parsers = []
+        self.receiver = pydocusign.CallbackReceiver(
+            handlers=[self.parsers.append], queue_size=2, workers=2)
+
+    def post(self, body, method='POST'):
+        """Call receiver as WSGI application, return status."""
+        environ = {
+            'REQUEST_METHOD': method,
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': BytesIO(body),
+        }
+        start_response = mock.Mock()
+        self.receiver(environ, start_response)
+        return start_response.call_args[0][0]
+
+    def test_receive(self):
+        """Notifications are acknowledged, then handled by workers."""
+        self.receiver.start()
+        self.assertEqual(self.post(CallbackDataExtractionTestCase.xml),
+                         '200 OK')
+        self.receiver.stop()
+        self.assertEqual(len(self.parsers), 1)
+        self.assertEqual(self.parsers[0].envelope_id,
+                         'eeeeeeee-eeee-eeee-eeee-eeeeeeeeeeee')
+        metrics = self.receiver.metrics
+        self.assertEqual(metrics['received'], 1)
+        self.assertEqual(metrics['accepted'], 1)
+        self.assertEqual(metrics['processed'], 1)
+        self.assertEqual(metrics['queued'], 0)
+
+    def test_validation(self):
+        """Invalid requests are rejected."""
+        self.assertEqual(self.post(b'<Not a notification />'),
+                         '400 Bad Request')
+        self.assertEqual(self.post(b'', method='GET'),
+                         '405 Method Not Allowed')
+        self.receiver.max_body_size = 10
+        self.assertEqual(self.post(CallbackDataExtractionTestCase.xml),
+                         '413 Request Entity Too Large')
+        self.assertEqual(self.receiver.metrics['rejected'], 2)
+
+    def test_backpressure(self):
+        """Notifications are refused when queue is full."""
+        for i in range(2):
+            self.assertEqual(self.post(CallbackDataExtractionTestCase.xml),
+                             '200 OK')
+        self.assertEqual(self.post(CallbackDataExtractionTestCase.xml),
+                         '503 Service Unavailable')
+        self.assertEqual(self.receiver.metrics['overloaded'], 1)
+        self.assertEqual(self.receiver.metrics['queued'], 2)
+
+    def test_handler_failure(self):
+        """Handler failures are counted, workers keep working."""
+        self.receiver.handlers.insert(0, mock.Mock(side_effect=ValueError))
+        self.receiver.start()
+        self.post(CallbackDataExtractionTestCase.xml)
+        self.post(b'<DocuSignEnvelopeInformation>Invalid XML')
+        self.receiver.stop()
+        self.assertEqual(self.receiver.metrics['failed'], 2)
+        self.assertEqual(self.receiver.metrics['processed'], 0)
+
+
+    def test_malicious_body(self):
+        """Bodies with entities are rejected, even if they reach workers."""
+        bodies = [
+            CallbackDataExtractionTestCase.entity_expansion_xml,
+            CallbackDataExtractionTestCase.external_entity_xml('/etc/passwd'),
+        ]
+        for body in bodies:
+            self.assertEqual(self.post(body), '400 Bad Request')
+        self.assertEqual(self.receiver.metrics['rejected'], 2)
+        # Workers refuse to parse them too.
+        self.receiver.start()
+        start = time.time()
+        for body in bodies:
+            self.receiver.queue.put(body)
+        self.receiver.stop()
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(self.parsers, [])
+        self.assertEqual(self.receiver.metrics['failed'], 2)
+
+
+class CallbackDeduplicatorTestCase(unittest.TestCase):
+    """Tests around :class:`pydocusign.dedup.CallbackDeduplicator`."""
+    def test_key(self):
+        """Notifications are identified by envelope, time and statuses."""
+        xml = CallbackDataExtractionTestCase.xml
+        self.assertEqual(callback_key(xml), callback_key(xml))
+        self.assertEqual(callback_key(xml)[0],
+                         b'eeeeeeee-eeee-eeee-eeee-eeeeeeeeeeee')
+        self.assertNotEqual(
+            callback_key(xml),
+            callback_key(xml.replace(b'Delivered', b'Completed')))
+
+    def test_sqlite_store(self):
+        """Keys are persisted in SQLite store."""
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'callbacks.sqlite')
+            xml = CallbackDataExtractionTestCase.xml
+            deduplicator = pydocusign.CallbackDeduplicator(
+                store=SQLiteDedupStore(path))
+            self.assertTrue(deduplicator.add(xml))
+            # Another deduplicator, as if process was restarted.
+            deduplicator = pydocusign.CallbackDeduplicator(
+                store=SQLiteDedupStore(path))
+            self.assertFalse(deduplicator.add(xml))
+            deduplicator.discard(xml)
+            self.assertTrue(deduplicator.add(xml))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_memory_size(self):
+        """Memory store forgets least recently used keys."""
+        store = MemoryDedupStore(max_size=2)
+        self.assertTrue(store.add('a'))
+        self.assertTrue(store.add('b'))
+        self.assertFalse(store.add('a'))
+        self.assertTrue(store.add('c'))
+        self.assertTrue(store.add('b'))
+        self.assertFalse(store.add('c'))
+
+    def test_receiver(self):
+        """CallbackReceiver drops duplicates before queueing them."""
+        receiver = pydocusign.CallbackReceiver(
+            queue_size=1,
+            deduplicator=pydocusign.CallbackDeduplicator())
+        xml = CallbackDataExtractionTestCase.xml
+        other_xml = xml.replace(b'Delivered', b'Completed')
+        self.assertEqual(receiver.receive(xml), (200, 'OK'))
+        self.assertEqual(receiver.receive(xml),
+                         (200, 'Duplicate notification'))
+        # Refused notifications are not remembered.
+        self.assertEqual(receiver.receive(other_xml)[0], 503)
+        receiver.queue.get()
+        self.assertEqual(receiver.receive(other_xml), (200, 'OK'))
+        self.assertEqual(receiver.metrics['duplicates'], 1)
+
+    def test_receiver_failure(self):
+        """Notifications whose processing failed are accepted again."""
+        handler = mock.Mock(side_effect=[ValueError, None])
+        receiver = pydocusign.CallbackReceiver(
+            handlers=[handler],
+            deduplicator=pydocusign.CallbackDeduplicator())
+        xml = CallbackDataExtractionTestCase.xml
+        self.assertEqual(receiver.receive(xml), (200, 'OK'))
+        receiver.process(receiver.queue.get())
+        self.assertEqual(receiver.metrics['failed'], 1)
+        # DocuSign redelivers notification.
+        self.assertEqual(receiver.receive(xml), (200, 'OK'))
+        receiver.process(receiver.queue.get())
+        self.assertEqual(receiver.metrics['processed'], 1)
+        self.assertEqual(receiver.receive(xml),
+                         (200, 'Duplicate notification'))
+
+
 class DocuSignOAuth2TestCase(unittest.TestCase):
     def _environ_to_self(self, name):
         """Remove the variable from environ and cache it on a local attribute."""